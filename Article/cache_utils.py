@@ -0,0 +1,122 @@
+"""
+Response cache helpers for the public article APIs.
+
+Cached payloads are keyed by a per-category generation counter. Saving or
+deleting an article (or one of its translations) bumps the counter for the
+affected category, so stale entries are simply never read again instead of
+waiting for a TTL to expire.
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+# Backstop TTL for cached API payloads; invalidation is driven by generations.
+API_CACHE_TTL = getattr(settings, 'ARTICLE_API_CACHE_TTL', 60 * 60 * 24)
+# Generation counters must outlive every payload that references them.
+GENERATION_TTL = None
+
+
+def _category_token(category_name):
+    return (category_name or '').strip().lower()
+
+
+def _generation_key(category_name):
+    return f'api_gen:{_category_token(category_name)}'
+
+
+def _generation_seed():
+    # Generations come from the clock rather than a counter from 0 so a
+    # flushed cache never hands out a generation (and ETag) issued before.
+    return time.time_ns()
+
+
+def get_category_generation(category_name):
+    """Return the current cache generation for a category."""
+    key = _generation_key(category_name)
+    try:
+        generation = cache.get(key)
+        if generation is None:
+            cache.add(key, _generation_seed(), GENERATION_TTL)
+            generation = cache.get(key)
+        return int(generation or 0)
+    except Exception:
+        return 0
+
+
+def get_category_generations(category_names):
+    """Return {token: generation} for several categories, reading them in one get_many()."""
+    keys = {_generation_key(name): _category_token(name) for name in category_names}
+    try:
+        found = cache.get_many(list(keys))
+    except Exception:
+        found = {}
+    generations = {}
+    for key, token in keys.items():
+        if key in found:
+            generations[token] = int(found[key] or 0)
+        else:
+            generations[token] = get_category_generation(token)
+    return generations
+
+
+def bump_category_generation(category_name):
+    """Invalidate every cached API payload for `category_name`."""
+    if not category_name:
+        return
+    key = _generation_key(category_name)
+    try:
+        # a fresh clock value rather than incr(): on the database and file
+        # backends incr() is a get + set, so two concurrent bumps could
+        # store the same number; two set()s both leave a new generation
+        generation = _generation_seed()
+        if cache.get(key) == generation:
+            generation += 1
+        cache.set(key, generation, GENERATION_TTL)
+    except Exception:
+        logger.exception('Failed to bump API cache generation for %s', category_name)
+
+
+def _origin_token(request):
+    return hashlib.sha1(request.build_absolute_uri('/').encode('utf-8')).hexdigest()[:12]
+
+
+def api_cache_key(request, category_name, *parts):
+    """Build a response cache key for a category listing.
+
+    The scheme/host is part of the key because payloads contain absolute URLs.
+    """
+    generation = get_category_generation(category_name)
+    suffix = ':'.join(str(p) for p in parts)
+    return f'api_articles:{_category_token(category_name)}:{generation}:{_origin_token(request)}:{suffix}'
+
+
+def feed_cache_key(request, category_names, *parts):
+    """Build a response cache key for a multi-category feed.
+
+    It changes whenever any of the categories' generations is bumped.
+    """
+    generations = get_category_generations(category_names)
+    state = ','.join(f'{token}={generation}' for token, generation in generations.items())
+    suffix = ':'.join(str(p) for p in parts)
+    digest = hashlib.sha1(f'{state}|{suffix}'.encode('utf-8')).hexdigest()
+    return f'api_feed:{_origin_token(request)}:{digest}'
+
+
+def get_cached_payload(key):
+    try:
+        return cache.get(key)
+    except Exception:
+        return None
+
+
+def set_cached_payload(key, payload):
+    try:
+        cache.set(key, payload, API_CACHE_TTL)
+    except Exception:
+        logger.exception('Failed to store API payload in cache')
@@ -0,0 +1,140 @@
+"""
+Validators for conditional GET (ETag / 304) on the public article page and
+APIs.
+
+Each validator is cheap: the article ones read a single row of timestamps
+and the listing ones only read the category generation from the cache, so
+a matching If-None-Match is answered with a 304 before the view loads,
+renders or serializes anything.
+
+There is no Last-Modified: the article responses also depend on the
+category generation and the site settings version, which have no
+timestamp, so an If-Modified-Since check would answer 304 for a stale copy.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from Article.cache_utils import get_category_generation, get_category_generations
+from Article.feed import feed_params
+from DashboardAdmin.models import Article, ArticleTranslation
+from DashboardAdmin.site_settings import get_site_snapshot
+
+
+def _page_lang(request, lang):
+    if lang is None:
+        lang = getattr(request, 'language', 'id')
+    if lang == 'jp':
+        lang = 'ja'
+    if lang not in ['id', 'en', 'ja']:
+        lang = 'id'
+    return lang
+
+
+def _api_lang(request):
+    # mirrors Article.views._normalize_lang for the `lang` query parameter
+    lang = (request.GET.get('lang') or getattr(request, 'language', 'id') or 'id').lower()
+    if lang == 'jp':
+        lang = 'ja'
+    return lang if lang in ['id', 'en', 'ja'] else 'id'
+
+
+def make_etag(*parts):
+    """Hash `parts` plus the ETAG_SALT setting (changed on deploy) into an entity tag."""
+    raw = ':'.join(str(p) for p in (getattr(settings, 'ETAG_SALT', ''),) + parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _origin(request):
+    return request.build_absolute_uri('/')
+
+
+def _article_state(request, slug, lang=None):
+    """Timestamps that determine the article page/API body, memoized per request.
+
+    Returns None when no published article matches so the view can 404.
+    """
+    key = (slug, lang)
+    memo = getattr(request, '_article_state', None)
+    if memo is not None and memo[0] == key:
+        return memo[1]
+
+    qs = Article.objects.filter(slug=slug, status='published')
+    fields = ['id', 'updated_at', 'category__name']
+    if lang and lang != 'id':
+        translations = ArticleTranslation.objects.filter(article=OuterRef('pk'), lang=lang)
+        qs = qs.annotate(translation_updated_at=Subquery(translations.values('updated_at')[:1]))
+        fields.append('translation_updated_at')
+    # slug is unique, so skip the ORDER BY that first() would add
+    state = next(iter(qs.values(*fields)[:1]), None)
+    request._article_state = (key, state)
+    return state
+
+
+def article_page_etag(request, slug, lang=None, **kwargs):
+    lang = _page_lang(request, lang)
+    state = _article_state(request, slug, lang)
+    if state is None:
+        return None
+    # the page also shows the category and the site settings (ads)
+    return make_etag(
+        'page', _origin(request), lang, state['id'],
+        state['updated_at'].isoformat(), state.get('translation_updated_at'),
+        get_category_generation(state['category__name']),
+        get_site_snapshot().version,
+    )
+
+
+def article_api_etag(request, slug, **kwargs):
+    state = _article_state(request, slug)
+    if state is None:
+        return None
+    return make_etag(
+        'api', _origin(request), state['id'], state['updated_at'].isoformat(),
+        get_category_generation(state['category__name']),
+    )
+
+
+def category_listing_etag(request, category_name, **kwargs):
+    """ETag for the category listing/pinned APIs.
+
+    The category generation is bumped on every save/delete of an article or
+    translation in the category, so it fully determines these payloads.
+    """
+    params = sorted((k, v) for k, v in request.GET.items() if k in ('lang', 'page', 'page_size', 'cursor'))
+    return make_etag(
+        'listing', request.path, _origin(request), _api_lang(request), params,
+        get_category_generation(category_name),
+    )
+
+
+def feed_etag(request, **kwargs):
+    """ETag for the aggregated feed: every requested category's generation."""
+    categories, limit, lang = feed_params(request)
+    return make_etag(
+        'feed', _origin(request), lang, limit,
+        list(get_category_generations(categories).items()),
+    )
+
+
+def conditional(etag_func):
+    """`condition()` plus `Cache-Control: no-cache`.
+
+    no-cache lets browsers and proxies keep the body but makes them
+    revalidate it on every use, which the validators above answer cheaply.
+    """
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                patch_cache_control(response, no_cache=True)
+            return response
+        return inner
+    return decorator
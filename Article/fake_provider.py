@@ -0,0 +1,128 @@
+"""
+Local stand-in for LibreTranslate, for measuring the translation pipeline offline.
+
+FakeProvider serves POST /translate with the LibreTranslate JSON protocol
+(`q` as a string or a list, `translatedText` in the same shape). Output is
+deterministic: every segment becomes "[<target>] <text>". Latency, random
+5xx errors and a 429 rate limit are configurable, and GET /stats returns
+request counters. Used by `manage.py fake_translate_provider` and
+`manage.py translation_benchmark`; never by the site itself.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeProvider:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, latency_per_char=0.0, error_rate=0.0,
+                 rate_limit=0.0, burst=10, seed=0):
+        self.latency = latency
+        self.latency_per_char = latency_per_char
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self.reset_stats()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/translate'
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {'requests': 0, 'segments': 0, 'chars': 0, 'errors': 0, 'throttled': 0}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-provider', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def serve_forever(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+    def translate(self, payload):
+        """Return (status, body) for one /translate request."""
+        q = payload.get('q')
+        target = payload.get('target') or 'en'
+        segments = q if isinstance(q, list) else [q or '']
+        chars = sum(len(text or '') for text in segments)
+        with self._lock:
+            self.stats['requests'] += 1
+            if self.rate_limit > 0:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate_limit)
+                self._refilled_at = now
+                if self._tokens < 1:
+                    self.stats['throttled'] += 1
+                    return 429, {'error': 'Slowdown: too many requests'}
+                self._tokens -= 1
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+            if failed:
+                self.stats['errors'] += 1
+            else:
+                self.stats['segments'] += len(segments)
+                self.stats['chars'] += chars
+        delay = self.latency + self.latency_per_char * chars
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            return 500, {'error': 'Fake provider error'}
+        translated = [f'[{target}] {text}' for text in segments]
+        return 200, {'translatedText': translated if isinstance(q, list) else translated[0]}
+
+    def _handler(self):
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status, body):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                if self.path.rstrip('/') != '/translate':
+                    return self._send(404, {'error': 'Not found'})
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    return self._send(400, {'error': 'Invalid JSON'})
+                self._send(*provider.translate(payload))
+
+            def do_GET(self):
+                if self.path.rstrip('/') != '/stats':
+                    return self._send(404, {'error': 'Not found'})
+                with provider._lock:
+                    stats = dict(provider.stats)
+                self._send(200, stats)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
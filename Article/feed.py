@@ -0,0 +1,82 @@
+"""
+Aggregated home/category feed.
+
+Loads the first page (and with it the pinned hero) of several categories
+at once. The query count is fixed no matter how many sections are asked
+for: one windowed SELECT for the articles, one grouped COUNT for the
+totals and, for translated languages, one SELECT for the translations.
+"""
+from django.db.models import Count, F, Window
+from django.db.models.functions import Lower, RowNumber
+
+from DashboardAdmin.models import Article, ArticleTranslation
+
+
+# Public listing order: pinned hero first, then newest; id breaks ties for keyset cursors
+LISTING_ORDERING = ['-is_pinned', '-published_at', '-created_at', '-id']
+
+FEED_CATEGORIES = ('anime', 'gaming', 'geek', 'event')
+FEED_DEFAULT_LIMIT = 10
+FEED_MAX_LIMIT = 50
+FEED_MAX_CATEGORIES = 10
+
+
+def feed_params(request):
+    """Parse (categories, limit, lang) from the feed query string."""
+    categories = []
+    for name in (request.GET.get('categories') or '').split(','):
+        token = name.strip().lower()
+        if token and token not in categories:
+            categories.append(token)
+    categories = categories[:FEED_MAX_CATEGORIES] or list(FEED_CATEGORIES)
+
+    try:
+        limit = int(request.GET.get('limit', FEED_DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        limit = FEED_DEFAULT_LIMIT
+    limit = min(max(limit, 1), FEED_MAX_LIMIT)
+
+    lang = (request.GET.get('lang') or getattr(request, 'language', 'id') or 'id').lower()
+    if lang == 'jp':
+        lang = 'ja'
+    if lang not in ['id', 'en', 'ja']:
+        lang = 'id'
+    return categories, limit, lang
+
+
+def _ordering_expressions():
+    return [F(name[1:]).desc() if name.startswith('-') else F(name).asc() for name in LISTING_ORDERING]
+
+
+def load_feed(categories, limit, lang):
+    """Return ({category: {'articles': [...], 'total': n}}, {article_id: translation}).
+
+    Sections follow the order of `categories`; unknown categories are empty.
+    Each section's articles are the first `limit` rows in LISTING_ORDERING,
+    i.e. exactly page 1 of the per-category listing API.
+    """
+    published = (
+        Article.objects.filter(status='published')
+        .annotate(category_key=Lower('category__name'))
+        .filter(category_key__in=categories)
+    )
+
+    rows = (
+        published.select_related('category')
+        .defer('content', 'rendered_content')
+        .annotate(position=Window(RowNumber(), partition_by=[F('category_id')], order_by=_ordering_expressions()))
+        .filter(position__lte=limit)
+        .order_by('category_id', 'position')
+    )
+    totals = dict(published.order_by().values_list('category_key').annotate(total=Count('id')))
+
+    sections = {name: {'articles': [], 'total': totals.get(name, 0)} for name in categories}
+    for article in rows:
+        sections[article.category_key]['articles'].append(article)
+
+    translations = {}
+    article_ids = [a.id for section in sections.values() for a in section['articles']]
+    if lang != 'id' and article_ids:
+        qs = ArticleTranslation.objects.filter(article_id__in=article_ids, lang=lang).defer('content', 'rendered_content', 'segments')
+        translations = {t.article_id: t for t in qs}
+    return sections, translations
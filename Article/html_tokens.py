@@ -0,0 +1,92 @@
+"""
+Single-pass tokenizer for article HTML.
+
+`tokenize` walks the HTML once with one precompiled pattern and yields
+(kind, value) pairs whose values join back to the input:
+
+- TEXT: a text node
+- TAG: any other tag
+- EMBED: an <iframe> block, with its <div>/<figure>/<p> wrapper when it
+  has one, or an <embed> tag; kept whole so nothing inside it is text
+
+Embed expansion (autoembed), YouTube link shielding, translation
+segmentation and excerpt extraction all consume this stream instead of
+re-splitting the HTML with their own regexes.
+"""
+import re
+
+
+TEXT = 'text'
+TAG = 'tag'
+EMBED = 'embed'
+
+_TOKEN_RE = re.compile(
+    r'(?P<embed>'
+    r'<(?:div|figure|p)\b[^>]*>\s*<iframe[\s\S]*?>[\s\S]*?</iframe>\s*</(?:div|figure|p)>'
+    r'|<iframe[\s\S]*?>[\s\S]*?</iframe>'
+    r'|<embed[\s\S]*?/?>'
+    r')'
+    r'|<[^>]+>',
+    flags=re.I,
+)
+
+
+def tokenize(html):
+    """Yield (kind, value) tokens of `html` in document order."""
+    if not html:
+        return
+    pos = 0
+    for m in _TOKEN_RE.finditer(html):
+        start = m.start()
+        if start > pos:
+            yield TEXT, html[pos:start]
+        yield (EMBED if m.lastgroup == 'embed' else TAG), m.group(0)
+        pos = m.end()
+    if pos < len(html):
+        yield TEXT, html[pos:]
+
+
+def split_text(text, pattern):
+    """Split plain `text` around matches of the compiled `pattern`.
+
+    Returns a list of (is_match, value) pairs.
+    """
+    parts = []
+    pos = 0
+    for m in pattern.finditer(text):
+        if m.start() > pos:
+            parts.append((False, text[pos:m.start()]))
+        parts.append((True, m.group(0)))
+        pos = m.end()
+    if pos < len(text):
+        parts.append((False, text[pos:]))
+    return parts
+
+
+def sub_text(html, pattern, repl):
+    """Apply `pattern.sub(repl, ...)` to the text nodes of `html` only."""
+    if not html:
+        return html
+    return ''.join(pattern.sub(repl, value) if kind == TEXT else value for kind, value in tokenize(html))
+
+
+def segments(html, preserve=None):
+    """Return the (is_text, value) pieces of `html` for translation.
+
+    Text nodes are split further around matches of the compiled `preserve`
+    pattern; those matches come back with is_text False, like tags and embeds.
+    """
+    pieces = []
+    for kind, value in tokenize(html):
+        if kind != TEXT:
+            pieces.append((False, value))
+        elif preserve is None:
+            pieces.append((True, value))
+        else:
+            pieces.extend((not is_match, part) for is_match, part in split_text(value, preserve))
+    return pieces
+
+
+def text_content(html):
+    """Return the text nodes of `html` joined, with tags and embeds dropped."""
+    return ''.join(value for kind, value in tokenize(html) if kind == TEXT)
@@ -0,0 +1,82 @@
+"""
+Thread-safe, size-bounded least-recently-used mapping with hit counters.
+
+Used for the process-local translation memory (Article/translation_memory.py)
+and for memoizing the embed template filters.
+"""
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class LRU:
+    """Thread-safe, size-bounded least-recently-used mapping."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+
+def memoize_text(max_entries):
+    """Cache a one-argument text function by the sha256 of its input.
+
+    Keys stay small however long the input is, and a changed input simply
+    misses. The LRU is available as `func.cache`.
+    """
+    def decorator(func):
+        cache = LRU(max_entries)
+
+        @functools.wraps(func)
+        def wrapper(value):
+            if not value:
+                return func(value)
+            key = hashlib.sha256(str(value).encode('utf-8')).hexdigest()
+            result = cache.get(key)
+            if result is None:
+                result = func(value)
+                cache.set(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
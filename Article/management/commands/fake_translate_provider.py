@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from Article.fake_provider import FakeProvider
+
+
+class Command(BaseCommand):
+    help = 'Serve a fake LibreTranslate /translate endpoint with deterministic output (for benchmarks and local development)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=5005)
+        parser.add_argument('--latency', type=float, default=0.05, help='Seconds added to every request (default 0.05)')
+        parser.add_argument('--latency-per-char', type=float, default=0.0, help='Seconds added per translated character')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500')
+        parser.add_argument('--rate-limit', type=float, default=0.0, help='Requests/second before answering 429 (0 = unlimited)')
+        parser.add_argument('--burst', type=int, default=10, help='Requests allowed above the rate limit in a burst')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the error sampling')
+
+    def handle(self, *args, **options):
+        provider = FakeProvider(
+            host=options['host'],
+            port=options['port'],
+            latency=options['latency'],
+            latency_per_char=options['latency_per_char'],
+            error_rate=options['error_rate'],
+            rate_limit=options['rate_limit'],
+            burst=options['burst'],
+            seed=options['seed'],
+        )
+        self.stdout.write(f'Fake translation provider on {provider.url} (set TRANSLATE_API_URL to use it)')
+        try:
+            provider.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f'Stopped. {provider.stats}')
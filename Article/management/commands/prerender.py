@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Article.prerender import PrerenderError, prerender_article, prerender_root, prerender_shells, prune_articles
+from DashboardAdmin.models import Article
+
+
+class Command(BaseCommand):
+    help = 'Render published articles (id/en/ja) and the home/category shells into PRERENDER_ROOT for nginx'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--slug', action='append', default=[], help='Only render this article (repeatable)')
+        parser.add_argument('--articles-only', action='store_true', help='Skip the home and category shells')
+        parser.add_argument('--shells-only', action='store_true', help='Only render the home and category shells')
+        parser.add_argument('--base-url', help='Absolute site URL used for links in the pages (default: PRERENDER_BASE_URL)')
+
+    def handle(self, *args, **options):
+        base_url = options['base_url']
+        self.stdout.write(f'Writing to {prerender_root()}')
+        try:
+            if not options['articles_only'] and not options['slug']:
+                count = prerender_shells(base_url)
+                self.stdout.write(f'Shells: {count} pages')
+            if options['shells_only']:
+                return
+
+            # pages are rendered through the views, which load what they need
+            articles = Article.objects.filter(status='published').only('id', 'slug', 'status')
+            if options['slug']:
+                articles = articles.filter(slug__in=options['slug'])
+
+            pages = 0
+            slugs = set()
+            for article in articles.iterator():
+                pages += prerender_article(article, base_url=base_url)
+                slugs.add(article.slug)
+            self.stdout.write(f'Articles: {len(slugs)} articles, {pages} pages')
+
+            if not options['slug']:
+                removed = prune_articles(slugs)
+                if removed:
+                    self.stdout.write(f'Removed {removed} unpublished articles')
+        except PrerenderError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS('Pre-render complete.'))
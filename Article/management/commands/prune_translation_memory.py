@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from Article.translation_memory import prune
+
+
+class Command(BaseCommand):
+    help = 'Delete translation memory entries that have not been used recently'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--unused-days', type=int, default=180, help='Delete entries not used for this many days (default 180)')
+        parser.add_argument('--max-rows', type=int, help='Then keep at most this many of the most recently used entries')
+
+    def handle(self, *args, **options):
+        deleted = prune(unused_days=options['unused_days'], max_rows=options['max_rows'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} translation memory entries.'))
@@ -0,0 +1,225 @@
+import json
+import os
+import random
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from Article import translation_client, translation_memory
+from Article.fake_provider import FakeProvider
+
+
+WORDS = (
+    'musik rilis terbaru album konser penggemar lagu anime episode musim karakter studio '
+    'cerita game pemain update acara jepang jakarta tiket panggung penyanyi kolaborasi '
+    'video resmi trailer jadwal tayang komunitas cosplay festival hadiah'
+).split()
+# repeated in every article of a run, like the real sign-offs, so cache and memory reuse shows up;
+# every text segment carries the run salt so fake output is never served for real text
+BOILERPLATE = (
+    '<p><strong>Baca juga ({salt}):</strong> <a href="/article/berita-{salt}/">Berita minggu ini {salt}</a></p>',
+    '<p>Ikuti kami di https://instagram.com/cleansoundstudio untuk update terbaru ({salt}).</p>',
+    '<p>Salam hangat, Tim CleanSound Studio {salt}</p>',
+)
+
+
+def synthetic_article(index, paragraphs, rng, salt):
+    """HTML shaped like the site's articles: headings, paragraphs, boilerplate and embeds."""
+    def sentence(n):
+        return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+
+    title = f'{sentence(6)[:-1]} {salt}-{index}'
+    blocks = [f'<h2>{sentence(5)} {salt}</h2>']
+    for p in range(paragraphs):
+        # the per-run salt keeps runs cold and keeps fake output out of later real lookups
+        blocks.append(f'<p>{sentence(rng.randint(12, 40))} {sentence(rng.randint(8, 25))} ({salt}-{index}-{p})</p>')
+        if p == paragraphs // 3:
+            blocks.append(f'<p>Tonton videonya ({salt}) di https://youtu.be/abcdefghijk sekarang ({salt}).</p>')
+        if p == paragraphs // 2:
+            blocks.append(
+                '<div class="w-full aspect-video mb-6"><iframe src="https://www.youtube.com/embed/abcdefghijk" '
+                'frameborder="0" allowfullscreen></iframe></div>'
+            )
+    blocks.extend(line.format(salt=salt) for line in BOILERPLATE)
+    return title, ''.join(blocks)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the translation pipeline on a synthetic corpus against an in-process fake provider '
+        '(or --url): segments/sec, provider calls per article and p50/p95 article duration'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['html', 'pipeline'], default='html',
+                            help='html: _translate_html_preserve_tags to en and ja; pipeline: save articles and run '
+                                 'their translation jobs (writes and then deletes benchmark rows in the database)')
+        parser.add_argument('--articles', type=int, default=20)
+        parser.add_argument('--paragraphs', type=int, default=12)
+        parser.add_argument('--concurrency', type=int, default=2, help='Articles processed in parallel')
+        parser.add_argument('--url', help='Benchmark this provider instead of the in-process fake')
+        parser.add_argument('--latency', type=float, default=0.05, help='Fake provider seconds per request')
+        parser.add_argument('--latency-per-char', type=float, default=0.0001, help='Fake provider seconds per character')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fake provider fraction of 500 answers')
+        parser.add_argument('--rate-limit', type=float, default=0.0, help='Fake provider requests/second before 429')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        salt = uuid.uuid4().hex[:8]
+        corpus = [synthetic_article(i, options['paragraphs'], rng, salt) for i in range(options['articles'])]
+        concurrency = max(1, options['concurrency'])
+
+        fake = None
+        url = options['url']
+        if not url:
+            fake = FakeProvider(
+                latency=options['latency'],
+                latency_per_char=options['latency_per_char'],
+                error_rate=options['error_rate'],
+                rate_limit=options['rate_limit'],
+                seed=options['seed'],
+            ).start()
+            url = fake.url
+
+        saved_env = {'TRANSLATE_API_URL': os.environ.get('TRANSLATE_API_URL')}
+        os.environ['TRANSLATE_API_URL'] = url
+        client = translation_client.configure(pool_size=concurrency * translation_client.BATCH_PARALLELISM)
+        try:
+            run = self._run_html if options['mode'] == 'html' else self._run_pipeline
+            started = time.perf_counter()
+            durations, failures = run(corpus, concurrency, salt)
+            elapsed = time.perf_counter() - started
+        finally:
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+            if fake is not None:
+                fake.stop()
+            translation_client.configure(pool_size=None)
+
+        stats = client.stats()
+        report = {
+            'mode': options['mode'],
+            'provider': 'fake' if fake else url,
+            'articles': len(corpus),
+            'concurrency': concurrency,
+            'failures': failures,
+            'seconds': round(elapsed, 3),
+            'provider_calls': stats['requests'],
+            'provider_calls_per_article': round(stats['requests'] / len(corpus), 2) if corpus else 0,
+            'segments': stats['segments'],
+            'segments_per_sec': round(stats['segments'] / elapsed, 1) if elapsed else 0,
+            'provider_avg_ms': stats['avg_ms'],
+            'article_p50_ms': round(percentile(durations, 50) * 1000, 1),
+            'article_p95_ms': round(percentile(durations, 95) * 1000, 1),
+            'article_mean_ms': round(statistics.fmean(durations) * 1000, 1) if durations else 0,
+            'limiter': stats['limiter'],
+        }
+        if fake is not None:
+            report['fake_provider'] = fake.stats
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for key, value in report.items():
+            if key not in ('limiter', 'fake_provider'):
+                self.stdout.write(f'{key:>28}: {value}')
+        if fake is not None:
+            self.stdout.write(f"{'fake_provider':>28}: {fake.stats}")
+
+    def _timed_pool(self, func, items, concurrency):
+        durations = []
+        failures = 0
+
+        def _timed(item):
+            started = time.perf_counter()
+            try:
+                func(item)
+                return time.perf_counter() - started, None
+            except Exception as e:
+                return time.perf_counter() - started, e
+            finally:
+                if concurrency > 1:
+                    connections.close_all()
+
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='translation-benchmark') as pool:
+                outcomes = list(pool.map(_timed, items))
+        else:
+            outcomes = [_timed(item) for item in items]
+        for seconds, error in outcomes:
+            durations.append(seconds)
+            if error is not None:
+                failures += 1
+                self.stderr.write(f'  failed: {error}')
+        return durations, failures
+
+    def _run_html(self, corpus, concurrency, salt):
+        from Article.views import _translate_html_preserve_tags
+
+        def translate(article):
+            _, html = article
+            for lang in ('en', 'ja'):
+                _translate_html_preserve_tags(html, lang)
+
+        return self._timed_pool(translate, corpus, concurrency)
+
+    def _run_pipeline(self, corpus, concurrency, salt):
+        from DashboardAdmin.models import Article, TranslationJob, TranslationMemory
+        from DashboardAdmin.translation_jobs import _source_hash, run_job
+
+        owner = f'benchmark:{salt}'
+        articles = []
+        job_ids = []
+        try:
+            # saved as drafts so the post_save signal queues nothing, then published and
+            # leased to this run directly so a running worker never picks the jobs up
+            for i, (title, html) in enumerate(corpus):
+                articles.append(Article.objects.create(
+                    article_id=f'bench-{salt}-{i}', title=title, content=html, status='draft',
+                ))
+            Article.objects.filter(pk__in=[a.pk for a in articles]).update(status='published')
+            lease_expires_at = timezone.now() + timedelta(hours=1)
+            TranslationJob.objects.bulk_create([
+                TranslationJob(
+                    kind=TranslationJob.KIND_ARTICLE, object_id=article.pk,
+                    source_hash=_source_hash(article.title, article.content),
+                    status=TranslationJob.STATUS_RUNNING, lease_owner=owner, lease_expires_at=lease_expires_at,
+                    # fail on the first error instead of going back to pending
+                    attempts=1, max_attempts=1,
+                )
+                for article in articles
+            ])
+            jobs = list(TranslationJob.objects.filter(lease_owner=owner))
+            job_ids = [job.pk for job in jobs]
+            return self._timed_pool(lambda job: run_job(job, owner) or self._raise(job), jobs, concurrency)
+        finally:
+            TranslationJob.objects.filter(pk__in=job_ids).delete()
+            for article in articles:
+                article.delete()
+            TranslationMemory.objects.filter(translated__contains=salt).delete()
+            translation_memory._lru.clear()
+
+    @staticmethod
+    def _raise(job):
+        job.refresh_from_db()
+        raise RuntimeError(job.last_error or 'job failed')
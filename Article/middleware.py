@@ -2,7 +2,16 @@
 Language middleware to handle language routing.
 Extracts language from URL and stores it in request context.
 """
+import logging
+import threading
+import time
+
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+
+query_logger = logging.getLogger('Article.querystats')
 
 
 class NgrokHostMiddleware:
@@ -59,3 +68,72 @@ class LanguageMiddleware:
         
         response = self.get_response(request)
         return response
+
+
+class QueryStatsMiddleware:
+    """Record SQL query count and total DB time per resolved view name.
+
+    Opt-in: only active when settings.QUERY_STATS_ENABLED is true. Totals are
+    kept per process in `QueryStatsMiddleware.stats` and each request is
+    logged on the `Article.querystats` logger. When DEBUG is on the numbers
+    are also sent back as X-Query-Count / X-Query-Time-Ms headers.
+
+    Streaming responses render while the body is sent, so their queries are
+    counted until the stream is exhausted (or closed) and recorded then;
+    they get no headers, which would only cover the work done before the
+    first chunk.
+    """
+
+    stats = {}
+    _lock = threading.Lock()
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_STATS_ENABLED', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = {'count': 0, 'time': 0.0}
+
+        def _wrapper(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                counter['count'] += 1
+                counter['time'] += time.perf_counter() - start
+
+        with connection.execute_wrapper(_wrapper):
+            response = self.get_response(request)
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = self._counted_stream(request, response.streaming_content, _wrapper, counter)
+            return response
+
+        self._report(request, counter)
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(counter['count'])
+            response['X-Query-Time-Ms'] = f"{counter['time'] * 1000:.1f}"
+        return response
+
+    def _counted_stream(self, request, content, wrapper, counter):
+        try:
+            with connection.execute_wrapper(wrapper):
+                yield from content
+        finally:
+            self._report(request, counter)
+
+    def _report(self, request, counter):
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name if match else None) or request.path
+        self.record(view_name, counter['count'], counter['time'])
+        query_logger.info('%s queries=%d db_ms=%.1f', view_name, counter['count'], counter['time'] * 1000)
+
+    @classmethod
+    def record(cls, view_name, count, db_time):
+        with cls._lock:
+            entry = cls.stats.setdefault(view_name, {'requests': 0, 'queries': 0, 'db_time': 0.0, 'max_queries': 0})
+            entry['requests'] += 1
+            entry['queries'] += count
+            entry['db_time'] += db_time
+            entry['max_queries'] = max(entry['max_queries'], count)
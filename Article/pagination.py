@@ -0,0 +1,157 @@
+"""
+Keyset (cursor) pagination for ordered querysets.
+
+Unlike Django's Paginator this never runs COUNT(*) and never uses OFFSET:
+each page is fetched with a WHERE clause that starts right after (or
+before) the row encoded in the cursor, so page 200 costs the same as
+page 1.
+
+Cursors are opaque url-safe tokens holding the ordering values of the
+boundary row. Nullable fields follow MySQL's default ordering (NULLs sort
+first ascending, last descending) and the queryset is ordered explicitly
+so other backends behave the same.
+"""
+import base64
+import json
+
+from django.db.models import F, Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorPage:
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.object_list = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+
+def _parse_ordering(model, ordering):
+    keys = []
+    for name in ordering:
+        desc = name.startswith('-')
+        field_name = name.lstrip('-')
+        field = model._meta.pk if field_name == 'pk' else model._meta.get_field(field_name)
+        keys.append((field.attname, desc, field))
+    if not any(f.primary_key for _, _, f in keys):
+        # the primary key makes every position unique
+        keys.append((model._meta.pk.attname, keys[-1][1] if keys else True, model._meta.pk))
+    return keys
+
+
+def _to_json(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps({'d': direction, 'v': [_to_json(v) for v in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, keys):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        direction = data['d']
+        raw_values = data['v']
+        if direction not in ('n', 'p') or len(raw_values) != len(keys):
+            raise ValueError('cursor shape mismatch')
+        values = [None if v is None else field.to_python(v) for v, (_, _, field) in zip(raw_values, keys)]
+    except Exception as e:
+        raise InvalidCursor(str(e))
+    return direction, values
+
+
+def _order_by(keys, reverse):
+    expressions = []
+    for attname, desc, field in keys:
+        if desc != reverse:
+            expressions.append(F(attname).desc(nulls_last=True))
+        else:
+            expressions.append(F(attname).asc(nulls_first=True))
+    return expressions
+
+
+def _beyond(attname, desc, field, value):
+    """Q for rows strictly past `value` when walking in the given direction."""
+    if desc:
+        # descending, NULLs last
+        if value is None:
+            return None
+        q = Q(**{f'{attname}__lt': value})
+        if field.null:
+            q |= Q(**{f'{attname}__isnull': True})
+        return q
+    # ascending, NULLs first
+    if value is None:
+        return Q(**{f'{attname}__isnull': False})
+    return Q(**{f'{attname}__gt': value})
+
+
+def _equal(attname, value):
+    if value is None:
+        return Q(**{f'{attname}__isnull': True})
+    return Q(**{attname: value})
+
+
+def _seek(keys, values, reverse):
+    condition = Q(pk__in=[])
+    prefix = Q()
+    for (attname, desc, field), value in zip(keys, values):
+        step = _beyond(attname, desc != reverse, field, value)
+        if step is not None:
+            condition |= prefix & step
+        prefix &= _equal(attname, value)
+    return condition
+
+
+def keyset_paginate(queryset, ordering, cursor=None, page_size=10):
+    """Return a CursorPage of `queryset` ordered by `ordering`.
+
+    `ordering` is a list of field names, prefixed with '-' for descending.
+    Raises InvalidCursor for tokens that cannot be decoded.
+    """
+    keys = _parse_ordering(queryset.model, ordering)
+    direction, values = ('n', None)
+    if cursor:
+        direction, values = decode_cursor(cursor, keys)
+    reverse = direction == 'p'
+
+    qs = queryset.order_by(*_order_by(keys, reverse))
+    if values is not None:
+        qs = qs.filter(_seek(keys, values, reverse))
+
+    rows = list(qs[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if reverse:
+        rows.reverse()
+
+    def position(obj):
+        return [getattr(obj, attname) for attname, _, _ in keys]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or reverse:
+            next_cursor = encode_cursor('n', position(rows[-1]))
+        if (has_more and reverse) or (values is not None and not reverse):
+            prev_cursor = encode_cursor('p', position(rows[0]))
+    return CursorPage(rows, next_cursor=next_cursor, prev_cursor=prev_cursor)
@@ -0,0 +1,166 @@
+"""
+Static pre-rendering of the public pages for nginx.
+
+Pages are rendered through the normal views with a synthetic request and
+written under PRERENDER_ROOT using the URL path as directory, e.g.
+``en/article/<slug>/index.html``. nginx serves a file when one exists
+and proxies to Django otherwise, so a missing file is never wrong, only
+slower. Files are replaced atomically so nginx never reads a partial page.
+"""
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.test import RequestFactory
+from django.urls import Resolver404, resolve
+
+
+logger = logging.getLogger(__name__)
+
+# URL prefix per language; /jp/ and /id/ aliases are left to Django
+LANG_PREFIXES = {'id': '', 'en': '/en', 'ja': '/ja'}
+SHELL_PATHS = ('/', '/anime/', '/event/', '/game/', '/geek/')
+
+
+class PrerenderError(Exception):
+    pass
+
+
+def prerender_root():
+    return Path(settings.PRERENDER_ROOT)
+
+
+def article_paths(slug, langs=None):
+    langs = langs or list(LANG_PREFIXES)
+    return [f'{LANG_PREFIXES[lang]}/article/{slug}/' for lang in langs if lang in LANG_PREFIXES]
+
+
+def shell_paths():
+    return [f'{prefix}{path}' for prefix in LANG_PREFIXES.values() for path in SHELL_PATHS]
+
+
+def _file_for(path):
+    relative = path.strip('/')
+    return prerender_root() / relative / 'index.html' if relative else prerender_root() / 'index.html'
+
+
+def _request(path, base_url):
+    base = urlsplit(base_url or settings.PRERENDER_BASE_URL)
+    if not base.netloc:
+        raise PrerenderError('PRERENDER_BASE_URL must be an absolute URL, e.g. https://example.com')
+    request = RequestFactory().get(path, HTTP_HOST=base.netloc, secure=base.scheme == 'https')
+    # what LanguageMiddleware would set for this path
+    first = path.strip('/').split('/')[0]
+    request.language = 'ja' if first == 'jp' else (first if first in ('id', 'en', 'ja') else 'id')
+    return request
+
+
+def _write(target, content):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(content)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def remove_page(path):
+    target = _file_for(path)
+    try:
+        target.unlink()
+    except FileNotFoundError:
+        return
+    # drop now-empty directories up to the root
+    parent = target.parent
+    root = prerender_root()
+    while parent != root and root in parent.parents:
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+        parent = parent.parent
+
+
+def render_page(path, base_url=None):
+    """Render `path` through its view and store it; remove the file on non-200.
+
+    Returns True when a file was written.
+    """
+    try:
+        match = resolve(path)
+    except Resolver404:
+        remove_page(path)
+        return False
+    response = match.func(_request(path, base_url), *match.args, **match.kwargs)
+    if response.status_code != 200:
+        remove_page(path)
+        return False
+    if getattr(response, 'streaming', False):
+        # e.g. the article page with ARTICLE_STREAMING
+        content = b''.join(response.streaming_content)
+    else:
+        if hasattr(response, 'render'):
+            response.render()
+        content = response.content
+    _write(_file_for(path), content)
+    return True
+
+
+def prerender_article(article, langs=None, base_url=None):
+    """(Re)render the pages of one article, or remove them if it is not published."""
+    if article.status != 'published' or not article.slug:
+        remove_article(article.slug)
+        return 0
+    written = 0
+    for path in article_paths(article.slug, langs):
+        try:
+            written += render_page(path, base_url)
+        except PrerenderError:
+            raise
+        except Exception:
+            logger.exception('Pre-render failed for %s', path)
+            remove_page(path)
+    return written
+
+
+def remove_article(slug):
+    if not slug:
+        return
+    for path in article_paths(slug):
+        remove_page(path)
+
+
+def prerender_shells(base_url=None):
+    written = 0
+    for path in shell_paths():
+        try:
+            written += render_page(path, base_url)
+        except PrerenderError:
+            raise
+        except Exception:
+            logger.exception('Pre-render failed for %s', path)
+            remove_page(path)
+    return written
+
+
+def prune_articles(published_slugs):
+    """Remove pre-rendered article pages whose slug is no longer published."""
+    removed = 0
+    for prefix in LANG_PREFIXES.values():
+        directory = prerender_root() / prefix.strip('/') / 'article'
+        if not directory.is_dir():
+            continue
+        for entry in directory.iterdir():
+            if entry.is_dir() and entry.name not in published_slugs:
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+    return removed
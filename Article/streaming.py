@@ -0,0 +1,81 @@
+"""
+Streaming template responses with an early flush of the document head.
+
+`stream_template` renders the top-level nodes of a template one at a time
+and sends everything up to and including `</head>` as the first chunk, so
+browsers start fetching the stylesheets, fonts and preloads listed there
+while the body is still being rendered. The rest follows in chunks of at
+least STREAM_CHUNK_SIZE bytes.
+
+Works with gunicorn sync workers (the response is sent with chunked
+transfer encoding) behind nginx with `proxy_buffering off`; the
+X-Accel-Buffering header turns buffering off for these responses even
+where it is on.
+"""
+import logging
+
+from django.http import StreamingHttpResponse
+from django.template import loader
+from django.template.context import make_context
+
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 16 * 1024
+HEAD_END = '</head>'
+
+
+def _render_nodes(template, context):
+    """Yield the rendered output of each top-level node of `template`."""
+    engine_template = template.template
+    with context.render_context.push_state(engine_template):
+        with context.bind_template(engine_template):
+            context.template_name = engine_template.name
+            for node in engine_template.nodelist:
+                yield node.render_annotated(context)
+
+
+def _chunks(template, context, chunk_size):
+    buffer = []
+    size = 0
+    head_sent = False
+    try:
+        for output in _render_nodes(template, context):
+            if not head_sent:
+                end = output.find(HEAD_END)
+                if end == -1:
+                    buffer.append(output)
+                    continue
+                # the first chunk ends right after </head>, whatever node holds it
+                end += len(HEAD_END)
+                head_sent = True
+                yield ''.join(buffer) + output[:end]
+                output = output[end:]
+                buffer = []
+            buffer.append(output)
+            size += len(output)
+            if size >= chunk_size:
+                yield ''.join(buffer)
+                buffer = []
+                size = 0
+    except Exception:
+        # the status line is already sent; the client gets a truncated page
+        logger.exception('Streaming %s failed', template.template.name)
+        raise
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_template(request, template_name, context=None, preload=(), chunk_size=STREAM_CHUNK_SIZE):
+    """Return a StreamingHttpResponse rendering `template_name` head first.
+
+    `preload` is a sequence of (url, as) pairs sent as `Link: rel=preload`
+    headers, which reach the browser before any of the body.
+    """
+    template = loader.get_template(template_name)
+    render_context = make_context(context, request, autoescape=template.backend.engine.autoescape)
+    response = StreamingHttpResponse(_chunks(template, render_context, chunk_size), content_type='text/html; charset=utf-8')
+    response['X-Accel-Buffering'] = 'no'
+    if preload:
+        response['Link'] = ', '.join(f'<{url}>; rel=preload; as={kind}' for url, kind in preload)
+    return response
@@ -3,10 +3,25 @@ from django.utils.safestring import mark_safe
 import re
 from django.utils.html import escape
 
+from Article import html_tokens
+from Article.lru import memoize_text
+
 register = template.Library()
 
+# Both filters are pure functions of their input and run on the same article
+# bodies and YouTube descriptions over and over; results are memoized per
+# process, keyed by a hash of the input (see `cache_stats`).
+FILTER_CACHE_SIZE = 128
+
+# YouTube video IDs in common URL patterns, with trailing parameters like ?si=... or &list=...
+YOUTUBE_URL_RE = re.compile(
+    r'(?:https?://)?(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/)([A-Za-z0-9_-]{6,})(?:[^\s<>"]*)?',
+    re.IGNORECASE,
+)
+
 
 @register.filter(name='autoembed')
+@memoize_text(FILTER_CACHE_SIZE)
 def autoembed(value):
     """Replace bare YouTube URLs in the given HTML/text with responsive iframe embed markup.
 
@@ -28,10 +43,6 @@ def autoembed(value):
     text = text.replace('\\r\\n', '\n').replace('\\n', '\n')
 
     # If there's already an iframe, assume embeds are present; still try to convert plain URLs.
-    # Regex to find YouTube video IDs in common URL patterns
-    # Now captures trailing parameters like ?si=... or &list=... etc.
-    pattern = re.compile(r'(?:https?://)?(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/)([A-Za-z0-9_-]{6,})(?:[^\s<>"]*)?', re.IGNORECASE)
-
     def repl(match):
         vid = match.group(1)
         # Try youtube-nocookie.com which sometimes works better
@@ -46,18 +57,27 @@ def autoembed(value):
         )
         return iframe
 
-    # Replace plain URLs only in text nodes (avoid altering existing tag attributes).
-    parts = re.split(r'(<[^>]+>)', text)
-    for i, p in enumerate(parts):
-        # only operate on text segments (not tags)
-        if p.startswith('<'):
-            continue
-        parts[i] = pattern.sub(repl, p)
+    # Replace plain URLs only in text nodes (avoid altering existing tag attributes
+    # and the inside of existing iframe blocks).
+    return mark_safe(html_tokens.sub_text(text, YOUTUBE_URL_RE, repl))
 
-    return mark_safe(''.join(parts))
+
+_HREF_RE = re.compile(r'href\s*=\s*["\']([^"\']+)["\']', flags=re.I)
+_SAFE_SCHEME_RE = re.compile(r'^(https?:|mailto:)', flags=re.I)
+_ANCHOR_TAGS_RE = re.compile(r'^<a[^>]*>|</a>$', flags=re.I | re.S)
+_ANCHOR_RE = re.compile(r'<a\b[^>]*>.*?<\/a>', flags=re.I | re.S)
+_EMAIL_RE = re.compile(r'^[\w.+-]+@[\w.-]+\.[A-Za-z]{2,}$')
+_HTTP_RE = re.compile(r'^https?://', flags=re.I)
+_PLAIN_LINK_RE = re.compile(r'(https?://[^\s<>]+|www\.[^\s<>]+|[\w.+-]+@[\w.-]+\.[A-Za-z]{2,})')
+_SLASH_SEPARATOR_RE = re.compile(r"\s*/\s*")
+_CARRIAGE_RETURN_RE = re.compile(r"\r\n|\r")
+_SPACES_RE = re.compile(r"[ \t]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_LINK_PLACEHOLDER_RE = re.compile(r'__(ANCHOR|LINK)_(\d+)__')
 
 
 @register.filter(name='format_youtube_desc')
+@memoize_text(FILTER_CACHE_SIZE)
 def format_youtube_desc(value):
     """Clean and format YouTube description text for homepage display.
 
@@ -85,17 +105,17 @@ def format_youtube_desc(value):
 
     def _anchor_repl(m):
         full = m.group(0)
-        href_m = re.search(r'href\s*=\s*["\']([^"\']+)["\']', full, flags=re.I)
+        href_m = _HREF_RE.search(full)
         href = href_m.group(1) if href_m else ''
         # Only allow http(s) or mailto links
-        if not re.match(r'^(https?:|mailto:)', href, flags=re.I):
+        if not _SAFE_SCHEME_RE.match(href):
             return escape(full)
         # extract inner text (preserve content inside the tag)
-        inner = re.sub(r'^<a[^>]*>|</a>$', '', full, flags=re.I | re.S)
+        inner = _ANCHOR_TAGS_RE.sub('', full)
         anchors.append((href, inner))
         return f'__ANCHOR_{len(anchors)-1}__'
 
-    text_with_placeholders = re.sub(r'<a\b[^>]*>.*?<\/a>', _anchor_repl, text, flags=re.I | re.S)
+    text_with_placeholders = _ANCHOR_RE.sub(_anchor_repl, text)
 
     # Now operate on the remaining plain text: first protect plain URLs/emails
     # by replacing them with placeholders so subsequent slash normalization
@@ -104,22 +124,22 @@ def format_youtube_desc(value):
 
     def _link_repl(m):
         full = m.group(0)
-        if re.match(r'^[\w.+-]+@[\w.-]+\.[A-Za-z]{2,}$', full):
+        if _EMAIL_RE.match(full):
             href = f'mailto:{full}'
         else:
-            href = full if re.match(r'^https?://', full, flags=re.I) else f'http://{full}'
+            href = full if _HTTP_RE.match(full) else f'http://{full}'
         idx = len(links)
         links.append((href, full))
         return f'__LINK_{idx}__'
 
-    text_with_placeholders = re.sub(r'(https?://[^\s<>]+|www\.[^\s<>]+|[\w.+-]+@[\w.-]+\.[A-Za-z]{2,})', _link_repl, text_with_placeholders)
+    text_with_placeholders = _PLAIN_LINK_RE.sub(_link_repl, text_with_placeholders)
 
     # Now replace slashes used as separators (but URLs are protected), normalize whitespace,
     # trim, then convert newlines to <br>.
-    text_with_placeholders = re.sub(r"\s*/\s*", "\n", text_with_placeholders)
-    text_with_placeholders = re.sub(r"\r\n|\r", "\n", text_with_placeholders)
-    text_with_placeholders = re.sub(r"[ \t]+", " ", text_with_placeholders)
-    text_with_placeholders = re.sub(r"\n{3,}", "\n\n", text_with_placeholders)
+    text_with_placeholders = _SLASH_SEPARATOR_RE.sub("\n", text_with_placeholders)
+    text_with_placeholders = _CARRIAGE_RETURN_RE.sub("\n", text_with_placeholders)
+    text_with_placeholders = _SPACES_RE.sub(" ", text_with_placeholders)
+    text_with_placeholders = _BLANK_LINES_RE.sub("\n\n", text_with_placeholders)
     text_with_placeholders = text_with_placeholders.strip()
 
     # Convert double-newlines to paragraph breaks, single newline to <br>
@@ -135,18 +155,22 @@ def format_youtube_desc(value):
     else:
         html = esc.replace('\n', '<br>')
 
-    # Reinsert sanitized anchors
-    for idx, (href, inner) in enumerate(anchors):
-        safe_href = escape(href)
-        safe_inner = escape(inner)
-        anchor_html = f'<a href="{safe_href}" target="_blank" rel="noopener noreferrer">{safe_inner}</a>'
-        html = html.replace(f'__ANCHOR_{idx}__', anchor_html)
+    # Reinsert sanitized anchors and linkified plain URLs/emails in one pass
+    saved = {'ANCHOR': anchors, 'LINK': links}
+
+    def _reinsert(m):
+        items = saved[m.group(1)]
+        idx = int(m.group(2))
+        if idx >= len(items):
+            return m.group(0)
+        href, inner = items[idx]
+        return f'<a href="{escape(href)}" target="_blank" rel="noopener noreferrer">{escape(inner)}</a>'
 
-    # Reinsert linkified plain URLs/emails
-    for idx, (href, inner) in enumerate(links):
-        safe_href = escape(href)
-        safe_inner = escape(inner)
-        anchor_html = f'<a href="{safe_href}" target="_blank" rel="noopener noreferrer">{safe_inner}</a>'
-        html = html.replace(f'__LINK_{idx}__', anchor_html)
+    html = _LINK_PLACEHOLDER_RE.sub(_reinsert, html)
 
     return mark_safe(html)
+
+
+def cache_stats():
+    """Hit/miss counters of the memoized filters in this process."""
+    return {name: func.cache.stats() for name, func in (('autoembed', autoembed), ('format_youtube_desc', format_youtube_desc))}
@@ -1,3 +1,690 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from Article import html_tokens, translation_memory, views
+from Article.fake_provider import FakeProvider
+from Article.middleware import QueryStatsMiddleware
+from Article.templatetags import embed_filters
+from Article.templatetags.embed_filters import autoembed, format_youtube_desc
+from Article.translation_client import CircuitOpen, ProviderError, ProviderLimiter, TranslationClient
+from DashboardAdmin import translation_jobs
+from DashboardAdmin.models import (
+    Article, ArticleTranslation, Category, SiteSetting, SiteSettingTranslation, TranslationJob, TranslationMemory,
+)
+from DashboardAdmin.site_settings import get_site_snapshot
+
+
+class QueryBudgetMixin:
+    """Assert that a request stays within a fixed number of SQL queries.
+
+    Budgets include the session read/write done by LanguageMiddleware, so
+    they only move when a view's own query pattern changes (e.g. a new N+1).
+    Savepoint bookkeeping is not counted since it differs between backends,
+    and neither are reads/writes of database cache tables (cache I/O, which
+    goes to files with CACHE_L2_BACKEND=file).
+
+    SECURE_SSL_REDIRECT is off for these tests: with production settings
+    (DEBUG off) every test-client request would be answered with a 301.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.enterClassContext(override_settings(SECURE_SSL_REDIRECT=False))
+
+    def assertQueryBudget(self, budget, url, data=None, client=None):
+        client = client or self.client
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url, data or {})
+            if response.streaming:
+                # rendering happens while the body is sent
+                response.streamed = b''.join(response.streaming_content)
+        # a redirect would be measured instead of the view
+        self.assertEqual(response.status_code, 200, f'{url} returned {response.status_code}')
+        queries = self.executed_queries(ctx)
+        executed = len(queries)
+        if executed > budget:
+            sql = '\n'.join(f"  {i}. {q['sql']}" for i, q in enumerate(queries, start=1))
+            self.fail(f'{url} ran {executed} queries (budget {budget}):\n{sql}')
+        return response
+
+    def executed_queries(self, ctx):
+        cache_tables = [
+            config['LOCATION'] for config in settings.CACHES.values()
+            if config['BACKEND'].endswith('DatabaseCache')
+        ]
+        return [
+            q for q in ctx.captured_queries
+            if not q['sql'].upper().startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))
+            and not any(table in q['sql'] for table in cache_tables)
+        ]
+
+
+class SeededDataMixin:
+    CATEGORIES = ['anime', 'gaming', 'geek', 'event']
+    ARTICLES_PER_CATEGORY = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        setting = SiteSetting.get_solo()
+        setting.youtube_link = 'https://www.youtube.com/embed/cnJdwoZgyB4'
+        setting.youtube_desc = 'Episode terbaru / https://example.com'
+        setting.save()
+        for lang in ['en', 'ja']:
+            SiteSettingTranslation.objects.create(setting=setting, lang=lang, youtube_desc=f'desc {lang}')
+
+        now = timezone.now()
+        for name in cls.CATEGORIES:
+            category = Category.objects.get_or_create(name=name)[0]
+            for i in range(cls.ARTICLES_PER_CATEGORY):
+                article = Article.objects.create(
+                    article_id=f'{name}-{i}',
+                    title=f'{name} article {i}',
+                    content=f'<p><img src="/media/x.png"></p><p>Body {i} https://youtu.be/abcdefgh</p>',
+                    featured_image=f'articles/{name}-{i}.png',
+                    status='published',
+                    published_at=now - timezone.timedelta(hours=i),
+                    category=category,
+                    admin=cls.admin,
+                    is_pinned=(i == 3),
+                )
+                for lang in ['en', 'ja']:
+                    ArticleTranslation.objects.create(
+                        article=article,
+                        lang=lang,
+                        title=f'{name} {lang} {i}',
+                        content=f'<p>{lang} body {i}</p>',
+                    )
+        cls.article = Article.objects.filter(category__name='anime').first()
+
+
+class ViewQueryBudgetTests(SeededDataMixin, QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        # steady state: the settings snapshot is already built in this worker
+        get_site_snapshot()
+
+    def test_home(self):
+        self.assertQueryBudget(2, '/')
+        self.assertQueryBudget(2, '/en/')
+
+    def test_home_sees_settings_change(self):
+        setting = SiteSetting.get_solo()
+        setting.vote_link = 'https://vote.example.com/'
+        setting.save()
+        self.assertContains(self.client.get('/'), 'https://vote.example.com/')
+
+    def test_article_detail(self):
+        self.assertQueryBudget(4, f'/article/{self.article.slug}/')
+        self.assertQueryBudget(5, f'/en/article/{self.article.slug}/')
+
+    def test_article_detail_streams_head_first(self):
+        url = f'/article/{self.article.slug}/'
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['X-Accel-Buffering'], 'no')
+        self.assertIn('rel=preload; as=style', response['Link'])
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertTrue(chunks[0].rstrip().endswith('</head>'))
+        self.assertIn('css/output.css', chunks[0])
+        self.assertNotIn('<body', chunks[0])
+
+        with override_settings(ARTICLE_STREAMING=False):
+            rendered = self.client.get(url)
+        self.assertFalse(rendered.streaming)
+        self.assertEqual(''.join(chunks), rendered.content.decode())
+
+    @override_settings(QUERY_STATS_ENABLED=True)
+    def test_query_stats_include_streamed_rendering(self):
+        with mock.patch.object(QueryStatsMiddleware, 'stats', {}) as stats:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(f'/en/article/{self.article.slug}/')
+                self.assertEqual(stats, {})
+                b''.join(response.streaming_content)
+                response.close()
+        self.assertEqual(stats['article_detail']['requests'], 1)
+        self.assertEqual(stats['article_detail']['queries'], len(ctx.captured_queries))
+
+    def test_api_articles_by_category(self):
+        url = '/api/articles/anime/'
+        self.assertQueryBudget(4, url, {'page': 2, 'page_size': 5})
+        self.assertQueryBudget(5, url, {'page_size': 10, 'lang': 'en'})
+        self.assertQueryBudget(4, url, {'cursor': '', 'page_size': 10, 'lang': 'ja'})
+
+    def test_api_articles_by_category_cached(self):
+        url = '/api/articles/anime/'
+        self.client.get(url, {'lang': 'en'})
+        self.assertQueryBudget(2, url, {'lang': 'en'})
+
+    def test_api_pinned_article(self):
+        url = '/api/articles/anime/pinned/'
+        self.assertQueryBudget(3, url)
+        self.assertQueryBudget(4, url, {'lang': 'en'})
+
+    def test_api_article_detail(self):
+        self.assertQueryBudget(4, f'/api/article/{self.article.slug}/')
+
+    def test_list_articles(self):
+        self.client.force_login(self.admin)
+        url = reverse('DashboardAdmin:list_articles')
+        self.assertQueryBudget(6, url)
+        self.assertQueryBudget(6, url, {'page': 3})
+        self.assertQueryBudget(5, url, {'cursor': '', 'category': 'geek'})
+
+
+class ConditionalGetTests(SeededDataMixin, QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        get_site_snapshot()
+
+    def assertNotModified(self, url, data=None, budget=3):
+        first = self.client.get(url, data or {})
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.has_header('ETag'))
+        self.assertIn('no-cache', first['Cache-Control'])
+        # only the validator and the session bookkeeping run on a 304
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(url, data or {}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+        self.assertLessEqual(len(self.executed_queries(ctx)), budget)
+        return first
+
+    def test_article_detail(self):
+        url = f'/en/article/{self.article.slug}/'
+        first = self.assertNotModified(url)
+        self.assertFalse(first.has_header('Last-Modified'))
+
+        translation = self.article.translations.get(lang='en')
+        translation.title = 'changed'
+        translation.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'changed')
+
+    def test_article_detail_settings_change(self):
+        first = self.assertNotModified(f'/article/{self.article.slug}/')
+        setting = SiteSetting.get_solo()
+        setting.vote_link = 'https://vote.example.com/'
+        setting.save()
+        response = self.client.get(f'/article/{self.article.slug}/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        # the article row is unchanged, so a date validator must not answer for it
+        response = self.client.get(f'/article/{self.article.slug}/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_article_detail(self):
+        url = f'/api/article/{self.article.slug}/'
+        first = self.assertNotModified(url)
+        self.article.title = 'changed'
+        self.article.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_api_articles_by_category(self):
+        url = '/api/articles/anime/'
+        first = self.assertNotModified(url, {'lang': 'en', 'page_size': 5}, budget=2)
+        other_page = self.client.get(url, {'lang': 'en', 'page_size': 5, 'page': 2}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(other_page.status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            translation = self.article.translations.get(lang='en')
+            translation.title = 'changed'
+            translation.save()
+        response = self.client.get(url, {'lang': 'en', 'page_size': 5}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_pinned_article(self):
+        self.assertNotModified('/api/articles/anime/pinned/', {'lang': 'ja'}, budget=2)
+
+    def test_missing_article_is_not_found(self):
+        response = self.client.get('/api/article/missing/', HTTP_IF_NONE_MATCH='"anything"')
+        self.assertEqual(response.status_code, 404)
+
+
+class FeedTests(SeededDataMixin, QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_query_count_does_not_grow_with_sections(self):
+        self.assertQueryBudget(5, '/api/feed/', {'categories': 'anime', 'lang': 'en'})
+        self.assertQueryBudget(5, '/api/feed/', {'categories': 'anime,gaming,geek,event', 'lang': 'en', 'limit': 5})
+        self.assertQueryBudget(4, '/api/feed/', {'categories': 'anime,gaming,geek,event,missing'})
+
+    def test_sections_match_category_apis(self):
+        feed = self.client.get('/api/feed/', {'categories': 'Anime,geek,missing', 'limit': 5, 'lang': 'ja'}).json()
+        self.assertEqual(list(feed['sections']), ['anime', 'geek', 'missing'])
+        for name in ['anime', 'geek']:
+            listing = self.client.get(f'/api/articles/{name}/', {'page_size': 5, 'lang': 'ja'}).json()
+            pinned = self.client.get(f'/api/articles/{name}/pinned/', {'lang': 'ja'}).json()
+            section = feed['sections'][name]
+            self.assertEqual(section['items'], listing['items'])
+            self.assertEqual(section['total_pages'], listing['total_pages'])
+            self.assertEqual(section['total_items'], listing['total_items'])
+            self.assertEqual(section['pinned'], pinned['item'])
+        self.assertEqual(feed['sections']['missing'], {'pinned': None, 'items': [], 'page': 1, 'total_pages': 1, 'total_items': 0})
+
+    def test_cached_feed_is_invalidated_on_save(self):
+        url = '/api/feed/'
+        self.client.get(url, {'lang': 'en'})
+        self.assertQueryBudget(2, url, {'lang': 'en'})
+        with self.captureOnCommitCallbacks(execute=True):
+            translation = self.article.translations.get(lang='en')
+            translation.title = 'changed'
+            translation.save()
+            # until the commit, the cached payload is what other requests can see
+            self.assertNotContains(self.client.get(url, {'lang': 'en'}), 'changed')
+        self.assertContains(self.client.get(url, {'lang': 'en'}), 'changed')
+
+
+class TwoTierCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def stats(self, namespace):
+        return cache.stats()[namespace]
+
+    def test_l1_serves_repeat_reads(self):
+        cache.set('translation:abc', 'hello', 60)
+        before = self.stats('translation')
+        self.assertEqual(cache.get('translation:abc'), 'hello')
+        self.assertEqual(cache.get('translation:abc'), 'hello')
+        after = self.stats('translation')
+        self.assertEqual(after['l1_hits'] - before['l1_hits'], 2)
+        self.assertEqual(caches['translations'].get('translation:abc'), 'hello')
+
+    def test_values_are_copied(self):
+        cache.set('translation:list', [1, 2], 60)
+        cache.get('translation:list').append(3)
+        self.assertEqual(cache.get('translation:list'), [1, 2])
+
+    def test_l1_is_bounded_per_namespace(self):
+        for i in range(600):
+            cache.set(f'api_articles:{i}', i, 60)
+        stats = self.stats('api_articles')
+        self.assertEqual(stats['l1_entries'], 500)
+        self.assertGreaterEqual(stats['l1_evictions'], 100)
+        # evicted from L1 only: still readable from the shared tier
+        self.assertEqual(cache.get('api_articles:0'), 0)
+
+    def test_shared_state_is_read_from_l2(self):
+        cache.set('login_attempts_1.2.3.4', 3, 60)
+        # another worker updates the shared tier directly
+        caches['security'].set('login_attempts_1.2.3.4', 4, 60)
+        self.assertEqual(cache.get('login_attempts_1.2.3.4'), 4)
+        self.assertEqual(self.stats('login_attempts')['l1_entries'], 0)
+
+    def test_incr_and_delete_drop_local_copy(self):
+        cache.add('api_gen:anime', 1, None)
+        self.assertEqual(cache.get('api_gen:anime'), 1)
+        cache.incr('api_gen:anime')
+        self.assertEqual(cache.get('api_gen:anime'), 2)
+        cache.delete('api_gen:anime')
+        self.assertIsNone(cache.get('api_gen:anime'))
+
+    def test_get_many_mixes_tiers(self):
+        cache.set('translation:a', 'a', 60)
+        caches['shared'].set('other', 'b', 60)
+        self.assertEqual(cache.get_many(['translation:a', 'other', 'missing']), {'translation:a': 'a', 'other': 'b'})
+
+
+class PrerenderTests(SeededDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        overrides = self.settings(PRERENDER_ROOT=self.root, PRERENDER_BASE_URL='http://testserver', PRERENDER_ENABLED=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def page(self, path):
+        return self.root / path.strip('/') / 'index.html'
+
+    def test_command_renders_articles_and_shells(self):
+        call_command('prerender', stdout=StringIO())
+        slug = self.article.slug
+        self.assertTrue((self.root / 'index.html').exists())
+        self.assertTrue(self.page('/ja/geek/').exists())
+        self.assertIn(self.article.title, self.page(f'/article/{slug}/').read_text())
+        self.assertIn('anime en 0', self.page(f'/en/article/{slug}/').read_text())
+        # absolute links use the configured site URL
+        self.assertIn(f'http://testserver/en/article/{slug}/', self.page(f'/en/article/{slug}/').read_text())
+
+    def test_translation_edit_rerenders_only_its_language(self):
+        call_command('prerender', '--slug', self.article.slug, stdout=StringIO())
+        id_page = self.page(f'/article/{self.article.slug}/')
+        id_mtime = id_page.stat().st_mtime_ns
+        with self.captureOnCommitCallbacks(execute=True):
+            translation = self.article.translations.get(lang='en')
+            translation.title = 'fresh english title'
+            translation.save()
+        self.assertIn('fresh english title', self.page(f'/en/article/{self.article.slug}/').read_text())
+        self.assertEqual(id_page.stat().st_mtime_ns, id_mtime)
+
+    def test_site_wide_passes_run_as_one_queued_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            setting = SiteSetting.get_solo()
+            setting.vote_link = 'https://vote.example.com/'
+            setting.save()
+            setting.translations.filter(lang='en').first().save()
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.get(name='gaming')
+            category.name = 'games'
+            category.save()
+        jobs = TranslationJob.objects.filter(kind__startswith='prerender')
+        self.assertEqual(
+            sorted(jobs.values_list('kind', 'object_id')),
+            [(TranslationJob.KIND_PRERENDER_CATEGORY, category.pk), (TranslationJob.KIND_PRERENDER_SITE, setting.pk)],
+        )
+        # nothing is rendered by the web process that saved
+        self.assertFalse(self.page('/').exists())
+
+        for job in translation_jobs.claim_jobs('worker-a', limit=5):
+            if job.kind.startswith('prerender'):
+                self.assertTrue(translation_jobs.run_job(job, 'worker-a'))
+        self.assertIn('https://vote.example.com/', self.page('/').read_text())
+        self.assertTrue(self.page(f'/ja/article/{self.article.slug}/').exists())
+
+    def test_unpublish_and_rename_remove_stale_pages(self):
+        old_slug = self.article.slug
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.save()
+        self.assertTrue(self.page(f'/ja/article/{old_slug}/').exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.slug = 'renamed'
+            self.article.save()
+        self.assertFalse(self.page(f'/ja/article/{old_slug}/').exists())
+        self.assertTrue(self.page('/ja/article/renamed/').exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.status = 'draft'
+            self.article.save()
+        self.assertFalse((self.root / 'ja' / 'article' / 'renamed').exists())
+
+
+class FakeProviderSession:
+    """Answers LibreTranslate requests with '<target>:<text>' for each q item.
+
+    Requests are answered with `status` instead (e.g. 503 for an outage)
+    when it is set, or when they contain one of the `failing` texts.
+    """
+
+    def __init__(self):
+        self.payloads = []
+        self.status = 200
+        self.failing = set()
+
+    def post(self, url, json=None, **kwargs):
+        self.payloads.append(json)
+        q = json['q']
+        texts = q if isinstance(q, list) else [q]
+        if self.status != 200 or self.failing.intersection(texts):
+            status = self.status if self.status != 200 else 503
+            error = requests.HTTPError(f'{status} Server Error')
+            return mock.Mock(status_code=status, text='unavailable', raise_for_status=mock.Mock(side_effect=error))
+        translated = [f"{json['target']}:{text}" for text in q] if isinstance(q, list) else f"{json['target']}:{q}"
+        return mock.Mock(status_code=200, json=lambda: {'translatedText': translated}, raise_for_status=lambda: None)
+
+
+class FakeProviderMixin:
+    """Routes provider requests made through Article.views to a FakeProviderSession."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        translation_memory._lru.clear()
+        translation_memory._pending_hits.clear()
+        self.session = FakeProviderSession()
+        self.client_ = TranslationClient()
+        self.client_._session = self.session
+        patcher = mock.patch('Article.views.get_translation_client', return_value=self.client_)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@override_settings(TRANSLATION_PARALLEL_LANGS=False)
+class ProviderBatchingTests(FakeProviderMixin, TestCase):
+
+    def test_text_nodes_share_requests_bounded_by_chunk_size(self):
+        html = ''.join(f'<p>paragraph {i}</p><br> ' for i in range(40))
+        result = views._translate_html_preserve_tags(html, 'en', chunk_size=200)
+
+        self.assertEqual(result, ''.join(f'<p>en:paragraph {i}</p><br> ' for i in range(40)))
+        self.assertGreater(len(self.session.payloads), 1)
+        self.assertLess(len(self.session.payloads), 10)
+        for payload in self.session.payloads:
+            self.assertLessEqual(sum(len(text) for text in payload['q']), 200)
+
+        # every segment is cached now
+        views._translate_html_preserve_tags(html, 'en', chunk_size=200)
+        self.assertLess(len(self.session.payloads), 10)
+
+    def test_parts_keep_preserved_segments_in_place(self):
+        parts = translation_jobs._split_text_and_preserve('Halo https://x.id\nDunia')
+        result = translation_jobs._translate_parts(parts, 'ja', views._translate_segments)
+        self.assertEqual(result, 'ja:Halo https://x.id\nja:Dunia')
+        self.assertEqual(len(self.session.payloads), 1)
+        self.assertEqual(self.client_.stats()['segments'], 2)
+
+    def test_failed_batches_raise_unless_a_fallback_is_asked_for(self):
+        self.session.failing.add('rusak')
+        texts = ['satu', 'rusak', 'dua']
+        with self.assertRaises(ProviderError):
+            views._translate_segments(texts, 'en', chunk_size=5)
+        with self.assertRaises(ProviderError):
+            views._translate_html_preserve_tags(''.join(f'<p>{text}</p>' for text in texts), 'en', chunk_size=5)
+
+        learned = {}
+        result = views._translate_segments(texts, 'en', chunk_size=5, learned=learned, fallback=True)
+        self.assertEqual(result, ['en:satu', 'rusak', 'en:dua'])
+        # the untranslated text is not recorded as the translation of its segment
+        self.assertNotIn(views._segment_hash('rusak'), learned)
+        self.assertFalse(TranslationMemory.objects.filter(translated='rusak').exists())
+
+    def test_translation_memory_is_used_before_the_provider(self):
+        translation_memory.store('Baca juga:', 'Read also:', 'auto', 'en')
+        translation_memory._lru.clear()
+
+        result = views._translate_segments(['Baca juga:', 'Salam'], 'en')
+        self.assertEqual(result, ['Read also:', 'en:Salam'])
+        self.assertEqual(self.session.payloads[0]['q'], ['Salam'])
+        # provider output is remembered for every worker, beyond the cache TTL
+        cache.clear()
+        self.assertEqual(views._translate_text_via_provider('Salam', 'en'), 'en:Salam')
+        self.assertEqual(len(self.session.payloads), 1)
+
+    def test_unexpected_provider_payload_is_not_remembered(self):
+        self.session.post = lambda url, json=None, **kwargs: mock.Mock(
+            status_code=200, json=lambda: {'error': 'quota'}, raise_for_status=lambda: None,
+        )
+        with self.assertRaises(ProviderError):
+            views._translate_segments(['Salam'], 'en')
+        self.assertFalse(TranslationMemory.objects.exists())
+        self.assertIsNone(cache.get(views._translation_cache_key('Salam', 'auto', 'en')))
+
+    def test_memory_hits_are_written_in_batches(self):
+        translation_memory.warm()
+        translation_memory.store_many({'Baca juga:': 'Read also:', 'Salam': 'Regards'}, 'auto', 'en')
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                translation_memory.lookup_many(['Baca juga:', 'Salam'], 'auto', 'en')
+            translation_memory.lookup('Salam', 'auto', 'en')
+        # one UPDATE per distinct hit count
+        with self.assertNumQueries(2):
+            self.assertEqual(translation_memory.flush_hits(), 2)
+        hits = dict(TranslationMemory.objects.values_list('translated', 'hits'))
+        self.assertEqual(hits, {'Read also:': 3, 'Regards': 4})
+
+    def test_prune_drops_stale_entries(self):
+        translation_memory.store_many({'lama': 'old', 'baru': 'new'}, 'auto', 'en')
+        TranslationMemory.objects.filter(translated='old').update(last_used_at=timezone.now() - timedelta(days=400))
+        call_command('prune_translation_memory', stdout=StringIO())
+        self.assertEqual(list(TranslationMemory.objects.values_list('translated', flat=True)), ['new'])
+
+    def test_embeds_are_shielded_without_cache_io(self):
+        html = (
+            '<p>Tonton https://youtu.be/abcdefgh sekarang</p>'
+            '<div class="video"><iframe src="https://www.youtube.com/embed/xyz123456"></iframe></div><p>Selesai</p>'
+        )
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            result = views._translate_html_preserve_tags(html, 'en')
+        self.assertEqual(result, (
+            '<p>en:Tonton https://youtu.be/abcdefghen: sekarang</p>'
+            '<div class="video"><iframe src="https://www.youtube.com/embed/xyz123456"></iframe></div><p>en:Selesai</p>'
+        ))
+        self.assertFalse([c for c in cache_set.call_args_list if c.args[0].startswith('cs_embed_')])
+        sent = self.session.payloads[0]['q']
+        self.assertFalse([text for text in sent if 'youtu' in text])
+
+
+class HtmlTokenTests(TestCase):
+    html = (
+        '<p>Lihat https://youtu.be/abcdefgh</p>'
+        '<div class="video"><iframe src="https://www.youtube.com/embed/xyz123456">youtu.be/zzzzzzzz</iframe></div>'
+        '<embed src="x.swf">a < b'
+    )
+
+    def test_tokens_cover_the_input_in_one_pass(self):
+        tokens = list(html_tokens.tokenize(self.html))
+        self.assertEqual(''.join(value for _, value in tokens), self.html)
+        self.assertEqual([kind for kind, _ in tokens], [
+            html_tokens.TAG, html_tokens.TEXT, html_tokens.TAG,
+            html_tokens.EMBED, html_tokens.EMBED, html_tokens.TEXT,
+        ])
+        self.assertEqual(html_tokens.text_content(self.html), 'Lihat https://youtu.be/abcdefgha < b')
+
+    def test_only_div_figure_and_p_wrap_embeds(self):
+        pre = '<iframe src="https://www.youtube.com/embed/xyz123456"></iframe>'
+        wrapped = '<p><iframe src="https://www.youtube.com/embed/abc123456"></iframe></p>'
+        html = f'<pre>{pre}</pre>{wrapped}'
+        self.assertEqual(list(html_tokens.tokenize(html)), [
+            (html_tokens.TAG, '<pre>'),
+            (html_tokens.EMBED, pre),
+            (html_tokens.TAG, '</pre>'),
+            (html_tokens.EMBED, wrapped),
+        ])
+
+    def test_consumers_share_the_token_stream(self):
+        embedded = str(autoembed(self.html))
+        self.assertIn('youtube-nocookie.com/embed/abcdefgh', embedded)
+        # nothing inside an existing iframe block is treated as text
+        self.assertNotIn('nocookie.com/embed/zzzzzzzz', embedded)
+
+        masked, placeholders = views._shield_youtube_links(self.html)
+        masked, placeholders = views._shield_embeds(masked, placeholders)
+        self.assertEqual(len(placeholders), 3)
+        self.assertNotIn('iframe', masked)
+        self.assertEqual(views._restore_placeholders(masked, placeholders), self.html)
+
+    def test_filters_are_memoized_by_content(self):
+        format_youtube_desc.cache.clear()
+        desc = ' / '.join(f'Lagu {i} https://example.com/{i}' for i in range(12)) + ' <a href="mailto:tim@example.com">Email</a>'
+        first = format_youtube_desc(desc)
+        self.assertIs(format_youtube_desc(desc), first)
+        self.assertEqual(embed_filters.cache_stats()['format_youtube_desc']['hits'], 1)
+        # every placeholder is put back, including __LINK_1__ next to __LINK_11__
+        self.assertNotIn('__', first)
+        self.assertEqual(first.count('<a href='), 13)
+        self.assertIn('<a href="https://example.com/11" target="_blank" rel="noopener noreferrer">https://example.com/11</a>', first)
+        self.assertIn('<a href="mailto:tim@example.com" target="_blank" rel="noopener noreferrer">Email</a>', first)
+
+
+class ProviderLimiterTests(TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.limiter = ProviderLimiter(max_concurrency=8, rate=0, burst=1, failure_threshold=3, cooldown=30, clock=lambda: self.now)
+
+    def request(self, outcome, seconds=0.1):
+        self.limiter.acquire()
+        self.limiter.release(outcome, seconds)
+
+    def test_concurrency_backs_off_and_recovers(self):
+        self.assertEqual(self.limiter.limit, 4)
+        self.request('overloaded')
+        self.assertEqual(self.limiter.limit, 2)
+        for _ in range(20):
+            self.request('ok')
+        self.assertGreater(self.limiter.limit, 5)
+        # a latency spike counts as overload
+        self.request('ok', seconds=30)
+        self.assertLess(self.limiter.limit, 5)
+
+    def test_circuit_opens_fails_fast_and_probes(self):
+        for _ in range(3):
+            self.request('overloaded')
+        self.assertEqual(self.limiter.state_info()['circuit'], 'open')
+        with self.assertRaises(CircuitOpen):
+            self.limiter.acquire()
+
+        self.now = 31
+        self.limiter.acquire()
+        # only one probe while half-open
+        with self.assertRaises(CircuitOpen):
+            self.limiter.acquire()
+        self.limiter.release('ok', 0.1)
+        self.assertEqual(self.limiter.state_info()['circuit'], 'closed')
+
+    def test_token_bucket_caps_request_rate(self):
+        limiter = ProviderLimiter(max_concurrency=8, rate=1000, burst=2)
+        started = time.monotonic()
+        for _ in range(12):
+            limiter.acquire()
+            limiter.release('ok', 0.01)
+        self.assertGreaterEqual(time.monotonic() - started, 0.009)
+        self.assertGreater(limiter.state_info()['throttled'], 0)
+
+
+class FakeProviderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        translation_memory._lru.clear()
+        self.provider = FakeProvider().start()
+        self.addCleanup(self.provider.stop)
+
+    def test_speaks_the_provider_protocol(self):
+        with mock.patch.dict('os.environ', {'TRANSLATE_API_URL': self.provider.url}):
+            client = TranslationClient()
+        self.addCleanup(client.close)
+
+        result = client.translate(['Halo', 'Dunia'], 'id', 'jp')
+        self.assertEqual(result.data['translatedText'], ['[ja] Halo', '[ja] Dunia'])
+        self.assertEqual(client.translate('Halo', 'id', 'en').data['translatedText'], '[en] Halo')
+
+        self.provider.rate_limit, self.provider.burst = 0.001, 0
+        self.provider._tokens = 0
+        with self.assertRaises(ProviderError):
+            client.translate('Halo', 'id', 'en')
+        self.assertEqual(self.provider.stats['throttled'], 1)
+        self.assertEqual(client.stats()['limiter']['consecutive_failures'], 1)
+
+    def test_benchmark_reports_throughput(self):
+        out = StringIO()
+        call_command(
+            'translation_benchmark', '--articles', '2', '--paragraphs', '3', '--concurrency', '1',
+            '--latency', '0', '--latency-per-char', '0', '--json', stdout=out,
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['failures'], 0)
+        # a handful of batched requests per article and language, not one per paragraph
+        self.assertLessEqual(report['provider_calls_per_article'], 4)
+        self.assertEqual(report['segments'], report['fake_provider']['segments'])
@@ -0,0 +1,381 @@
+"""
+Long-lived client for the translation provider (LibreTranslate by default).
+
+Each process keeps one TranslationClient with a keep-alive connection pool
+sized to the translation worker concurrency, so segments no longer pay for
+a new session and TCP connection on every call. The provider URL, API key,
+language map and cache TTL are resolved once and re-resolved only when the
+SiteSetting snapshot version changes. Every request is timed; `stats()`
+reports request counts and latency.
+
+All requests of the process pass through one ProviderLimiter: a token
+bucket caps the request rate, an AIMD concurrency limit shrinks on
+429/5xx/timeouts and latency spikes and grows back while the provider
+keeps up, and a circuit breaker fails fast while the provider is down.
+"""
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+try:
+    import requests
+except Exception:
+    requests = None
+
+from DashboardAdmin.site_settings import get_site_snapshot
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_URL = 'http://127.0.0.1:5000/translate'
+DEFAULT_TIMEOUT = 60
+# segment batches of one job that may be in flight at once (see Article.views._translate_segments)
+BATCH_PARALLELISM = 3
+
+# map commonly-used client language codes to provider expected codes
+PROVIDER_LANGS = MappingProxyType({
+    'jp': 'ja',  # user-facing used 'jp' -> provider expects 'ja'
+    'ja': 'ja',
+    'id': 'id',
+    'in': 'id',
+    'en': 'en'
+})
+
+ProviderConfig = namedtuple('ProviderConfig', ['url', 'api_key', 'langs', 'cache_ttl', 'version'])
+ProviderResult = namedtuple('ProviderResult', ['data', 'seconds'])
+
+
+class ProviderError(RuntimeError):
+    def __init__(self, message, body=None):
+        super().__init__(message)
+        self.body = body
+
+
+class CircuitOpen(ProviderError):
+    """The provider failed repeatedly; requests are refused until the cooldown ends."""
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class ProviderLimiter:
+    """Process-wide admission control for provider requests.
+
+    acquire() blocks until a token and a concurrency slot are available, or
+    raises CircuitOpen; release() reports the outcome of the request:
+    'ok', 'overloaded' (429, 5xx, connection errors, timeouts) or 'rejected'
+    (other 4xx, which says nothing about provider health).
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, max_concurrency, rate, burst, failure_threshold=5, cooldown=30.0,
+                 latency_floor=5.0, latency_factor=3.0, clock=time.monotonic):
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.latency_floor = latency_floor
+        self.latency_factor = latency_factor
+        self._clock = clock
+        self._cond = threading.Condition()
+        # start in the middle and let additive increase find the provider's capacity
+        self.limit = max(1.0, self.max_concurrency / 2)
+        self.in_flight = 0
+        self.tokens = float(self.burst)
+        self._refilled_at = clock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._latency = None
+        self._counts = {'throttled': 0, 'decreases': 0, 'trips': 0, 'refused': 0}
+
+    def _refill(self, now):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self._refilled_at) * self.rate)
+        else:
+            self.tokens = float(self.burst)
+        self._refilled_at = now
+
+    def _check_breaker(self, now):
+        if self.state == self.OPEN:
+            if now - self._opened_at < self.cooldown:
+                self._counts['refused'] += 1
+                raise CircuitOpen(f'translation provider unavailable, retrying in {self.retry_after():.0f}s')
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN and self._probing:
+            self._counts['refused'] += 1
+            raise CircuitOpen('translation provider is being probed after an outage')
+
+    def acquire(self):
+        with self._cond:
+            waited = False
+            while True:
+                now = self._clock()
+                self._check_breaker(now)
+                self._refill(now)
+                if self.in_flight < int(self.limit) and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    if self.state == self.HALF_OPEN:
+                        self._probing = True
+                    if waited:
+                        self._counts['throttled'] += 1
+                    return
+                waited = True
+                # woken by release(); otherwise poll for the next token
+                delay = (1 - self.tokens) / self.rate if self.tokens < 1 and self.rate > 0 else 0.5
+                self._cond.wait(min(max(delay, 0.01), 0.5))
+
+    def release(self, outcome, seconds=None):
+        with self._cond:
+            self.in_flight -= 1
+            now = self._clock()
+            if outcome == 'overloaded':
+                self._decrease()
+                self.failures += 1
+                if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                    self._trip(now)
+            elif outcome == 'ok':
+                self.failures = 0
+                if self.state == self.HALF_OPEN:
+                    logger.info('Translation provider recovered, closing circuit')
+                    self.state = self.CLOSED
+                if seconds is not None and self._is_spike(seconds):
+                    self._decrease()
+                else:
+                    self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                if seconds is not None:
+                    self._latency = seconds if self._latency is None else 0.8 * self._latency + 0.2 * seconds
+            elif self.state == self.HALF_OPEN:
+                # the provider answered, so it is up again
+                self.state = self.CLOSED
+            self._probing = False
+            self._cond.notify_all()
+
+    def _is_spike(self, seconds):
+        return self._latency is not None and seconds > max(self.latency_floor, self._latency * self.latency_factor)
+
+    def _decrease(self):
+        self.limit = max(1.0, self.limit / 2)
+        self._counts['decreases'] += 1
+
+    def _trip(self, now):
+        if self.state != self.OPEN:
+            logger.warning('Translation provider failing (%s consecutive errors), opening circuit for %ss', self.failures, self.cooldown)
+            self._counts['trips'] += 1
+        self.state = self.OPEN
+        self._opened_at = now
+
+    def retry_after(self):
+        """Seconds until an open circuit lets a probe request through (0 when not open)."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.cooldown - (self._clock() - self._opened_at))
+
+    def is_open(self):
+        return self.state == self.OPEN and self.retry_after() > 0
+
+    def state_info(self):
+        with self._cond:
+            return {
+                'circuit': self.state,
+                'retry_after': round(self.retry_after(), 1),
+                'concurrency_limit': round(self.limit, 2),
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self.in_flight,
+                'consecutive_failures': self.failures,
+                'rate': self.rate,
+                'tokens': round(self.tokens, 2),
+                'latency_ms': round(self._latency * 1000, 1) if self._latency is not None else None,
+                **self._counts,
+            }
+
+
+class TranslationClient:
+    def __init__(self, pool_size=None, timeout=DEFAULT_TIMEOUT):
+        self.pool_size = max(1, pool_size or _env_int('TRANSLATION_POOL_SIZE', 2 * BATCH_PARALLELISM))
+        self.timeout = timeout
+        # environment values cannot change while the process runs
+        self._env_url = os.environ.get('TRANSLATE_API_URL', '')
+        self._env_key = os.environ.get('TRANSLATE_API_KEY', '')
+        self._cache_ttl = _env_int('TRANSLATION_CACHE_TTL', 86400)
+        self._config = None
+        self._session = None
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'errors': 0, 'segments': 0, 'seconds': 0.0, 'max_seconds': 0.0}
+        self.limiter = ProviderLimiter(
+            max_concurrency=self.pool_size,
+            rate=_env_float('TRANSLATION_RATE_LIMIT', 5.0),
+            burst=_env_int('TRANSLATION_RATE_BURST', 10),
+            failure_threshold=_env_int('TRANSLATION_BREAKER_THRESHOLD', 5),
+            cooldown=_env_float('TRANSLATION_BREAKER_COOLDOWN', 30.0),
+        )
+
+    def config(self):
+        """Return the ProviderConfig, rebuilding it after a SiteSetting change."""
+        config = self._config
+        if self._env_url and self._env_key:
+            # fully configured by the environment; SiteSetting is never consulted
+            if config is None:
+                config = self._config = self._build_config(None)
+            return config
+        try:
+            snapshot = get_site_snapshot()
+        except Exception:
+            snapshot = None
+        version = getattr(snapshot, 'version', None)
+        if config is None or version is None or config.version != version:
+            config = self._config = self._build_config(snapshot)
+        return config
+
+    def _build_config(self, snapshot):
+        url, api_key = self._env_url, self._env_key
+        if not url and snapshot is not None:
+            url = snapshot.translate_api_url
+            if not api_key:
+                api_key = snapshot.translate_api_key
+        config = ProviderConfig(
+            url=url or DEFAULT_URL,
+            api_key=api_key,
+            langs=PROVIDER_LANGS,
+            cache_ttl=self._cache_ttl,
+            version=getattr(snapshot, 'version', None),
+        )
+        previous = self._config
+        if previous is None or previous.url != config.url:
+            logger.info('Translation provider: %s', config.url)
+        return config
+
+    def _new_session(self):
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        session = requests.Session()
+        # only connection setup is retried here; 429/5xx reach the limiter,
+        # which backs off for every caller in the process (the job is retried later)
+        retries = Retry(total=2, connect=2, read=0, status=0, other=0, backoff_factor=0.5)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retries)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['Content-Type'] = 'application/json'
+        return session
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._new_session()
+        return self._session
+
+    def translate(self, q, source, target):
+        """POST one translate request (`q` is a string or a list) and return a ProviderResult.
+
+        Raises ProviderError, with the response body when there is one, or
+        CircuitOpen without contacting the provider while it is down.
+        """
+        if not requests:
+            logger.error('requests library is not available for translation provider')
+            raise ProviderError('requests library is required for translation provider')
+        config = self.config()
+        payload = {
+            'q': q,
+            'source': source or 'auto',
+            'target': config.langs.get((target or '').lower(), target),
+            'format': 'html'
+        }
+        if config.api_key:
+            payload['api_key'] = config.api_key
+
+        self.limiter.acquire()
+        resp = None
+        started = time.perf_counter()
+        try:
+            resp = self.session.post(config.url, json=payload, timeout=self.timeout)
+            resp.raise_for_status()
+            data = resp.json()
+        except Exception as e:
+            seconds = time.perf_counter() - started
+            status = getattr(resp, 'status_code', None)
+            overloaded = status is None or status == 429 or status >= 500
+            self.limiter.release('overloaded' if overloaded else 'rejected', seconds)
+            self._record(seconds, q, failed=True)
+            body = getattr(resp, 'text', None) if resp is not None else None
+            raise ProviderError(f'provider_request_failed: {e}; body={body}', body=body) from e
+        seconds = time.perf_counter() - started
+        self.limiter.release('ok', seconds)
+        self._record(seconds, q)
+        logger.debug('Translation request: %s segment(s) -> %s in %.3fs', len(q) if isinstance(q, list) else 1, payload['target'], seconds)
+        return ProviderResult(data, seconds)
+
+    def _record(self, seconds, q, failed=False):
+        with self._lock:
+            stats = self._stats
+            stats['requests'] += 1
+            stats['errors'] += failed
+            stats['segments'] += len(q) if isinstance(q, list) else 1
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        requests_made = stats['requests']
+        return {
+            'pool_size': self.pool_size,
+            'requests': requests_made,
+            'errors': stats['errors'],
+            'segments': stats['segments'],
+            'avg_ms': round(stats['seconds'] * 1000 / requests_made, 1) if requests_made else 0,
+            'max_ms': round(stats['max_seconds'] * 1000, 1),
+            'limiter': self.limiter.state_info(),
+        }
+
+    def close(self):
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide TranslationClient."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = TranslationClient()
+    return _client
+
+
+def configure(pool_size):
+    """Replace the process-wide client with one whose pool holds `pool_size` connections."""
+    global _client
+    with _client_lock:
+        old, _client = _client, TranslationClient(pool_size=pool_size)
+    if old is not None:
+        old.close()
+    return _client
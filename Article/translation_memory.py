@@ -0,0 +1,191 @@
+"""
+Persistent translation memory (TranslationMemory table).
+
+Segments are keyed by (sha256 of the source text, source lang, target lang)
+and consulted before any provider call, so recurring boilerplate such as
+sign-offs, "Baca juga" lines and social links is translated once and
+reused by every worker after every deploy. Each process keeps a bounded
+LRU in front of the table, warm-loaded with the most used entries on first
+use. Rows are immutable apart from hits/last_used_at, so the LRU never
+holds stale translations.
+
+Hits are counted in the process and written in grouped UPDATEs at most
+every HIT_FLUSH_INTERVAL seconds (or once HIT_FLUSH_THRESHOLD segments are
+pending), and by `flush_hits` before a prune and when a worker stops, so a
+lookup served from the LRU costs no query.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from Article.lru import LRU
+from DashboardAdmin.models import TranslationMemory
+
+
+logger = logging.getLogger(__name__)
+
+
+def segment_key(text):
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+_lru = LRU(_env_int('TRANSLATION_MEMORY_LRU_SIZE', 5000))
+_warmed = False
+_warm_lock = threading.Lock()
+
+HIT_FLUSH_INTERVAL = _env_int('TRANSLATION_MEMORY_HIT_FLUSH_SECONDS', 60)
+HIT_FLUSH_THRESHOLD = 1000
+# {(segment_hash, source, target): hits not yet written}
+_pending_hits = defaultdict(int)
+_hits_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _lru_key(segment_hash, source, target):
+    return (segment_hash, source, target)
+
+
+def warm(limit=None):
+    """Load the most used entries into the process LRU (once per process)."""
+    global _warmed
+    if _warmed:
+        return
+    with _warm_lock:
+        if _warmed:
+            return
+        _warmed = True
+        limit = _lru.max_entries if limit is None else limit
+        try:
+            rows = TranslationMemory.objects.order_by('-hits', '-last_used_at').values_list(
+                'segment_hash', 'source_lang', 'target_lang', 'translated',
+            )[:limit]
+            # least used first so the most used end up most recent in the LRU
+            for segment_hash, source, target, translated in reversed(list(rows)):
+                _lru.set(_lru_key(segment_hash, source, target), translated)
+        except Exception:
+            logger.exception('Failed to warm translation memory')
+
+
+def lookup_many(texts, source, target):
+    """Return {text: translation} for the texts found in the memory."""
+    warm()
+    keys = {segment_key(text): text for text in texts}
+    found = {}
+    misses = []
+    for segment_hash, text in keys.items():
+        value = _lru.get(_lru_key(segment_hash, source, target))
+        if value is None:
+            misses.append(segment_hash)
+        else:
+            found[segment_hash] = value
+    try:
+        if misses:
+            rows = TranslationMemory.objects.filter(
+                segment_hash__in=misses, source_lang=source, target_lang=target,
+            ).values_list('segment_hash', 'translated')
+            for segment_hash, translated in rows:
+                found[segment_hash] = translated
+                _lru.set(_lru_key(segment_hash, source, target), translated)
+    except Exception:
+        # the memory only saves provider calls; never fail a translation over it
+        logger.exception('Translation memory lookup failed')
+    if found:
+        _count_hits(found, source, target)
+    return {keys[segment_hash]: value for segment_hash, value in found.items()}
+
+
+def _count_hits(segment_hashes, source, target):
+    with _hits_lock:
+        for segment_hash in segment_hashes:
+            _pending_hits[_lru_key(segment_hash, source, target)] += 1
+        due = len(_pending_hits) >= HIT_FLUSH_THRESHOLD or time.monotonic() - _last_flush >= HIT_FLUSH_INTERVAL
+    if due:
+        flush_hits()
+
+
+def flush_hits():
+    """Write the hits counted in this process; one UPDATE per (count, source, target)."""
+    global _last_flush
+    with _hits_lock:
+        pending = dict(_pending_hits)
+        _pending_hits.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return 0
+    groups = defaultdict(list)
+    for (segment_hash, source, target), hits in pending.items():
+        groups[(hits, source, target)].append(segment_hash)
+    now = timezone.now()
+    updated = 0
+    try:
+        for (hits, source, target), segment_hashes in groups.items():
+            for start in range(0, len(segment_hashes), 500):
+                updated += TranslationMemory.objects.filter(
+                    segment_hash__in=segment_hashes[start:start + 500], source_lang=source, target_lang=target,
+                ).update(hits=F('hits') + hits, last_used_at=now)
+    except Exception:
+        # hit counts only order the warm-up and pruning; losing a few is fine
+        logger.exception('Failed to record translation memory hits')
+    return updated
+
+
+def lookup(text, source, target):
+    return lookup_many([text], source, target).get(text)
+
+
+def store_many(translations, source, target):
+    """Remember {text: translation} pairs returned by the provider."""
+    rows = []
+    for text, translated in translations.items():
+        if not text or translated is None:
+            continue
+        segment_hash = segment_key(text)
+        _lru.set(_lru_key(segment_hash, source, target), translated)
+        rows.append(TranslationMemory(segment_hash=segment_hash, source_lang=source, target_lang=target, translated=translated))
+    if not rows:
+        return
+    try:
+        # another worker may have stored the same segment meanwhile
+        TranslationMemory.objects.bulk_create(rows, ignore_conflicts=True, batch_size=500)
+    except Exception:
+        logger.exception('Failed to store %s segments in translation memory', len(rows))
+
+
+def store(text, translated, source, target):
+    store_many({text: translated}, source, target)
+
+
+def prune(unused_days=180, max_rows=None):
+    """Delete entries unused for `unused_days`, then the least recently used beyond `max_rows`.
+
+    Returns the number of deleted rows.
+    """
+    # entries used since the last flush must not look unused
+    flush_hits()
+    deleted, _ = TranslationMemory.objects.filter(last_used_at__lt=timezone.now() - timedelta(days=unused_days)).delete()
+    if max_rows is not None:
+        cutoff = (
+            TranslationMemory.objects.order_by('-last_used_at', '-id')
+            .values_list('last_used_at', flat=True)[max_rows:max_rows + 1]
+        )
+        cutoff = next(iter(cutoff), None)
+        if cutoff is not None:
+            extra, _ = TranslationMemory.objects.filter(last_used_at__lte=cutoff).delete()
+            deleted += extra
+    if deleted:
+        _lru.clear()
+    return deleted
@@ -11,6 +11,7 @@ urlpatterns = [
     path('article/<slug:slug>/', views.article_detail, name='article_detail'),
     path('api/articles/<str:category_name>/', views.api_articles_by_category, name='api_articles'),
     path('api/articles/<str:category_name>/pinned/', views.api_pinned_article, name='api_pinned_article'),
+    path('api/feed/', views.api_feed, name='api_feed'),
     path('api/article/<slug:slug>/', views.api_article_detail, name='api_article_detail'),
     # Accept both with and without trailing slash to avoid APPEND_SLASH POST redirect errors
     path('api/translate', views.api_translate, name='api_translate_noslash'),
@@ -1,36 +1,37 @@
+from django.conf import settings
 from django.shortcuts import render
+from django.templatetags.static import static
 from django.shortcuts import get_object_or_404
-from DashboardAdmin.models import Article as DashboardArticle, SiteSetting, ArticleTranslation, SiteSettingTranslation
-from django.http import JsonResponse
+from DashboardAdmin.models import Article as DashboardArticle, ArticleTranslation
+from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_GET
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.utils.text import Truncator
-from django.utils.html import strip_tags
-# Needed for HTML-safe fallback in API snippets
 from django.utils.safestring import mark_safe
-from django.utils.html import escape
-# reuse formatting helper for API HTML snippets
-from Article.templatetags.embed_filters import format_youtube_desc, autoembed
+from Article.templatetags.embed_filters import autoembed
+from DashboardAdmin.content_utils import content_hash
+from DashboardAdmin.site_settings import AD_SLOTS, get_site_snapshot, youtube_desc_for
+from Article.cache_utils import api_cache_key, feed_cache_key, get_cached_payload, set_cached_payload
+from Article.feed import LISTING_ORDERING, feed_params, load_feed
+from Article.pagination import keyset_paginate, InvalidCursor
+from Article.streaming import stream_template
+from Article import html_tokens, translation_memory
+from Article.translation_client import BATCH_PARALLELISM, ProviderError, get_client as get_translation_client
+from Article.conditional import (
+    conditional, article_page_etag, article_api_etag, category_listing_etag, feed_etag,
+)
 import re
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 import json
-import os
 import hashlib
 import logging
 import concurrent.futures
-import uuid
-
-try:
-    import requests
-except Exception:
-    requests = None
 from django.core.cache import cache
 
 
 logger = logging.getLogger(__name__)
 
-
 def _normalize_lang(value, fallback='id'):
     lang = (value or fallback or 'id').lower()
     if lang == 'jp':
@@ -40,111 +41,85 @@ def _normalize_lang(value, fallback='id'):
     return lang
 
 
-def _shield_embeds(html):
-    """Cache iframe/embed HTML server-side and replace with safe text tokens.
+def _placeholder(placeholders, original):
+    # keys are numbered per call, so the masked HTML is the same for the same input
+    key = f'cs_embed_{len(placeholders)}'
+    placeholders[key] = original
+    return f'<cs-embed data-cs-embed="{key}"></cs-embed>'
+
 
-    Returns (masked_html, list_of_cache_keys).
-    Token format: %%CS_EMBED_<hex>%% where cache key is 'cs_embed_<hex>'.
+def _shield_embeds(html, placeholders=None):
+    """Replace iframe/embed HTML with placeholder tags.
+
+    Returns (masked_html, placeholders) where `placeholders` maps each
+    placeholder key to the original HTML. The map only lives for the call
+    that restores it (see `_restore_placeholders`); pass the map returned by
+    `_shield_youtube_links` to shield both into one map.
+    Token format: <cs-embed data-cs-embed="cs_embed_<n>"></cs-embed>
     """
+    if placeholders is None:
+        placeholders = {}
     if not html:
-        return html, []
-    keys = []
+        return html, placeholders
 
-    def _repl(m):
-        original = m.group(0)
-        uid = uuid.uuid4().hex
-        key = f'cs_embed_{uid}'
-        try:
-            # store original HTML in Django cache for later restore
-            cache.set(key, original, 60 * 60 * 24)  # 24h
-        except Exception:
-            pass
-        keys.append(key)
-        # use a custom lightweight tag placeholder that will be preserved as a tag
-        # example: <cs-embed data-cs-embed="cs_embed_abcdef1234"></cs-embed>
-        token = f'<cs-embed data-cs-embed="{key}"></cs-embed>'
-        return token
-
-    # First capture wrapper blocks that contain an iframe (e.g., <div>...<iframe>...</iframe></div>),
-    # so we replace the whole wrapper to avoid leaving stray wrapper markup around restored iframe.
-    wrapper_pattern = re.compile(r'(<(?:div|figure|p)[^>]*>\s*(?:<iframe[\s\S]*?>[\s\S]*?<\/iframe>)\s*<\/(?:div|figure|p)>)', flags=re.I)
-    masked = wrapper_pattern.sub(_repl, html)
-    # then replace standalone iframe blocks
-    masked = re.sub(r'(<iframe[\s\S]*?>[\s\S]*?<\/iframe>)', _repl, masked, flags=re.I)
-    # replace embed tags
-    masked = re.sub(r'(<embed[\s\S]*?\/?>)', _repl, masked, flags=re.I)
-    return masked, keys
+    # the tokenizer yields a wrapper block containing an iframe (e.g. <div>...<iframe>...</iframe></div>)
+    # as one EMBED token, so no stray wrapper markup is left around the restored iframe
+    masked = ''.join(
+        _placeholder(placeholders, value) if kind == html_tokens.EMBED else value
+        for kind, value in html_tokens.tokenize(html)
+    )
+    return masked, placeholders
+
+
+# <cs-embed ... data-cs-embed="KEY" ...> with optional closing tag (providers may add attributes/spaces)
+_PLACEHOLDER_RE = re.compile(
+    r'<cs-embed\s+[^>]*data-cs-embed=["\'](?P<key>cs_[a-z0-9_]+)["\'][^>]*>(?:\s*<\/cs-embed>\s*)?',
+    flags=re.I | re.DOTALL
+)
+_YOUTUBE_URL_RE = re.compile(r'(https?://(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/)([A-Za-z0-9_-]{6,})(?:[^\s<>"]*)?)', flags=re.I)
 
 
 def _restore_placeholders(text, placeholders):
-    if not text:
-        return text
+    """Put the originals of `placeholders` back in one pass.
 
-    # Replace custom tag placeholders like <cs-embed data-cs-embed="cs_embed_<hex>"></cs-embed>
-    # Also try variations in case the placeholder format changed
-    def _repl_token(m):
-        key = m.group('key')
-        try:
-            orig = cache.get(key)
-            if orig:
-                try:
-                    cache.delete(key)
-                except Exception:
-                    pass
-                return orig
-        except Exception:
-            pass
-        
-        # If cache miss, return the original placeholder
-        # This is better than losing content
-        return m.group(0)
-
-    # Match <cs-embed ... data-cs-embed="KEY" ...> with optional closing tag
-    pattern = re.compile(
-        r'<cs-embed\s+[^>]*data-cs-embed=["\'](?P<key>cs_[a-z0-9_]+)["\'][^>]*>(?:\s*<\/cs-embed>\s*)?',
-        flags=re.I | re.DOTALL
-    )
-    
-    result = pattern.sub(_repl_token, text)
-    return result
+    Unknown placeholders are left as they are; this is better than losing content.
+    """
+    if not text or not placeholders:
+        return text
+    return _PLACEHOLDER_RE.sub(lambda m: placeholders.get(m.group('key'), m.group(0)), text)
 
 
-def _shield_youtube_links(html):
-    """Replace plain YouTube URLs in text with cache-backed placeholders.
+def _shield_youtube_links(html, placeholders=None):
+    """Replace plain YouTube URLs in text with placeholder tags.
 
     This prevents translation providers from converting URLs into HTML or
-    otherwise mangling them. Returns (masked_html, list_of_cache_keys).
+    otherwise mangling them. Returns (masked_html, placeholders) like
+    `_shield_embeds`.
     """
+    if placeholders is None:
+        placeholders = {}
     if not html:
-        return html, []
-
-    keys = []
-    # pattern covers watch?v=, youtu.be/, and embed/ links
-    # Now captures trailing parameters like ?si=... or &list=... etc.
-    url_pattern = re.compile(r'(https?://(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/)([A-Za-z0-9_-]{6,})(?:[^\s<>"]*)?)', flags=re.I)
+        return html, placeholders
 
+    # covers watch?v=, youtu.be/, and embed/ links, with trailing parameters like ?si=... or &list=...
     def _repl(m):
-        original_url = m.group(1)
-        vid = m.group(2)
-        uid = uuid.uuid4().hex
-        key = f'cs_embed_{uid}'
         # Store the ORIGINAL URL, not converted to iframe
         # This preserves the original article structure
-        try:
-            cache.set(key, original_url, 60 * 60 * 24)
-        except Exception:
-            pass
-        keys.append(key)
-        return f'<cs-embed data-cs-embed="{key}"></cs-embed>'
+        return _placeholder(placeholders, m.group(1))
 
     # Only replace URLs that appear in text nodes, not within tags
-    parts = re.split(r'(<[^>]+>)', html)
-    for i, p in enumerate(parts):
-        if p.startswith('<'):
-            continue
-        parts[i] = url_pattern.sub(_repl, p)
+    return html_tokens.sub_text(html, _YOUTUBE_URL_RE, _repl), placeholders
+
 
-    return ''.join(parts), keys
+def _rendered_body(obj):
+    """Return the embed-expanded body of an Article/ArticleTranslation.
+
+    The version stored at save time is used while its hash still matches the
+    content; rows written without save() fall back to rendering on the fly.
+    """
+    if obj.rendered_hash and obj.rendered_hash == content_hash(obj.content):
+        return mark_safe(obj.rendered_content)
+    return autoembed(obj.content)
 
 
 def coba(request):
@@ -169,47 +144,16 @@ def home(request, lang=None):
     if lang not in ['id', 'en', 'ja']:
         lang = 'id'
     
-    setting = SiteSetting.get_solo()
-
-    # normalize youtube link to an embed URL so iframe loads the player correctly
-    def to_embed_url(url):
-        if not url:
-            return ''
-        # try to extract video id from common youtube url patterns
-        m = None
-        # watch?v=VIDEO or &v=VIDEO
-        m = re.search(r'[?&]v=([A-Za-z0-9_-]{6,})', url)
-        if not m:
-            # youtu.be/VIDEO or youtube.com/embed/VIDEO
-            m = re.search(r'(?:youtu\.be/|/embed/)([A-Za-z0-9_-]{6,})', url)
-        if m:
-            vid = m.group(1)
-            return f'https://www.youtube.com/embed/{vid}'
-        # if already looks like embed or raw id
-        if re.match(r'^[A-Za-z0-9_-]{6,}$', url):
-            return f'https://www.youtube.com/embed/{url}'
-        if 'youtube.com/embed/' in url:
-            return url
-        # fallback: return original
-        return url
-
-    youtube_embed = to_embed_url(setting.youtube_link)
-
-    youtube_desc = setting.youtube_desc
-    if lang != 'id':
-        try:
-            t = SiteSettingTranslation.objects.filter(setting=setting, lang=lang).first()
-        except Exception:
-            t = None
-        if t and t.youtube_desc:
-            youtube_desc = t.youtube_desc
+    # settings come from the process-local snapshot (no queries in steady state)
+    setting = get_site_snapshot()
+    youtube_desc = youtube_desc_for(setting, lang)
 
     return render(request, 'index.html', {
         'spotify_link': setting.spotify_link,
         'youtube_link': setting.youtube_link,
-        'youtube_embed': youtube_embed,
+        'youtube_embed': setting.youtube_embed,
         'youtube_desc': youtube_desc,
-        'vote_link': getattr(setting, 'vote_link', ''),
+        'vote_link': setting.vote_link,
         'current_language': lang,
     })
 
@@ -242,6 +186,7 @@ def geek(request, lang=None):
     return render(request, 'geek.html', {'current_language': lang})
 
 
+@conditional(etag_func=article_page_etag)
 def article_detail(request, slug, lang=None):
     # Get language from URL parameter or use request language
     if lang is None:
@@ -253,96 +198,100 @@ def article_detail(request, slug, lang=None):
     if lang not in ['id', 'en', 'ja']:
         lang = 'id'
     
-    article = get_object_or_404(DashboardArticle, slug=slug, status='published')
+    article = get_object_or_404(DashboardArticle.objects.select_related('category', 'admin'), slug=slug, status='published')
     
     # Get translated content if language is not Indonesian
-    content = article.content
+    source = article
     title = article.title
     if lang != 'id':
         try:
-            translation = ArticleTranslation.objects.get(article=article, lang=lang)
-            title = translation.title
-            content = translation.content
+            source = ArticleTranslation.objects.defer('segments').get(article=article, lang=lang)
+            title = source.title
         except ArticleTranslation.DoesNotExist:
             # Fall back to Indonesian if translation doesn't exist
             lang = 'id'
     
-    # Apply autoembed filter to convert YouTube URLs to iframes
-    from Article.templatetags.embed_filters import autoembed
-    content = autoembed(content)
+    # Body with YouTube URLs converted to iframes (rendered at save time)
+    content = _rendered_body(source)
     
     # Include site-wide settings (ads, youtube, etc.) so templates can render them
     try:
-        setting = SiteSetting.get_solo()
+        setting = get_site_snapshot()
     except Exception:
         setting = None
 
     # compute accessible URLs for ad images (use absolute URIs to avoid relative/media issues)
-    ad_left_url = None
-    ad_right_url = None
-    ad_down_url = None
-    ad_top_url = None
-    ad_left_link = None
-    ad_right_link = None
-    ad_top_link = None
-    ad_down_link = None
-    
-    if setting:
-        try:
-            if setting.ad_left:
-                ad_left_url = request.build_absolute_uri(setting.ad_left.url)
-                ad_left_link = setting.ad_left_link or None
-        except Exception:
-            pass
-        
-        try:
-            if setting.ad_right:
-                ad_right_url = request.build_absolute_uri(setting.ad_right.url)
-                ad_right_link = setting.ad_right_link or None
-        except Exception:
-            pass
-        
-        try:
-            if setting.ad_down:
-                ad_down_url = request.build_absolute_uri(setting.ad_down.url)
-                ad_down_link = setting.ad_down_link or None
-        except Exception:
-            pass
-        
-        try:
-            if setting.ad_top:
-                ad_top_url = request.build_absolute_uri(setting.ad_top.url)
-                ad_top_link = setting.ad_top_link or None
-        except Exception:
-            pass
+    ads = {}
+    for slot in AD_SLOTS:
+        url = setting.ad_urls.get(slot) if setting else None
+        ads[f'ad_{slot}_url'] = request.build_absolute_uri(url) if url else None
+        ads[f'ad_{slot}_link'] = setting.ad_links.get(slot) if setting else None
 
-    return render(request, 'article.html', {
+    context = {
         'article': article,
         'title': title,
         'content': content,
         'current_language': lang,
         'setting': setting,
-        'ad_left_url': ad_left_url,
-        'ad_right_url': ad_right_url,
-        'ad_down_url': ad_down_url,
-        'ad_top_url': ad_top_url,
-        'ad_left_link': ad_left_link,
-        'ad_right_link': ad_right_link,
-        'ad_top_link': ad_top_link,
-        'ad_down_link': ad_down_link,
-    })
+        **ads,
+    }
+    if getattr(settings, 'ARTICLE_STREAMING', False):
+        # the browser fetches the stylesheet while the head is being parsed
+        return stream_template(request, 'article.html', context, preload=[(static('css/output.css'), 'style')])
+    return render(request, 'article.html', context)
+
+
+def _listing_source(article, translation):
+    """Pick the row whose precomputed listing fields should be served.
+
+    A translation is used when it has a body; otherwise fall back to the original.
+    """
+    if translation and (translation.plain_content or translation.desc_html):
+        return translation
+    return article
+
+
+def _listing_item(request, article, translation, prefix):
+    """Serialize an article card for the listing, pinned and feed APIs."""
+    a = article
+    if a.featured_image and hasattr(a.featured_image, 'url'):
+        try:
+            img_url = request.build_absolute_uri(a.featured_image.url)
+        except Exception:
+            img_url = a.featured_image.url
+    else:
+        img_url = '/static/images/placeholder.png'
+
+    t = translation
+    # short_desc/desc_html are derived from the body (minus any leading image) on save
+    source = _listing_source(a, t)
+    return {
+        'id': a.id,
+        'title': t.title if t and t.title else a.title,
+        'slug': a.slug,
+        'url': (request.build_absolute_uri(f'{prefix}/article/{a.slug}/') if a.slug else None),
+        'category': a.category.name if a.category else '',
+        'img': img_url,
+        'desc': source.short_desc,
+        'desc_html': source.desc_html,
+        'is_pinned': bool(a.is_pinned),
+    }
 
 
 @require_GET
+@conditional(etag_func=category_listing_etag)
 def api_articles_by_category(request, category_name):
     """Return published articles for a category as JSON, paginated.
 
     Query params:
       - page (int): 1-based page number (default 1)
       - page_size (int): items per page (default 10)
+      - cursor (str): opaque keyset cursor; when present (even empty, for the
+        first page) `page` is ignored and no COUNT(*) is run
 
     Response JSON:
       { items: [...], page: n, total_pages: m, total_items: t, page_size: s }
+      cursor mode: { items: [...], page_size: s, next_cursor: c|null, prev_cursor: c|null }
     """
     # Determine language from query or middleware
     lang = _normalize_lang(request.GET.get('lang') or getattr(request, 'language', 'id'))
@@ -350,12 +299,8 @@ def api_articles_by_category(request, category_name):
     
     logger.info(f'[api_articles_by_category] category={category_name}, lang={lang}, prefix={prefix}')
 
-    # Prefer pinned articles first so frontend can render a pinned hero
-    qs = DashboardArticle.objects.filter(category__name__iexact=category_name, status='published').order_by('-is_pinned', '-published_at', '-created_at')
-    
-    logger.info(f'[api_articles_by_category] Found {qs.count()} articles for category {category_name}')
-
     # parse paging parameters
+    cursor = request.GET.get('cursor')
     try:
         page = int(request.GET.get('page', '1'))
         if page < 1:
@@ -369,74 +314,70 @@ def api_articles_by_category(request, category_name):
     except Exception:
         page_size = 10
 
-    paginator = Paginator(qs, page_size)
-    try:
-        page_obj = paginator.page(page)
-    except (EmptyPage, PageNotAnInteger):
-        page_obj = paginator.page(1)
+    # Serve the stored JSON bytes when this category has not changed since
+    # they were built (the generation is bumped on every article save/delete).
+    if cursor is not None:
+        cache_key = api_cache_key(request, category_name, lang, 'cursor', cursor, page_size)
+    else:
+        cache_key = api_cache_key(request, category_name, lang, page, page_size)
+    cached = get_cached_payload(cache_key)
+    if cached is not None:
+        return HttpResponse(cached, content_type='application/json')
+
+    # Prefer pinned articles first so frontend can render a pinned hero
+    # Listing fields are precomputed on save, so the article body is never loaded here
+    qs = DashboardArticle.objects.filter(category__name__iexact=category_name, status='published').select_related('category').defer('content')
+
+    if cursor is not None:
+        try:
+            cursor_page = keyset_paginate(qs, LISTING_ORDERING, cursor=cursor, page_size=page_size)
+        except InvalidCursor:
+            return JsonResponse({'error': 'invalid_cursor'}, status=400)
+        articles = cursor_page.object_list
+    else:
+        paginator = Paginator(qs.order_by(*LISTING_ORDERING), page_size)
+        try:
+            page_obj = paginator.page(page)
+        except (EmptyPage, PageNotAnInteger):
+            page_obj = paginator.page(1)
+        articles = list(page_obj.object_list)
 
     data = []
 
     translations_map = {}
     if lang != 'id':
         # Avoid MySQL limitation with LIMIT + IN subquery by materializing IDs
-        article_ids = list(page_obj.object_list.values_list('id', flat=True))
-        translations = ArticleTranslation.objects.filter(article_id__in=article_ids, lang=lang)
+        article_ids = [a.id for a in articles]
+        translations = ArticleTranslation.objects.filter(article_id__in=article_ids, lang=lang).defer('content', 'segments')
         translations_map = {t.article_id: t for t in translations}
         logger.info(f'[api_articles_by_category] Found {len(translations_map)} translations for lang={lang}')
     
-    for a in page_obj.object_list:
-        if a.featured_image and hasattr(a.featured_image, 'url'):
-            try:
-                img_url = request.build_absolute_uri(a.featured_image.url)
-            except Exception:
-                img_url = a.featured_image.url
-        else:
-            img_url = '/static/images/placeholder.png'
-
-        t = translations_map.get(a.id)
-        title = t.title if t and t.title else a.title
-        raw = t.content if t and t.content else (a.content or '')
-
-        # Prepare a short plain-text description without leading images
-        # remove a leading <p> or <figure> that contains an <img> (optionally wrapped in <a>)
-        raw_no_leading_img = re.sub(r'^(?:\s*<(?:p|figure)[^>]*>\s*)?(?:<a[^>]*>\s*)?(?:<img[^>]*>)(?:\s*</a>)?(?:\s*</(?:p|figure)>)?', '', raw, flags=re.I)
-        # strip remaining HTML tags and collapse whitespace
-        plain = strip_tags(raw_no_leading_img).strip()
-        plain = re.sub(r'\s+', ' ', plain)
-        short_desc = Truncator(plain).chars(150)
-        # also provide an HTML-friendly snippet that preserves links and
-        # converts literal/newline separators into <p>/<br> for clients
-        try:
-            desc_html = format_youtube_desc(raw_no_leading_img)
-        except Exception:
-            # fallback: escape and convert newlines
-            desc_html = mark_safe(escape(raw_no_leading_img).replace('\n', '<br>'))
-
-        data.append({
-            'id': a.id,
-            'title': title,
-            'slug': a.slug,
-            'url': (request.build_absolute_uri(f'{prefix}/article/{a.slug}/') if a.slug else None),
-            'category': a.category.name if a.category else '',
-            'img': img_url,
-            'desc': short_desc,
-            'desc_html': desc_html,
-            'is_pinned': bool(a.is_pinned),
-        })
+    for a in articles:
+        data.append(_listing_item(request, a, translations_map.get(a.id), prefix))
     
     logger.info(f'[api_articles_by_category] Returning {len(data)} items')
 
-    return JsonResponse({
-        'items': data,
-        'page': page_obj.number,
-        'total_pages': paginator.num_pages,
-        'total_items': paginator.count,
-        'page_size': page_size,
-    })
+    if cursor is not None:
+        response = JsonResponse({
+            'items': data,
+            'page_size': page_size,
+            'next_cursor': cursor_page.next_cursor,
+            'prev_cursor': cursor_page.prev_cursor,
+        })
+    else:
+        response = JsonResponse({
+            'items': data,
+            'page': page_obj.number,
+            'total_pages': paginator.num_pages,
+            'total_items': paginator.count,
+            'page_size': page_size,
+        })
+    set_cached_payload(cache_key, response.content)
+    return response
 
 
 @require_GET
+@conditional(etag_func=category_listing_etag)
 def api_pinned_article(request, category_name):
     """Return the first published pinned article for a category, or null.
 
@@ -446,54 +387,77 @@ def api_pinned_article(request, category_name):
     prefix = '' if lang == 'id' else f'/{lang}'
 
     try:
-        a = DashboardArticle.objects.filter(category__name__iexact=category_name, status='published', is_pinned=True).order_by('-published_at', '-created_at').first()
+        a = DashboardArticle.objects.filter(category__name__iexact=category_name, status='published', is_pinned=True).select_related('category').defer('content').order_by('-published_at', '-created_at').first()
     except Exception:
         a = None
 
     if not a:
         return JsonResponse({'item': None})
 
-    if a.featured_image and hasattr(a.featured_image, 'url'):
-        try:
-            img_url = request.build_absolute_uri(a.featured_image.url)
-        except Exception:
-            img_url = a.featured_image.url
-    else:
-        img_url = '/static/images/placeholder.png'
-
     t = None
     if lang != 'id':
         try:
-            t = ArticleTranslation.objects.get(article=a, lang=lang)
+            t = ArticleTranslation.objects.defer('content', 'segments').get(article=a, lang=lang)
         except ArticleTranslation.DoesNotExist:
             t = None
 
-    title = t.title if t and t.title else a.title
-    raw = t.content if t and t.content else (a.content or '')
-    raw_no_leading_img = re.sub(r'^(?:\s*<(?:p|figure)[^>]*>\s*)?(?:<a[^>]*>\s*)?(?:<img[^>]*>)(?:\s*</a>)?(?:\s*</(?:p|figure)>)?', '', raw, flags=re.I)
-    plain = strip_tags(raw_no_leading_img).strip()
-    plain = re.sub(r'\s+', ' ', plain)
-    short_desc = Truncator(plain).chars(150)
-    try:
-        desc_html = format_youtube_desc(raw_no_leading_img)
-    except Exception:
-        from django.utils.safestring import mark_safe
-        from django.utils.html import escape
-        desc_html = mark_safe(escape(raw_no_leading_img).replace('\n', '<br>'))
+    return JsonResponse({'item': _listing_item(request, a, t, prefix)})
 
-    item = {
-        'id': a.id,
-        'title': title,
-        'slug': a.slug,
-        'url': (request.build_absolute_uri(f'{prefix}/article/{a.slug}/') if a.slug else None),
-        'category': a.category.name if a.category else '',
-        'img': img_url,
-        'desc': short_desc,
-        'desc_html': desc_html,
-        'is_pinned': True,
-    }
 
-    return JsonResponse({'item': item})
+@require_GET
+@conditional(etag_func=feed_etag)
+def api_feed(request):
+    """Return the pinned hero and first page of several categories in one response.
+
+    Query params:
+      - categories (str): comma-separated category names (default: the home sections)
+      - limit (int): items per category (default 10, max 50)
+      - lang (str): id | en | ja
+
+    Response JSON:
+      { lang: l, page_size: s, sections: { <category>: {
+          pinned: {...}|null, items: [...], page: 1, total_pages: m, total_items: t } } }
+
+    Each section matches page 1 of /api/articles/<category>/ with page_size=limit
+    plus /api/articles/<category>/pinned/, but the query count does not grow
+    with the number of categories.
+    """
+    categories, limit, lang = feed_params(request)
+    prefix = '' if lang == 'id' else f'/{lang}'
+
+    cache_key = feed_cache_key(request, categories, lang, limit)
+    cached = get_cached_payload(cache_key)
+    if cached is not None:
+        return HttpResponse(cached, content_type='application/json')
+
+    sections, translations = load_feed(categories, limit, lang)
+    data = {}
+    for name, section in sections.items():
+        items = [_listing_item(request, a, translations.get(a.id), prefix) for a in section['articles']]
+        total = section['total']
+        data[name] = {
+            # the listing order puts the newest pinned article first
+            'pinned': items[0] if items and items[0]['is_pinned'] else None,
+            'items': items,
+            'page': 1,
+            'total_pages': max(1, -(-total // limit)),
+            'total_items': total,
+        }
+
+    response = JsonResponse({'lang': lang, 'page_size': limit, 'sections': data})
+    set_cached_payload(cache_key, response.content)
+    return response
+
+
+def _segment_hash(text):
+    """Key of a source segment in ArticleTranslation.segments."""
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()[:32]
+
+
+def _translation_cache_key(text, source_norm, target_norm):
+    # cache key: sha256 of text + source/target lang
+    key_hash = hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+    return 'translation:{}:{}:{}'.format(key_hash, source_norm, target_norm)
 
 
 def _translate_text_via_provider(text, target_lang, source_lang='auto'):
@@ -504,90 +468,31 @@ def _translate_text_via_provider(text, target_lang, source_lang='auto'):
     """
     logger = logging.getLogger(__name__)
 
-    if not requests:
-        logger.error('requests library is not available for translation provider')
-        raise RuntimeError('requests library is required for translation provider')
-
-    # cache key: sha256 of text + target lang
-    try:
-        cache_ttl = int(os.environ.get('TRANSLATION_CACHE_TTL', '86400'))
-    except Exception:
-        cache_ttl = 86400
-    key_hash = hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+    client = get_translation_client()
+    cache_ttl = client.config().cache_ttl
     target_norm = (target_lang or '').lower()
     source_norm = (source_lang or 'auto').lower()
-    cache_key = 'translation:{}:{}:{}'.format(key_hash, source_norm, target_norm)
+    cache_key = _translation_cache_key(text, source_norm, target_norm)
     try:
         cached = cache.get(cache_key)
     except Exception:
         cached = None
     if cached:
         return cached
-
-    # map commonly-used client language codes to provider expected codes
-    LANG_MAP = {
-        'jp': 'ja',  # user-facing used 'jp' -> provider expects 'ja'
-        'ja': 'ja',
-        'id': 'id',
-        'in': 'id',
-        'en': 'en'
-    }
-    mapped_target = LANG_MAP.get((target_lang or '').lower(), target_lang)
-
-    # Prefer explicit environment variable, then SiteSetting value, then local default
-    url = os.environ.get('TRANSLATE_API_URL', '')
-    api_key = os.environ.get('TRANSLATE_API_KEY', '')
-    if not url:
+    remembered = translation_memory.lookup(text, source_norm, target_norm)
+    if remembered is not None:
         try:
-            setting = SiteSetting.get_solo()
-            url = (setting.translate_api_url or '').strip()
-            if not api_key:
-                api_key = (setting.translate_api_key or '').strip()
+            cache.set(cache_key, remembered, cache_ttl)
         except Exception:
-            url = ''
-    if not url:
-        url = 'http://127.0.0.1:5000/translate'
-
-    # Prepare payload (caller is responsible for shielding HTML/embed blocks when needed)
-    payload = {
-        'q': text,
-        'source': (source_lang or 'auto'),
-        'target': mapped_target,
-        'format': 'html'
-    }
-    if api_key:
-        payload['api_key'] = api_key
-
-    headers = {'Content-Type': 'application/json'}
+            pass
+        return remembered
 
-    # Configure session with retries and backoff to tolerate transient provider issues
+    # caller is responsible for shielding HTML/embed blocks when needed
     try:
-        from requests.adapters import HTTPAdapter
-        from urllib3.util.retry import Retry
-
-        session = requests.Session()
-        retries = Retry(total=3, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset(['GET', 'POST']))
-        session.mount('http://', HTTPAdapter(max_retries=retries))
-        session.mount('https://', HTTPAdapter(max_retries=retries))
-    except Exception:
-        # fallback to requests.post directly
-        session = requests
+        data = client.translate(text, source_lang or 'auto', target_lang).data
+    except ProviderError as e:
+        body = e.body
 
-    try:
-        # increase timeout to handle provider model loading or slow responses
-        resp = session.post(url, json=payload, headers=headers, timeout=60)
-        # if session is requests module, resp may be a Response or an exception will be raised
-        resp.raise_for_status()
-        data = resp.json()
-    except Exception as e:
-        # try to include response body when available
-        body = None
-        try:
-            if 'resp' in locals() and resp is not None:
-                body = getattr(resp, 'text', None)
-        except Exception:
-            body = None
-        
         # PIVOT TRANSLATION: Indonesian source tidak support langsung ke en/ja
         # Solusi: Gunakan English sebagai bahasa perantara
         # id -> en (via auto-detect to English) atau id -> en -> ja
@@ -599,11 +504,7 @@ def _translate_text_via_provider(text, target_lang, source_lang='auto'):
                         # Untuk target English: coba translate dari auto ke English
                         # (kadang LibreTranslate butuh source='auto' bukan 'id')
                         logger.info(f'Retrying translation with source=auto for target=en')
-                        payload_retry = payload.copy()
-                        payload_retry['source'] = 'auto'
-                        resp_retry = session.post(url, json=payload_retry, headers=headers, timeout=60)
-                        resp_retry.raise_for_status()
-                        data = resp_retry.json()
+                        data = client.translate(text, 'auto', target_lang).data
                         # Jika berhasil, lanjut ke parsing result
                     elif target_norm in ['ja', 'jp']:
                         # Untuk target Japanese: pivot melalui English
@@ -617,17 +518,18 @@ def _translate_text_via_provider(text, target_lang, source_lang='auto'):
                             cache.set(cache_key, result_text, cache_ttl)
                         except Exception:
                             pass
+                        translation_memory.store(text, result_text, source_norm, target_norm)
                         return result_text
                     else:
-                        raise RuntimeError(f"provider_request_failed: {e}; body={body}")
+                        raise e
                 except Exception as pivot_error:
                     logger.error(f'Pivot translation failed: {pivot_error}')
-                    raise RuntimeError(f"provider_request_failed: {e}; body={body}")
+                    raise e
             else:
-                raise RuntimeError(f"provider_request_failed: {e}; body={body}")
+                raise
         else:
             logger.exception('Translation provider request failed')
-            raise RuntimeError(f"provider_request_failed: {e}; body={body}")
+            raise
 
     # derive final text
     result_text = None
@@ -638,8 +540,9 @@ def _translate_text_via_provider(text, target_lang, source_lang='auto'):
     elif isinstance(data, dict) and 'translated' in data:
         # some endpoints return {translated: '...'}
         result_text = data['translated']
-    else:
-        result_text = str(data)
+    if not isinstance(result_text, str):
+        # never cache or remember an error payload as the translation
+        raise ProviderError(f'unexpected provider response: {str(data)[:200]}', body=data)
 
     # Note: callers should restore placeholders when they performed shielding.
 
@@ -648,75 +551,206 @@ def _translate_text_via_provider(text, target_lang, source_lang='auto'):
         cache.set(cache_key, result_text, cache_ttl)
     except Exception:
         pass
+    translation_memory.store(text, result_text, source_norm, target_norm)
 
     return result_text
 
 
-def _translate_html_preserve_tags(html, target_lang, chunk_size=3000):
-    """Translate only text nodes in `html` while preserving tags (iframes, embeds, attributes).
+def _provider_batches(texts, chunk_size=3000):
+    """Group positions of `texts` into batches of at most `chunk_size` characters.
 
-    This splits the HTML into tags and text, batches text segments, sends them to the provider,
-    and stitches translated text back into place. This avoids the provider touching iframe tags.
+    A single text longer than `chunk_size` is sent on its own.
     """
-    if not html:
-        return html
-
-    # Shield plain YouTube links and embed/iframe blocks server-side by replacing
-    # them with cache-backed placeholders. Shielding plain URLs first prevents
-    # the provider from converting URLs into HTML (which caused nested/malformed
-    # iframe markup previously).
-    masked_html, y_keys = _shield_youtube_links(html)
-    masked_html, e_keys = _shield_embeds(masked_html)
-    placeholders = (y_keys or []) + (e_keys or [])
-    # operate on masked HTML for translation
-    html = masked_html
-
-    # split into tags and text
-    parts = re.split(r'(<[^>]+>)', html)
-    # indices of text parts
-    text_indices = [i for i, p in enumerate(parts) if not p.startswith('<')]
-    if not text_indices:
-        return html
-
-    translated_parts = parts[:]  # copy
-
-    # Translate text parts individually to avoid provider mangling of delimiters.
-    # Use a small thread pool to parallelize but avoid flooding the provider.
-    to_translate = []
-    for idx in text_indices:
-        if parts[idx].strip():
-            to_translate.append((idx, parts[idx]))
-        else:
-            # keep whitespace-only segments as-is
-            translated_parts[idx] = parts[idx]
+    batches = []
+    current = []
+    size = 0
+    for i, text in enumerate(texts):
+        length = len(text or '')
+        if current and size + length > chunk_size:
+            batches.append(current)
+            current = []
+            size = 0
+        current.append(i)
+        size += length
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _translate_batch_via_provider(texts, target_lang, source_lang='auto'):
+    """Translate a list of texts with one provider request (LibreTranslate accepts `q` as a list).
+
+    Returns the translations in the same order as `texts`. Segments found in
+    the cache or the translation memory are not sent; callers bound the
+    batch size (see `_provider_batches`).
+    """
+    logger = logging.getLogger(__name__)
+    texts = list(texts)
+    if not texts:
+        return []
 
-    if to_translate:
+    client = get_translation_client()
+    cache_ttl = client.config().cache_ttl
+    target_norm = (target_lang or '').lower()
+    source_norm = (source_lang or 'auto').lower()
+    keys = [_translation_cache_key(text, source_norm, target_norm) for text in texts]
+    try:
+        cached = cache.get_many(list(set(keys)))
+    except Exception:
+        cached = {}
+
+    results = [cached.get(key) or None for key in keys]
+    # identical segments (e.g. repeated captions) are sent once
+    missing = list(dict.fromkeys(texts[i] for i, value in enumerate(results) if value is None))
+    remembered = translation_memory.lookup_many(missing, source_norm, target_norm) if missing else {}
+    if remembered:
+        missing = [text for text in missing if text not in remembered]
+        results = [value if value is not None else remembered.get(texts[i]) for i, value in enumerate(results)]
         try:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=6) as ex:
-                futures = {ex.submit(_translate_text_via_provider, text, target_lang): idx for idx, text in to_translate}
-                for fut in concurrent.futures.as_completed(futures):
-                    idx = futures[fut]
-                    try:
-                        translated_parts[idx] = fut.result()
-                    except Exception:
-                        # on failure, keep original segment
-                        pass
+            cache.set_many({_translation_cache_key(text, source_norm, target_norm): value for text, value in remembered.items()}, cache_ttl)
         except Exception:
-            # fallback: leave original parts
             pass
+    if not missing:
+        return results
 
-    result = ''.join(translated_parts)
-    # restore any embed placeholders back to original HTML from cache
     try:
-        result = _restore_placeholders(result, placeholders)
+        data = client.translate(missing, source_lang or 'auto', target_lang).data
+    except ProviderError as e:
+        body = e.body
+        # PIVOT TRANSLATION: Indonesian source is not supported directly for ja, go through English
+        if body and 'not available as a target language' in str(body) and ('Indonesian' in str(body) or source_norm == 'id'):
+            if target_norm in ['ja', 'jp']:
+                logger.info('Pivoting batch translation: Indonesian -> English -> Japanese')
+                intermediate = _translate_batch_via_provider(missing, 'en', source_lang='auto')
+                translated = _translate_batch_via_provider(intermediate, 'ja', source_lang='en')
+            elif target_norm == 'en' and source_norm != 'auto':
+                logger.info('Retrying batch translation with source=auto for target=en')
+                translated = _translate_batch_via_provider(missing, 'en', source_lang='auto')
+            else:
+                raise
+            data = {'translatedText': translated}
+        else:
+            logger.exception('Translation provider batch request failed')
+            raise
+
+    translated = data.get('translatedText') if isinstance(data, dict) else None
+    if (
+        not isinstance(translated, list) or len(translated) != len(missing)
+        or not all(isinstance(value, str) for value in translated)
+    ):
+        # provider without list support: fall back to one request per segment
+        logger.warning('Translation provider did not return %s results for a batch, translating segments one by one', len(missing))
+        translated = [_translate_text_via_provider(text, target_lang, source_lang=source_lang) for text in missing]
+
+    by_text = dict(zip(missing, translated))
+    try:
+        cache.set_many({_translation_cache_key(text, source_norm, target_norm): value for text, value in by_text.items()}, cache_ttl)
     except Exception:
         pass
+    translation_memory.store_many(by_text, source_norm, target_norm)
+    return [value if value is not None else by_text[texts[i]] for i, value in enumerate(results)]
+
+
+def _translate_segments(texts, target_lang, chunk_size=3000, max_workers=BATCH_PARALLELISM, known=None, learned=None, source_lang='auto', fallback=False):
+    """Translate `texts` in character-bounded batches; returns a list in the same order.
+
+    When a batch fails, the error of the first failed batch is raised once
+    every batch has finished (the others are cached and remembered, so a
+    retry only sends what failed). With `fallback=True` the segments of a
+    failed batch keep their original text instead; never store that result
+    as a translation. `known` maps `_segment_hash(text)` to a previous
+    translation that is reused without calling the provider; every segment
+    that was translated or reused is recorded in `learned` the same way.
+    """
+    texts = list(texts)
+    translated = texts[:]
+    # identical segments (repeated captions, sign-offs) are translated once per call
+    todo = {}
+    for i, text in enumerate(texts):
+        key = _segment_hash(text)
+        if known and key in known:
+            translated[i] = known[key]
+            if learned is not None:
+                learned[key] = translated[i]
+        else:
+            todo.setdefault(text, []).append(i)
+    unique = list(todo)
+    batches = _provider_batches(unique, chunk_size)
+    if not batches:
+        return translated
+
+    def _run(batch):
+        try:
+            return _translate_batch_via_provider([unique[j] for j in batch], target_lang, source_lang=source_lang), None
+        except Exception as e:
+            logger.warning('Translation batch of %s segments failed: %s', len(batch), e)
+            return None, e
+
+    if len(batches) == 1:
+        outcomes = [_run(batches[0])]
+    else:
+        # a few batches in flight at once, without flooding the provider
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as ex:
+            outcomes = list(ex.map(_run, batches))
+    errors = [error for _, error in outcomes if error is not None]
+    if errors and not fallback:
+        raise errors[0]
+    for batch, (results, _) in zip(batches, outcomes):
+        if results is None:
+            continue
+        for j, value in zip(batch, results):
+            for i in todo[unique[j]]:
+                translated[i] = value
+            if learned is not None:
+                learned[_segment_hash(unique[j])] = value
+    return translated
+
+
+def _translate_html_preserve_tags(html, target_lang, chunk_size=3000, known=None, learned=None, source_lang='auto', fallback=False):
+    """Translate only text nodes in `html` while preserving tags (iframes, embeds, attributes).
+
+    This splits the HTML into tags and text, batches text segments, sends them to the provider,
+    and stitches translated text back into place. This avoids the provider touching iframe tags.
+    `known`/`learned` are passed to `_translate_segments` for incremental retranslation, and so
+    is `fallback`: provider errors are raised unless it is set.
+    """
+    if not html:
+        return html
+
+    # One pass over the HTML: tags and embed/iframe blocks are kept as they are, and
+    # plain YouTube links are split out of the text nodes so the provider never sees
+    # them (it used to convert URLs into HTML, which caused nested/malformed iframes).
+    pieces = html_tokens.segments(html, preserve=_YOUTUBE_URL_RE)
+    translated_parts = [value for _, value in pieces]
+
+    # Text nodes are sent as list items (never joined with delimiters the provider
+    # could mangle), packed into requests of at most `chunk_size` characters.
+    # Whitespace-only segments are kept as-is.
+    to_translate = [idx for idx, (is_text, value) in enumerate(pieces) if is_text and value.strip()]
+    if not to_translate:
+        return html
+    results = _translate_segments(
+        [translated_parts[idx] for idx in to_translate], target_lang,
+        chunk_size=chunk_size, known=known, learned=learned, source_lang=source_lang, fallback=fallback,
+    )
+    for idx, value in zip(to_translate, results):
+        translated_parts[idx] = value
 
     # NOTE: Do not normalize plain YouTube links into iframe embeds here.
     # Converting links -> iframe during translation has previously caused
     # nested/duplicated iframe HTML in some articles. Leave original HTML
     # structure intact and let the frontend/template logic handle embeds.
-    return result
+    return ''.join(translated_parts)
+
+
+# All three URL patterns in one regex with alternation, so the third pattern
+# cannot match URLs created by earlier replacements
+_YOUTUBE_LINK_RE = re.compile(
+    r'https?://(?:www\.)?youtube\.com/watch\?v=(?P<id>[A-Za-z0-9_-]{6,})[^\s<"\)]*'
+    r'|https?://(?:www\.)?youtu\.be/(?P<id2>[A-Za-z0-9_-]{6,})[^\s<"\)]*'
+    r'|https?://(?:www\.)?youtube\.com/embed/(?P<id3>[A-Za-z0-9_-]{6,})[^\s<"\)]*',
+    flags=re.I,
+)
 
 
 def _normalize_youtube_links_to_iframe(html):
@@ -734,29 +768,14 @@ def _normalize_youtube_links_to_iframe(html):
         iframe = f'<div class="w-full aspect-video mb-6"><iframe src="https://www.youtube.com/embed/{vid}" frameborder="0" allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" allowfullscreen></iframe></div>'
         return iframe
 
+    def _repl_combined(m):
+        # Extract the video ID from whichever group matched
+        vid = m.group('id') or m.group('id2') or m.group('id3')
+        iframe = f'<div class="w-full aspect-video mb-6"><iframe src="https://www.youtube.com/embed/{vid}" frameborder="0" allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" allowfullscreen></iframe></div>'
+        return iframe
+
     # Only replace URLs that appear in text nodes (not inside HTML tag attributes).
-    parts = re.split(r'(<[^>]+>)', html)
-    for i, p in enumerate(parts):
-        # skip tags
-        if p.startswith('<'):
-            continue
-        # Combine all three URL patterns into one regex with alternation
-        # This prevents the third pattern from matching URLs created by earlier replacements
-        combined_pattern = (
-            r'https?://(?:www\.)?youtube\.com/watch\?v=(?P<id>[A-Za-z0-9_-]{6,})[^\s<"\)]*'
-            r'|https?://(?:www\.)?youtu\.be/(?P<id2>[A-Za-z0-9_-]{6,})[^\s<"\)]*'
-            r'|https?://(?:www\.)?youtube\.com/embed/(?P<id3>[A-Za-z0-9_-]{6,})[^\s<"\)]*'
-        )
-        
-        def _repl_combined(m):
-            # Extract the video ID from whichever group matched
-            vid = m.group('id') or m.group('id2') or m.group('id3')
-            iframe = f'<div class="w-full aspect-video mb-6"><iframe src="https://www.youtube.com/embed/{vid}" frameborder="0" allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" allowfullscreen></iframe></div>'
-            return iframe
-        
-        p = re.sub(combined_pattern, _repl_combined, p, flags=re.I)
-        parts[i] = p
-    return ''.join(parts)
+    return html_tokens.sub_text(html, _YOUTUBE_LINK_RE, _repl_combined)
 
 
 def _unwrap_iframe_from_links(html):
@@ -825,17 +844,17 @@ def api_translate(request):
 
         # Use only pre-translated content stored at save-time
         try:
-            stored = ArticleTranslation.objects.filter(article=article, lang=lang).first()
+            stored = ArticleTranslation.objects.filter(article=article, lang=lang).defer('segments').first()
         except Exception:
             stored = None
         if stored:
-            # Apply autoembed filter to convert plain YouTube URLs to iframes
-            content_with_embeds = autoembed(stored.content)
+            # Stored body with plain YouTube URLs converted to iframes
+            content_with_embeds = _rendered_body(stored)
             return JsonResponse({'title': stored.title, 'content': content_with_embeds, 'desc': stored.desc, 'lang': lang})
 
         if lang == 'id':
-            # Apply autoembed filter to original content
-            content_with_embeds = autoembed(article.content)
+            # Original body with embeds expanded
+            content_with_embeds = _rendered_body(article)
             return JsonResponse({'title': article.title, 'content': content_with_embeds, 'desc': Truncator(article.content).chars(150), 'lang': lang})
 
         return JsonResponse({'error': 'translation_not_ready', 'details': 'Translation not available. Save/publish the article to generate translations.'}, status=404)
@@ -848,13 +867,14 @@ def api_translate(request):
 
 
 @require_GET
+@conditional(etag_func=article_api_etag)
 def api_article_detail(request, slug):
     """Return a single published article by slug as JSON.
 
     URL: /api/article/<slug>/
     """
     try:
-        a = DashboardArticle.objects.get(slug=slug, status='published')
+        a = DashboardArticle.objects.select_related('category').get(slug=slug, status='published')
     except DashboardArticle.DoesNotExist:
         return JsonResponse({'error': 'not_found'}, status=404)
 
@@ -873,7 +893,7 @@ def api_article_detail(request, slug):
         # Provide plain-text content by default to avoid returning raw HTML.
         # Keep original HTML available in `content_html` for clients that need it.
         'content_html': a.content,
-        'content': re.sub(r'\s+', ' ', strip_tags(re.sub(r'^(?:\s*<(?:p|figure)[^>]*>\s*)?(?:<a[^>]*>\s*)?(?:<img[^>]*>)(?:\s*</a>)?(?:\s*</(?:p|figure)>)?', '', (a.content or ''), flags=re.I)).strip()),
+        'content': a.plain_content,
         'url': (request.build_absolute_uri(f'/article/{a.slug}/') if a.slug else None),
         'category': a.category.name if a.category else '',
         'img': img_url,
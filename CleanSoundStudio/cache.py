@@ -0,0 +1,249 @@
+"""
+Two-tier cache backend: a bounded in-process LRU (L1) in front of a cache
+shared by every worker (L2), e.g. the database or file-based backend.
+
+Keys are grouped into namespaces by prefix (``translation:``,
+``api_articles:``, ...). Each namespace picks its L2 cache alias, so a
+busy namespace gets its own table/directory and MAX_ENTRIES and cannot
+cull the others, and decides whether it may be served from L1 at all.
+
+L1 is a read-through copy: writes always go to L2 first, and L1 entries
+live at most ``l1_timeout`` seconds. Deletes and counter updates only
+reach the L1 of the worker doing them, so L1 should be enabled only for
+namespaces whose values never change under the same key (hash- or
+generation-addressed payloads). Everything else is read from L2 and is
+consistent across workers.
+
+Example::
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'CleanSoundStudio.cache.TwoTierCache',
+            'OPTIONS': {
+                'L2': 'shared',
+                'NAMESPACES': {
+                    'translation:': {'l2': 'translations', 'l1_max_entries': 2000},
+                    'api_articles:': {'l1_max_entries': 500},
+                },
+            },
+        },
+        'shared': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cs_cache'},
+        'translations': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cs_cache_translations'},
+    }
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+# L1 stores and counters are per process and shared by the per-thread
+# backend instances Django creates, keyed by (location, namespace).
+_stores = {}
+_stats = {}
+_lock = threading.Lock()
+
+_MISSING = object()
+
+STAT_FIELDS = ('l1_hits', 'l2_hits', 'misses', 'sets', 'deletes', 'l1_evictions')
+
+
+class Namespace:
+    def __init__(self, location, name, prefix, l2, l1=False, l1_max_entries=1000, l1_timeout=300):
+        self.name = name
+        self.prefix = prefix
+        self.l2_alias = l2
+        self.l1 = l1 and l1_max_entries > 0
+        self.l1_max_entries = l1_max_entries
+        self.l1_timeout = l1_timeout
+        with _lock:
+            self.store = _stores.setdefault((location, name), OrderedDict())
+            self.stats = _stats.setdefault((location, name), dict.fromkeys(STAT_FIELDS, 0))
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def count(self, field, n=1):
+        with _lock:
+            self.stats[field] += n
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        location = location or 'default'
+        options = params.get('OPTIONS', {})
+        default_l2 = options.get('L2', 'shared')
+
+        self._namespaces = []
+        for prefix, config in options.get('NAMESPACES', {}).items():
+            config = dict(config)
+            config.setdefault('l2', default_l2)
+            # L1 is opt-in through l1_max_entries unless disabled explicitly
+            config.setdefault('l1', 'l1_max_entries' in config)
+            name = config.pop('name', prefix.rstrip(':_') or prefix)
+            self._namespaces.append(Namespace(location, name, prefix, **config))
+        # longest prefix wins
+        self._namespaces.sort(key=lambda ns: len(ns.prefix), reverse=True)
+
+        default = dict(options.get('DEFAULT', {}))
+        default.setdefault('l2', default_l2)
+        self._default = Namespace(location, 'default', '', **default)
+
+    def _namespace(self, key):
+        for ns in self._namespaces:
+            if key.startswith(ns.prefix):
+                return ns
+        return self._default
+
+    # -- L1 ----------------------------------------------------------------
+
+    def _l1_ttl(self, ns, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = ns.l2.default_timeout
+        if timeout is None:
+            return ns.l1_timeout
+        return min(timeout, ns.l1_timeout)
+
+    def _l1_get(self, ns, l1_key):
+        with _lock:
+            entry = ns.store.get(l1_key)
+            if entry is None:
+                return _MISSING
+            expires, pickled = entry
+            if expires <= time.monotonic():
+                del ns.store[l1_key]
+                return _MISSING
+            ns.store.move_to_end(l1_key)
+        return pickle.loads(pickled)
+
+    def _l1_set(self, ns, l1_key, value, timeout):
+        ttl = self._l1_ttl(ns, timeout)
+        if ttl <= 0:
+            self._l1_discard(ns, l1_key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with _lock:
+            ns.store[l1_key] = (time.monotonic() + ttl, pickled)
+            ns.store.move_to_end(l1_key)
+            evicted = 0
+            while len(ns.store) > ns.l1_max_entries:
+                ns.store.popitem(last=False)
+                evicted += 1
+            ns.stats['l1_evictions'] += evicted
+
+    def _l1_discard(self, ns, l1_key):
+        if ns.l1:
+            with _lock:
+                ns.store.pop(l1_key, None)
+
+    # -- cache API ---------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        ns = self._namespace(key)
+        l1_key = self.make_and_validate_key(key, version=version)
+        if ns.l1:
+            value = self._l1_get(ns, l1_key)
+            if value is not _MISSING:
+                ns.count('l1_hits')
+                return value
+        value = ns.l2.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            ns.count('misses')
+            return default
+        ns.count('l2_hits')
+        if ns.l1:
+            self._l1_set(ns, l1_key, value, None)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        pending = {}
+        for key in keys:
+            ns = self._namespace(key)
+            if ns.l1:
+                value = self._l1_get(ns, self.make_and_validate_key(key, version=version))
+                if value is not _MISSING:
+                    ns.count('l1_hits')
+                    found[key] = value
+                    continue
+            pending.setdefault(ns.l2_alias, []).append((key, ns))
+        for alias, entries in pending.items():
+            values = caches[alias].get_many([key for key, _ in entries], version=version)
+            for key, ns in entries:
+                if key in values:
+                    ns.count('l2_hits')
+                    found[key] = values[key]
+                    if ns.l1:
+                        self._l1_set(ns, self.make_and_validate_key(key, version=version), values[key], None)
+                else:
+                    ns.count('misses')
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        ns = self._namespace(key)
+        l1_key = self.make_and_validate_key(key, version=version)
+        ns.l2.set(key, value, timeout, version=version)
+        ns.count('sets')
+        if ns.l1:
+            self._l1_set(ns, l1_key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        ns = self._namespace(key)
+        l1_key = self.make_and_validate_key(key, version=version)
+        added = ns.l2.add(key, value, timeout, version=version)
+        if added:
+            ns.count('sets')
+            if ns.l1:
+                self._l1_set(ns, l1_key, value, timeout)
+        else:
+            # another worker owns the key; do not trust a local copy of it
+            self._l1_discard(ns, l1_key)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        ns = self._namespace(key)
+        self._l1_discard(ns, self.make_and_validate_key(key, version=version))
+        return ns.l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        ns = self._namespace(key)
+        self._l1_discard(ns, self.make_and_validate_key(key, version=version))
+        ns.count('deletes')
+        return ns.l2.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        ns = self._namespace(key)
+        if ns.l1 and self._l1_get(ns, self.make_and_validate_key(key, version=version)) is not _MISSING:
+            return True
+        return ns.l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # not atomic on the database and file L2 backends (Django implements
+        # incr() there as get + set), so concurrent increments can be lost
+        ns = self._namespace(key)
+        self._l1_discard(ns, self.make_and_validate_key(key, version=version))
+        return ns.l2.incr(key, delta, version=version)
+
+    def clear(self):
+        aliases = {ns.l2_alias for ns in self._namespaces} | {self._default.l2_alias}
+        for ns in self._namespaces + [self._default]:
+            with _lock:
+                ns.store.clear()
+        for alias in aliases:
+            caches[alias].clear()
+
+    def stats(self):
+        """Per-namespace hit/miss counters of this process plus current L1 sizes."""
+        result = {}
+        for ns in self._namespaces + [self._default]:
+            with _lock:
+                entry = dict(ns.stats)
+                entry['l1_entries'] = len(ns.store)
+            entry['l2'] = ns.l2_alias
+            result[ns.name] = entry
+        return result
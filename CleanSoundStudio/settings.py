@@ -99,6 +99,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'Article.middleware.NgrokHostMiddleware',
+    # Opt-in per-view SQL query count / DB time recording (QUERY_STATS_ENABLED)
+    'Article.middleware.QueryStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'DashboardAdmin.security_middleware.SecurityHeadersMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -114,6 +116,29 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'CleanSoundStudio.urls'
 
+# Record query count and DB time per resolved view (see Article.middleware.QueryStatsMiddleware)
+QUERY_STATS_ENABLED = os.getenv('QUERY_STATS_ENABLED', 'False').lower() in ('true', '1', 'yes')
+
+# Mixed into every ETag of the article pages/APIs; set it per release (e.g. the
+# git SHA) so clients revalidating after a template change get a fresh body.
+ETAG_SALT = os.getenv('ETAG_SALT', '')
+
+# Static pre-rendered pages served by nginx before falling back to Django
+# (see Article/prerender.py and `manage.py prerender`). PRERENDER_BASE_URL is
+# the public site URL used for absolute links/og tags in the rendered pages;
+# publish hooks only run when PRERENDER_ENABLED is set and the URL is known.
+PRERENDER_ROOT = Path(os.getenv('PRERENDER_ROOT', BASE_DIR / 'prerendered'))
+PRERENDER_BASE_URL = os.getenv('PRERENDER_BASE_URL', '')
+PRERENDER_ENABLED = bool(PRERENDER_BASE_URL) and os.getenv('PRERENDER_ENABLED', 'False').lower() in ('true', '1', 'yes')
+
+# Translation worker: run independent steps of an article's language plan
+# (e.g. ja from the fresh en text while en is being stored) in parallel.
+TRANSLATION_PARALLEL_LANGS = os.getenv('TRANSLATION_PARALLEL_LANGS', 'True').lower() in ('true', '1', 'yes')
+
+# Stream the article page, flushing <head> (stylesheets, preloads) before the
+# body is rendered (see Article/streaming.py); off renders it in one piece.
+ARTICLE_STREAMING = os.getenv('ARTICLE_STREAMING', 'True').lower() in ('true', '1', 'yes')
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -154,6 +179,56 @@ DATABASES = {
 }
 
 
+# Cache
+# Every gunicorn worker keeps a small in-process LRU (L1) in front of a cache
+# shared by all workers (L2). The L2 is the database (run `createcachetable`)
+# or, with CACHE_L2_BACKEND=file, a directory under CACHE_DIR.
+# See CleanSoundStudio/cache.py for how namespaces are routed.
+
+CACHE_L2_BACKEND = os.getenv('CACHE_L2_BACKEND', 'db').lower()
+CACHE_DIR = Path(os.getenv('CACHE_DIR', BASE_DIR / 'cache'))
+
+
+def _l2_cache(name, max_entries):
+    if CACHE_L2_BACKEND == 'file':
+        backend, location = 'django.core.cache.backends.filebased.FileBasedCache', str(CACHE_DIR / name)
+    else:
+        backend, location = 'django.core.cache.backends.db.DatabaseCache', f'cs_cache_{name}'
+    return {
+        'BACKEND': backend,
+        'LOCATION': location,
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {'MAX_ENTRIES': max_entries, 'CULL_FREQUENCY': 4},
+    }
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'CleanSoundStudio.cache.TwoTierCache',
+        'OPTIONS': {
+            'L2': 'shared',
+            # Hash/generation-addressed values are served from L1. Version and
+            # generation keys get a 2s L1 window, which bounds how long another
+            # worker can miss a bump; rate-limit state always comes from L2.
+            'NAMESPACES': {
+                'translation:': {'l2': 'translations', 'l1_max_entries': 2000, 'l1_timeout': 60 * 60},
+                'api_articles:': {'l2': 'api', 'l1_max_entries': 500, 'l1_timeout': 60 * 10},
+                'api_feed:': {'l2': 'api', 'l1_max_entries': 100, 'l1_timeout': 60 * 10},
+                'api_gen:': {'l1_max_entries': 200, 'l1_timeout': 2},
+                'sitesetting:': {'l1_max_entries': 10, 'l1_timeout': 2},
+                'login_attempts_': {'l2': 'security'},
+                'blocked_': {'l2': 'security'},
+            },
+        },
+    },
+    # counters, version keys and anything without a namespace
+    'shared': _l2_cache('shared', 5000),
+    'translations': _l2_cache('translations', 50000),
+    'api': _l2_cache('api', 10000),
+    'security': _l2_cache('security', 10000),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -327,6 +402,11 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': False,
         },
+        'Article.querystats': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Article, ArticleTranslation
+from .models import Category, Article, ArticleTranslation, TranslationJob
 
 
 @admin.register(Category)
@@ -20,3 +20,10 @@ class ArticleTranslationAdmin(admin.ModelAdmin):
 	list_filter = ('lang', 'updated_at')
 	search_fields = ('article__article_id', 'article__title')
 	readonly_fields = ('source_hash', 'updated_at')
+
+
+@admin.register(TranslationJob)
+class TranslationJobAdmin(admin.ModelAdmin):
+	list_display = ('id', 'kind', 'object_id', 'status', 'attempts', 'run_after', 'lease_owner', 'updated_at')
+	list_filter = ('status', 'kind')
+	readonly_fields = ('source_hash', 'lease_owner', 'lease_expires_at', 'last_error', 'created_at', 'updated_at', 'finished_at')
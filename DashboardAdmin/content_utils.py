@@ -0,0 +1,57 @@
+"""
+Helpers that derive listing/card fields and the rendered body from article HTML.
+
+These run when an Article or ArticleTranslation is saved so the public
+views can serve the stored values instead of reprocessing the full body.
+"""
+import hashlib
+import re
+
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from Article.html_tokens import text_content
+
+
+# A leading <p> or <figure> that contains an <img> (optionally wrapped in <a>)
+LEADING_IMAGE_RE = re.compile(
+    r'^(?:\s*<(?:p|figure)[^>]*>\s*)?(?:<a[^>]*>\s*)?(?:<img[^>]*>)(?:\s*</a>)?(?:\s*</(?:p|figure)>)?',
+    flags=re.I,
+)
+WHITESPACE_RE = re.compile(r'\s+')
+
+SHORT_DESC_LENGTH = 150
+
+
+def strip_leading_image(html):
+    return LEADING_IMAGE_RE.sub('', html or '', count=1)
+
+
+def listing_fields(html):
+    """Return (short_desc, desc_html, plain_content) for an article body."""
+    # imported lazily: templatetags are loaded after the app registry
+    from Article.templatetags.embed_filters import format_youtube_desc
+
+    raw_no_leading_img = strip_leading_image(html)
+    # strip remaining HTML tags and collapse whitespace
+    plain = WHITESPACE_RE.sub(' ', text_content(raw_no_leading_img).strip())
+    short_desc = Truncator(plain).chars(SHORT_DESC_LENGTH)
+    # HTML-friendly snippet that preserves links and converts newlines to <p>/<br>
+    try:
+        desc_html = format_youtube_desc(raw_no_leading_img) or ''
+    except Exception:
+        # fallback: escape and convert newlines
+        desc_html = mark_safe(escape(raw_no_leading_img).replace('\n', '<br>'))
+    return short_desc, str(desc_html), plain
+
+
+def content_hash(html):
+    return hashlib.sha256((html or '').encode('utf-8')).hexdigest()
+
+
+def render_body(html):
+    """Return (rendered_html, content_hash) with YouTube URLs expanded to embeds."""
+    from Article.templatetags.embed_filters import autoembed
+
+    return str(autoembed(html) or ''), content_hash(html)
@@ -0,0 +1,158 @@
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from Article import translation_client
+from DashboardAdmin.models import ArticleTranslation
+from DashboardAdmin.translation_jobs import _InlineExecutor, find_stale_articles, translate_article
+
+
+DEFAULT_CHECKPOINT = 'translate_backfill.checkpoint.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Translate published articles whose id/en/ja translations are missing or stale, '
+        'in parallel and resumable (progress is checkpointed)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Articles translated in parallel (default 2)')
+        parser.add_argument('--slug', action='append', default=[], help='Only this article (repeatable)')
+        parser.add_argument('--limit', type=int, help='Stop after this many articles')
+        parser.add_argument('--force', action='store_true', help='Retranslate up-to-date articles too, without reusing stored segments')
+        parser.add_argument('--dry-run', action='store_true', help='Only list stale articles and the estimated character count')
+        parser.add_argument('--checkpoint', help=f'Progress file (default logs/{DEFAULT_CHECKPOINT})')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+
+    def handle(self, *args, **options):
+        checkpoint_path = Path(options['checkpoint'] or settings.BASE_DIR / 'logs' / DEFAULT_CHECKPOINT)
+        checkpoint = {} if options['restart'] else self._load(checkpoint_path)
+        done_ids = set(checkpoint.get('done', []))
+        if done_ids:
+            self.stdout.write(f'Resuming: {len(done_ids)} articles already done in a previous run ({checkpoint_path})')
+
+        todo = []
+        total_chars = 0
+        for article, stale, chars in find_stale_articles(options['slug'] or None, force=options['force']):
+            if article.pk in done_ids:
+                continue
+            todo.append((article.pk, article.slug, chars))
+            total_chars += chars
+            if options['limit'] and len(todo) >= options['limit']:
+                break
+
+        self.stdout.write(f'{len(todo)} articles to translate, ~{total_chars:,} characters for the provider')
+        if options['dry_run']:
+            for _, slug, chars in todo:
+                self.stdout.write(f'  {slug} (~{chars:,} chars)')
+            return
+        if not todo:
+            self._remove(checkpoint_path)
+            self.stdout.write(self.style.SUCCESS('Nothing to do.'))
+            return
+
+        workers = max(1, options['workers'])
+        translation_client.configure(pool_size=workers * translation_client.BATCH_PARALLELISM)
+        stopping = threading.Event()
+
+        def _stop(signum, frame):
+            self.stdout.write('Stopping after running articles finish (progress is saved)...')
+            stopping.set()
+
+        previous_handlers = {sig: signal.signal(sig, _stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            self._backfill(todo, workers, options['force'], stopping, checkpoint_path, {
+                'done': sorted(done_ids), 'failed': checkpoint.get('failed', {}),
+            })
+        finally:
+            for sig, handler in previous_handlers.items():
+                signal.signal(sig, handler)
+
+    def _backfill(self, todo, workers, force, stopping, checkpoint_path, checkpoint):
+        client = translation_client.get_client()
+
+        def _run(article_id):
+            try:
+                if force:
+                    ArticleTranslation.objects.filter(article_id=article_id).update(source_hash='', segments={})
+                translate_article(article_id, '')
+            finally:
+                if workers > 1:
+                    # pool threads own their DB connections
+                    connections.close_all()
+
+        started = time.monotonic()
+        finished = failed = chars_done = 0
+        queue = list(reversed(todo))
+        running = {}
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='translate-backfill') if workers > 1 else _InlineExecutor()
+        with executor as pool:
+            while running or (queue and not stopping.is_set()):
+                while queue and len(running) < workers and not stopping.is_set():
+                    article_id, slug, chars = queue.pop()
+                    running[pool.submit(_run, article_id)] = (article_id, slug, chars)
+                completed, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    article_id, slug, chars = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failed += 1
+                        checkpoint['failed'][str(article_id)] = str(e)[:500]
+                        self.stderr.write(f'  {slug}: {e}')
+                    else:
+                        finished += 1
+                        chars_done += chars
+                        checkpoint['done'].append(article_id)
+                        checkpoint['failed'].pop(str(article_id), None)
+                    elapsed = max(time.monotonic() - started, 0.001)
+                    self.stdout.write(
+                        f'[{finished + failed}/{len(todo)}] {slug} '
+                        f'({finished * 60 / elapsed:.1f} articles/min, {chars_done / elapsed:,.0f} chars/s)'
+                    )
+                self._save(checkpoint_path, checkpoint)
+
+        elapsed = time.monotonic() - started
+        stats = client.stats()
+        self.stdout.write(
+            f'Translated {finished} articles ({chars_done:,} chars) in {elapsed:.1f}s, {failed} failed; '
+            f"provider: {stats['requests']} requests, {stats['segments']} segments, avg {stats['avg_ms']} ms"
+        )
+        if queue or failed:
+            self.stdout.write(f'Run again to resume; progress is in {checkpoint_path}')
+        else:
+            self._remove(checkpoint_path)
+            self.stdout.write(self.style.SUCCESS('Backfill complete.'))
+
+    def _load(self, path):
+        try:
+            with open(path) as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            self.stderr.write(f'Ignoring unreadable checkpoint {path}')
+            return {}
+
+    def _save(self, path, checkpoint):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        with os.fdopen(fd, 'w') as fh:
+            json.dump(checkpoint, fh)
+        os.replace(tmp, path)
+
+    def _remove(self, path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
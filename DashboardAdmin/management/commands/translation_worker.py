@@ -0,0 +1,104 @@
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from Article import translation_client, translation_memory
+from DashboardAdmin.translation_jobs import DEFAULT_LEASE_SECONDS, claim_jobs, publish_worker_state, renew_leases, run_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued translation jobs (run one or more of these next to the web workers)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2, help='Jobs processed in parallel by this worker (default 2)')
+        parser.add_argument('--lease', type=int, default=DEFAULT_LEASE_SECONDS, help='Seconds a claimed job stays leased before another worker may take it over')
+        parser.add_argument('--poll-interval', type=float, default=5.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit when no job is due instead of polling')
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        stopping = threading.Event()
+        slots = threading.Semaphore(concurrency)
+        # one keep-alive connection per batch that can be in flight
+        client = translation_client.configure(pool_size=concurrency * translation_client.BATCH_PARALLELISM)
+
+        def _stop(signum, frame):
+            self.stdout.write('Stopping after running jobs finish...')
+            stopping.set()
+
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+
+        held = set()
+        held_lock = threading.Lock()
+        heartbeat_stop = threading.Event()
+
+        def _heartbeat():
+            # renew well before expiry so a slow job (provider backoff, en then ja) keeps its lease
+            while not heartbeat_stop.wait(max(1, options['lease'] / 3)):
+                with held_lock:
+                    job_ids = list(held)
+                try:
+                    renew_leases(job_ids, owner, options['lease'])
+                except Exception as e:
+                    self.stderr.write(f'Failed to renew leases: {e}')
+                finally:
+                    close_old_connections()
+
+        def _run(job):
+            close_old_connections()
+            with held_lock:
+                held.add(job.pk)
+            try:
+                ok = run_job(job, owner, lease_seconds=options['lease'])
+                self.stdout.write(f"job {job.pk} {job.kind}:{job.object_id} {'done' if ok else 'failed'} (attempt {job.attempts})")
+            finally:
+                with held_lock:
+                    held.discard(job.pk)
+                close_old_connections()
+                slots.release()
+
+        heartbeat = threading.Thread(target=_heartbeat, daemon=True, name='translation-lease-heartbeat')
+        heartbeat.start()
+
+        self.stdout.write(f'Translation worker {owner} started (concurrency={concurrency})')
+        published_at = 0
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='translation-job') as pool:
+            while not stopping.is_set():
+                if time.monotonic() - published_at > 10:
+                    publish_worker_state(owner, client.stats())
+                    published_at = time.monotonic()
+                # don't lease jobs that would only fail fast while the provider is down
+                if client.limiter.is_open():
+                    stopping.wait(min(client.limiter.retry_after(), options['poll_interval']))
+                    continue
+                # wait for a free slot so jobs are only leased when they can start
+                slots.acquire()
+                try:
+                    jobs = claim_jobs(owner, limit=1, lease_seconds=options['lease'])
+                except Exception as e:
+                    slots.release()
+                    self.stderr.write(f'Failed to claim jobs: {e}')
+                    close_old_connections()
+                    stopping.wait(options['poll_interval'])
+                    continue
+                if not jobs:
+                    slots.release()
+                    if options['once']:
+                        break
+                    stopping.wait(options['poll_interval'])
+                    continue
+                pool.submit(_run, jobs[0])
+        heartbeat_stop.set()
+        heartbeat.join()
+        translation_memory.flush_hits()
+        publish_worker_state(owner, None)
+        self.stdout.write(f'Translation worker stopped. Provider: {client.stats()}')
@@ -0,0 +1,130 @@
+import re
+
+from django.db import migrations, models
+from django.utils.html import escape, strip_tags
+from django.utils.text import Truncator
+
+
+# Frozen copy of DashboardAdmin.content_utils.listing_fields and the
+# format_youtube_desc filter as they were when this migration was written,
+# so later changes to the app code don't change what the backfill produces.
+LEADING_IMAGE_RE = re.compile(
+    r'^(?:\s*<(?:p|figure)[^>]*>\s*)?(?:<a[^>]*>\s*)?(?:<img[^>]*>)(?:\s*</a>)?(?:\s*</(?:p|figure)>)?',
+    flags=re.I,
+)
+WHITESPACE_RE = re.compile(r'\s+')
+ANCHOR_RE = re.compile(r'<a\b[^>]*>.*?<\/a>', flags=re.I | re.S)
+LINK_RE = re.compile(r'(https?://[^\s<>]+|www\.[^\s<>]+|[\w.+-]+@[\w.-]+\.[A-Za-z]{2,})')
+SHORT_DESC_LENGTH = 150
+
+
+def _anchor_html(href, inner):
+    return f'<a href="{escape(href)}" target="_blank" rel="noopener noreferrer">{escape(inner)}</a>'
+
+
+def format_youtube_desc(value):
+    if not value:
+        return value
+    text = str(value).replace('\u00A0', ' ').replace('&nbsp;', ' ')
+
+    anchors = []
+
+    def _anchor_repl(m):
+        full = m.group(0)
+        href_m = re.search(r'href\s*=\s*["\']([^"\']+)["\']', full, flags=re.I)
+        href = href_m.group(1) if href_m else ''
+        if not re.match(r'^(https?:|mailto:)', href, flags=re.I):
+            return escape(full)
+        anchors.append((href, re.sub(r'^<a[^>]*>|</a>$', '', full, flags=re.I | re.S)))
+        return f'__ANCHOR_{len(anchors) - 1}__'
+
+    text = ANCHOR_RE.sub(_anchor_repl, text)
+
+    links = []
+
+    def _link_repl(m):
+        full = m.group(0)
+        if re.match(r'^[\w.+-]+@[\w.-]+\.[A-Za-z]{2,}$', full):
+            href = f'mailto:{full}'
+        else:
+            href = full if re.match(r'^https?://', full, flags=re.I) else f'http://{full}'
+        links.append((href, full))
+        return f'__LINK_{len(links) - 1}__'
+
+    text = LINK_RE.sub(_link_repl, text)
+    text = re.sub(r'\s*/\s*', '\n', text)
+    text = re.sub(r'\r\n|\r', '\n', text)
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r'\n{3,}', '\n\n', text).strip()
+
+    esc = escape(text)
+    paragraphs = [p.strip() for p in esc.split('\n\n') if p.strip()]
+    if paragraphs:
+        html = '\n'.join(f"<p>{p.replace(chr(10), '<br>')}</p>" for p in paragraphs)
+    else:
+        html = esc.replace('\n', '<br>')
+    for idx, (href, inner) in enumerate(anchors):
+        html = html.replace(f'__ANCHOR_{idx}__', _anchor_html(href, inner))
+    for idx, (href, inner) in enumerate(links):
+        html = html.replace(f'__LINK_{idx}__', _anchor_html(href, inner))
+    return html
+
+
+def listing_fields(html):
+    raw_no_leading_img = LEADING_IMAGE_RE.sub('', html or '', count=1)
+    plain = WHITESPACE_RE.sub(' ', strip_tags(raw_no_leading_img).strip())
+    short_desc = Truncator(plain).chars(SHORT_DESC_LENGTH)
+    try:
+        desc_html = format_youtube_desc(raw_no_leading_img) or ''
+    except Exception:
+        desc_html = escape(raw_no_leading_img).replace('\n', '<br>')
+    return short_desc, str(desc_html), plain
+
+
+def backfill_listing_fields(apps, schema_editor):
+    for model_name in ('Article', 'ArticleTranslation'):
+        Model = apps.get_model('DashboardAdmin', model_name)
+        for pk, content in Model.objects.values_list('pk', 'content').iterator():
+            short_desc, desc_html, plain = listing_fields(content)
+            Model.objects.filter(pk=pk).update(short_desc=short_desc, desc_html=desc_html, plain_content=plain)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DashboardAdmin', '0014_sitesettingtranslation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='short_desc',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='desc_html',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='plain_content',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='articletranslation',
+            name='short_desc',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='articletranslation',
+            name='desc_html',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='articletranslation',
+            name='plain_content',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(backfill_listing_fields, migrations.RunPython.noop),
+    ]
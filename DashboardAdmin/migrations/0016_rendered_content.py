@@ -0,0 +1,80 @@
+import hashlib
+import re
+
+from django.db import migrations, models
+
+
+# Frozen copy of DashboardAdmin.content_utils.render_body and the autoembed
+# filter as they were when this migration was written, so later changes to
+# the app code don't change what the backfill produces.
+YOUTUBE_URL_RE = re.compile(
+    r'(?:https?://)?(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/)([A-Za-z0-9_-]{6,})(?:[^\s<>"]*)?',
+    re.IGNORECASE,
+)
+
+
+def _embed(match):
+    vid = match.group(1)
+    return (
+        f'<div class="w-full mb-6" style="position:relative;padding-bottom:56.25%;height:0;overflow:hidden;">'
+        f'<iframe src="https://www.youtube-nocookie.com/embed/{vid}" '
+        f'style="position:absolute;top:0;left:0;width:100%;height:100%;" '
+        f'title="YouTube video player" frameborder="0" '
+        f'allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture; web-share" '
+        f'referrerpolicy="strict-origin-when-cross-origin" '
+        f'allowfullscreen></iframe></div>'
+    )
+
+
+def autoembed(value):
+    if not value:
+        return value
+    text = str(value).replace('\\r\\n', '\n').replace('\\n', '\n')
+    parts = re.split(r'(<[^>]+>)', text)
+    for i, part in enumerate(parts):
+        if not part.startswith('<'):
+            parts[i] = YOUTUBE_URL_RE.sub(_embed, part)
+    return ''.join(parts)
+
+
+def render_body(html):
+    return str(autoembed(html) or ''), hashlib.sha256((html or '').encode('utf-8')).hexdigest()
+
+
+def backfill_rendered_content(apps, schema_editor):
+    for model_name in ('Article', 'ArticleTranslation'):
+        Model = apps.get_model('DashboardAdmin', model_name)
+        for pk, content in Model.objects.values_list('pk', 'content').iterator():
+            rendered, digest = render_body(content)
+            Model.objects.filter(pk=pk).update(rendered_content=rendered, rendered_hash=digest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DashboardAdmin', '0015_listing_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='rendered_content',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='rendered_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='articletranslation',
+            name='rendered_content',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='articletranslation',
+            name='rendered_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.RunPython(backfill_rendered_content, migrations.RunPython.noop),
+    ]
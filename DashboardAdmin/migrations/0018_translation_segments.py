@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DashboardAdmin', '0017_translationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articletranslation',
+            name='segments',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DashboardAdmin', '0018_translation_segments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationMemory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('segment_hash', models.CharField(max_length=64)),
+                ('source_lang', models.CharField(max_length=8)),
+                ('target_lang', models.CharField(max_length=8)),
+                ('translated', models.TextField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_used_at'], name='translationmemory_used_idx')],
+                'constraints': [models.UniqueConstraint(fields=('segment_hash', 'source_lang', 'target_lang'), name='unique_translation_memory_segment')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DashboardAdmin', '0019_translationmemory'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='translationjob',
+            name='kind',
+            field=models.CharField(choices=[('article', 'Article'), ('sitesetting', 'Site setting'), ('prerender_site', 'Pre-render site'), ('prerender_category', 'Pre-render category')], max_length=20),
+        ),
+    ]
@@ -1,11 +1,30 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.text import slugify
 
 import itertools
 
+from .content_utils import listing_fields, render_body
+
 User = get_user_model()
 
+DERIVED_FIELDS = ('short_desc', 'desc_html', 'plain_content', 'rendered_content', 'rendered_hash')
+
+
+def _refresh_derived_fields(instance, save_kwargs):
+	"""Recompute listing fields and the rendered body before `instance` is written.
+
+	Partial saves that do not touch `content` keep the stored values.
+	"""
+	update_fields = save_kwargs.get('update_fields')
+	if update_fields is not None:
+		if 'content' not in update_fields:
+			return
+		save_kwargs['update_fields'] = list(update_fields) + [f for f in DERIVED_FIELDS if f not in update_fields]
+	instance.short_desc, instance.desc_html, instance.plain_content = listing_fields(instance.content)
+	instance.rendered_content, instance.rendered_hash = render_body(instance.content)
+
 
 class Category(models.Model):
 	name = models.CharField(max_length=100)
@@ -32,6 +51,13 @@ class Article(models.Model):
 	admin = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
 	# allow pinning one article per category (only one article with is_pinned=True per category)
 	is_pinned = models.BooleanField(default=False)
+	# Listing/card fields derived from `content` on save (see content_utils.listing_fields)
+	short_desc = models.TextField(blank=True, default='')
+	desc_html = models.TextField(blank=True, default='')
+	plain_content = models.TextField(blank=True, default='')
+	# `content` with embeds expanded (autoembed), valid while rendered_hash matches
+	rendered_content = models.TextField(blank=True, default='')
+	rendered_hash = models.CharField(max_length=64, blank=True, default='')
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
 
@@ -39,6 +65,7 @@ class Article(models.Model):
 		return f"{self.article_id} - {self.title}"
 
 	def save(self, *args, **kwargs):
+		_refresh_derived_fields(self, kwargs)
 		# generate unique slug from title if not present
 		if not self.slug:
 			base = slugify(self.title)[:200]
@@ -72,7 +99,17 @@ class ArticleTranslation(models.Model):
 	title = models.CharField(max_length=500)
 	content = models.TextField()
 	desc = models.TextField(blank=True, default='')
+	# Listing/card fields derived from `content` on save
+	short_desc = models.TextField(blank=True, default='')
+	desc_html = models.TextField(blank=True, default='')
+	plain_content = models.TextField(blank=True, default='')
+	# `content` with embeds expanded (autoembed), valid while rendered_hash matches
+	rendered_content = models.TextField(blank=True, default='')
+	rendered_hash = models.CharField(max_length=64, blank=True, default='')
 	source_hash = models.CharField(max_length=64, blank=True, default='')
+	# Provider output per source segment ({segment hash: translated text}),
+	# reused when the article is re-saved so only edited segments are retranslated
+	segments = models.JSONField(default=dict, blank=True, editable=False)
 	updated_at = models.DateTimeField(auto_now=True)
 
 	class Meta:
@@ -80,6 +117,10 @@ class ArticleTranslation(models.Model):
 			models.UniqueConstraint(fields=['article', 'lang'], name='unique_article_lang')
 		]
 
+	def save(self, *args, **kwargs):
+		_refresh_derived_fields(self, kwargs)
+		super().save(*args, **kwargs)
+
 	def __str__(self):
 		try:
 			return f"{self.article.article_id} - {self.lang}"
@@ -147,4 +188,87 @@ class SiteSettingTranslation(models.Model):
 		]
 
 	def __str__(self):
-		return f"SiteSetting - {self.lang}"
\ No newline at end of file
+		return f"SiteSetting - {self.lang}"
+
+class TranslationJob(models.Model):
+	"""Durable unit of background work, processed by `manage.py translation_worker`.
+
+	Translations, plus the site-wide and per-category pre-render passes
+	that would otherwise tie up a web worker. Workers claim jobs by taking
+	a time-limited lease; a job whose lease expired (worker crashed or was
+	recycled) becomes claimable again.
+	"""
+	KIND_ARTICLE = 'article'
+	KIND_SITESETTING = 'sitesetting'
+	KIND_PRERENDER_SITE = 'prerender_site'
+	KIND_PRERENDER_CATEGORY = 'prerender_category'
+	KIND_CHOICES = [
+		(KIND_ARTICLE, 'Article'),
+		(KIND_SITESETTING, 'Site setting'),
+		(KIND_PRERENDER_SITE, 'Pre-render site'),
+		(KIND_PRERENDER_CATEGORY, 'Pre-render category'),
+	]
+
+	STATUS_PENDING = 'pending'
+	STATUS_RUNNING = 'running'
+	STATUS_DONE = 'done'
+	STATUS_FAILED = 'failed'
+	STATUS_CHOICES = [
+		(STATUS_PENDING, 'Pending'),
+		(STATUS_RUNNING, 'Running'),
+		(STATUS_DONE, 'Done'),
+		(STATUS_FAILED, 'Failed'),
+	]
+
+	kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+	object_id = models.PositiveIntegerField()
+	# hash of the source text at enqueue time; the worker skips up-to-date translations
+	source_hash = models.CharField(max_length=64, blank=True, default='')
+	status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+	attempts = models.PositiveIntegerField(default=0)
+	max_attempts = models.PositiveIntegerField(default=5)
+	# not claimable before this time (retry backoff)
+	run_after = models.DateTimeField(default=timezone.now)
+	lease_owner = models.CharField(max_length=100, blank=True, default='')
+	lease_expires_at = models.DateTimeField(null=True, blank=True)
+	last_error = models.TextField(blank=True, default='')
+	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
+	finished_at = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		ordering = ['run_after', 'id']
+		indexes = [
+			models.Index(fields=['status', 'run_after'], name='translationjob_claim_idx'),
+			models.Index(fields=['kind', 'object_id', 'status'], name='translationjob_object_idx'),
+		]
+
+	def __str__(self):
+		return f"{self.kind}:{self.object_id} ({self.status})"
+
+
+class TranslationMemory(models.Model):
+	"""Provider output per source segment, shared by all workers and kept across deploys.
+
+	Looked up before any provider call (see Article/translation_memory.py)
+	and pruned by `manage.py prune_translation_memory`.
+	"""
+	# sha256 of the source segment
+	segment_hash = models.CharField(max_length=64)
+	source_lang = models.CharField(max_length=8)
+	target_lang = models.CharField(max_length=8)
+	translated = models.TextField()
+	hits = models.PositiveIntegerField(default=0)
+	created_at = models.DateTimeField(auto_now_add=True)
+	last_used_at = models.DateTimeField(default=timezone.now)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=['segment_hash', 'source_lang', 'target_lang'], name='unique_translation_memory_segment')
+		]
+		indexes = [
+			models.Index(fields=['last_used_at'], name='translationmemory_used_idx'),
+		]
+
+	def __str__(self):
+		return f"{self.source_lang}->{self.target_lang} {self.segment_hash[:12]} ({self.hits} hits)"
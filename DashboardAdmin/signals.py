@@ -1,239 +1,202 @@
-import hashlib
 import logging
-import threading
-import re
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
-from django.utils.html import strip_tags
-from django.utils.text import Truncator
 from django.db import transaction, close_old_connections
+from django.conf import settings
 
-from DashboardAdmin.models import Article, ArticleTranslation, SiteSetting, SiteSettingTranslation
+from DashboardAdmin.models import Article, ArticleTranslation, Category, SiteSetting, SiteSettingTranslation, TranslationJob
+from DashboardAdmin.translation_jobs import _prerender_articles, _source_hash, _sitesetting_source_hash, enqueue as enqueue_job
+from Article.cache_utils import bump_category_generation
+from DashboardAdmin.site_settings import bump_version as bump_site_settings_version
 
 
 logger = logging.getLogger(__name__)
 
 
-def _source_hash(title, content):
-    base = f"{title or ''}\n{content or ''}"
-    return hashlib.sha256(base.encode('utf-8')).hexdigest()
+def _category_name(category_id):
+    if not category_id:
+        return None
+    try:
+        return Category.objects.filter(pk=category_id).values_list('name', flat=True).first()
+    except Exception:
+        return None
 
 
-@receiver(post_save, sender=Article)
-def translate_article_on_save(sender, instance, **kwargs):
-    logger.info(f'Signal triggered for article={instance.pk}, status={instance.status}')
-    # Only translate published articles
-    if instance.status != 'published':
-        logger.info(f'Skipping translation - article not published')
+def _bump_generations_on_commit(names):
+    """Invalidate the cached listings of `names` once the transaction commits.
+
+    Bumping inside the transaction lets a concurrent request cache the old
+    rows under the new generation before the write becomes visible. Names
+    are resolved now, while a deleted category can still be looked up.
+    """
+    names = {name for name in names if name}
+    if not names:
         return
 
-    source_hash = _source_hash(instance.title, instance.content)
-    logger.info(f'Starting translation for article={instance.pk}, hash={source_hash[:8]}')
+    def _bump():
+        for name in names:
+            bump_category_generation(name)
 
-    def _run_translation(article_id, source_hash_value):
-        close_old_connections()
-        try:
-            from Article.views import (
-                _translate_text_via_provider,
-                _translate_html_preserve_tags,
-            )
-        except Exception:
-            logger.exception('Failed to import translation helpers')
-            return
+    transaction.on_commit(_bump)
 
+
+@receiver(pre_save, sender=Article)
+def remember_previous_category(sender, instance, **kwargs):
+    """Keep the stored category and slug so a move or rename invalidates the old listing and pages too."""
+    instance._previous_category_id = None
+    instance._previous_slug = None
+    if instance.pk:
         try:
-            article = Article.objects.get(pk=article_id)
+            previous = Article.objects.filter(pk=instance.pk).values_list('category_id', 'slug').first()
+            if previous:
+                instance._previous_category_id, instance._previous_slug = previous
         except Exception:
-            return
-
-        if article.status != 'published':
-            return
-
-        plain = strip_tags(article.content or '')
-        base_desc = Truncator(plain).chars(150)
-
-        for lang in ['id', 'en', 'ja']:
-            try:
-                existing = ArticleTranslation.objects.filter(article=article, lang=lang).first()
-                if existing and existing.source_hash == source_hash_value:
-                    continue
-
-                if lang == 'id':
-                    # Indonesian: use original content directly without any modification
-                    title_t = article.title
-                    content_t = article.content
-                    desc_t = base_desc
-                else:
-                    # For English and Japanese: translate with split to preserve special patterns
-                    # Split title to preserve quoted text and special patterns
-                    title_parts = _split_text_and_preserve(article.title)
-                    title_t = _translate_parts(title_parts, lang, _translate_text_via_provider)
-                    
-                    # Translate HTML content (shielding is done internally)
-                    content_t = _translate_html_preserve_tags(article.content, lang)
-                    
-                    logger.info(f'Translation {lang}: {content_t.count("<iframe")} iframes found')
-                    
-                    desc_t = _translate_text_via_provider(base_desc, lang)
-
-                if existing:
-                    existing.title = title_t
-                    existing.content = content_t
-                    existing.desc = desc_t
-                    existing.source_hash = source_hash_value
-                    existing.save(update_fields=['title', 'content', 'desc', 'source_hash', 'updated_at'])
-                else:
-                    ArticleTranslation.objects.create(
-                        article=article,
-                        lang=lang,
-                        title=title_t,
-                        content=content_t,
-                        desc=desc_t,
-                        source_hash=source_hash_value,
-                    )
-                logger.info(f'Translation saved for {lang} article={article.pk}')
-            except Exception:
-                logger.exception('Translation failed for lang=%s article=%s', lang, article.pk)
+            pass
 
-        close_old_connections()
 
-        close_old_connections()
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def invalidate_article_api_cache(sender, instance, **kwargs):
+    category_ids = {instance.category_id, getattr(instance, '_previous_category_id', None)}
+    _bump_generations_on_commit(_category_name(category_id) for category_id in category_ids)
 
-    def _start_background():
-        t = threading.Thread(
-            target=_run_translation,
-            args=(instance.pk, source_hash),
-            daemon=True,
-            name=f"translate-article-{instance.pk}",
-        )
-        t.start()
 
-    transaction.on_commit(_start_background)
+@receiver(post_save, sender=ArticleTranslation)
+@receiver(post_delete, sender=ArticleTranslation)
+def invalidate_translation_api_cache(sender, instance, **kwargs):
+    try:
+        category_id = Article.objects.filter(pk=instance.article_id).values_list('category_id', flat=True).first()
+    except Exception:
+        category_id = None
+    _bump_generations_on_commit([_category_name(category_id)])
 
-def _sitesetting_source_hash(youtube_desc):
-    """Generate hash of youtube_desc for change detection."""
-    return hashlib.sha256((youtube_desc or '').encode('utf-8')).hexdigest()
 
+@receiver(pre_save, sender=Category)
+def remember_previous_category_name(sender, instance, **kwargs):
+    instance._previous_name = _category_name(instance.pk) if instance.pk else None
 
-def _split_text_and_preserve(text):
-    """Split text into parts: (is_preserved, content).
-    
-    Preserved parts are URLs, emails, phones, and newlines.
-    Non-preserved parts are regular text that needs translation.
-    """
-    if not text:
-        return []
-    
-    parts = []
-    # Pattern: URLs, emails (strict - must have alphanumeric before @), phones, newlines
-    # Email: alphanumeric.dash_percent before @, then domain.domain2.tld
-    pattern = r'(https?://[^\s\n]+|[a-zA-Z0-9][a-zA-Z0-9._%+-]*@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}|\+?\d[\d\s\-()]{6,}\d|\n\s*\n|\n)'
-    last_end = 0
-    
-    for match in re.finditer(pattern, text):
-        # Add text before this match (if any)
-        if match.start() > last_end:
-            parts.append((False, text[last_end:match.start()]))
-        # Add the preserved part
-        parts.append((True, match.group(0)))
-        last_end = match.end()
-    
-    # Add remaining text
-    if last_end < len(text):
-        parts.append((False, text[last_end:]))
-    
-    return parts
-
-
-def _translate_parts(parts, target_lang, translate_fn):
-    """Translate only non-preserved parts, keep preserved parts unchanged."""
-    result = []
-    
-    for is_preserved, content in parts:
-        if is_preserved:
-            # Keep as-is
-            result.append(content)
-        else:
-            # Translate
-            try:
-                translated = translate_fn(content, target_lang)
-                result.append(translated)
-            except Exception as e:
-                logger.warning(f'Translation failed for part, keeping original: {e}')
-                result.append(content)
-    
-    return ''.join(result)
 
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_api_cache(sender, instance, **kwargs):
+    _bump_generations_on_commit([instance.name, getattr(instance, '_previous_name', None)])
 
 
 @receiver(post_save, sender=SiteSetting)
-def translate_sitesetting_youtube_desc_on_save(sender, instance, **kwargs):
-    """Translate YouTube description when SiteSetting is saved."""
-    
-    # Only proceed if youtube_desc is not empty
-    if not instance.youtube_desc or not instance.youtube_desc.strip():
+@receiver(post_delete, sender=SiteSetting)
+@receiver(post_save, sender=SiteSettingTranslation)
+@receiver(post_delete, sender=SiteSettingTranslation)
+def invalidate_site_snapshot(sender, instance, **kwargs):
+    bump_site_settings_version()
+
+
+def _prerender_on_commit(name, func):
+    """Run a pre-render step after the transaction commits; never raise into the save."""
+    if not getattr(settings, 'PRERENDER_ENABLED', False):
         return
-    
-    source_hash = _sitesetting_source_hash(instance.youtube_desc)
 
-    def _run_translation(setting_id, source_hash_value):
+    def _run():
         close_old_connections()
         try:
-            from Article.views import _translate_text_via_provider
+            func()
         except Exception:
-            logger.exception('Failed to import translation helpers')
-            return
+            logger.exception('Pre-render step %s failed', name)
 
-        try:
-            setting = SiteSetting.objects.get(pk=setting_id)
-        except Exception:
-            return
-
-        # Check if we still have youtube_desc to translate
-        if not setting.youtube_desc or not setting.youtube_desc.strip():
-            return
-
-        for lang in ['id', 'en', 'ja']:
-            try:
-                existing = SiteSettingTranslation.objects.filter(setting=setting, lang=lang).first()
-                
-                # Skip if unchanged (hash matches)
-                if existing and existing.source_hash == source_hash_value:
-                    continue
-
-                if lang == 'id':
-                    # Indonesian: use original content directly
-                    desc_t = setting.youtube_desc
-                else:
-                    # For English and Japanese: split text and URLs, translate only text
-                    parts = _split_text_and_preserve(setting.youtube_desc)
-                    desc_t = _translate_parts(parts, lang, _translate_text_via_provider)
-
-                if existing:
-                    existing.youtube_desc = desc_t
-                    existing.source_hash = source_hash_value
-                    existing.save(update_fields=['youtube_desc', 'source_hash', 'updated_at'])
-                else:
-                    SiteSettingTranslation.objects.create(
-                        setting=setting,
-                        lang=lang,
-                        youtube_desc=desc_t,
-                        source_hash=source_hash_value,
-                    )
-                logger.info(f'YouTube desc translation saved for {lang}')
-            except Exception:
-                logger.exception('YouTube desc translation failed for lang=%s', lang)
+    transaction.on_commit(_run)
 
-        close_old_connections()
 
-    def _start_background():
-        t = threading.Thread(
-            target=_run_translation,
-            args=(instance.pk, source_hash),
-            daemon=True,
-            name=f"translate-sitesetting-{instance.pk}",
-        )
-        t.start()
+def _queue_prerender(kind, object_id):
+    """Queue a pre-render pass for `manage.py translation_worker`.
+
+    Site-wide and category passes touch many pages, so they don't run in
+    the web worker that handled the save.
+    """
+    if not getattr(settings, 'PRERENDER_ENABLED', False):
+        return
+    transaction.on_commit(lambda: enqueue_job(kind, object_id, ''))
+
+
+@receiver(post_save, sender=Article)
+def prerender_article_on_save(sender, instance, **kwargs):
+    article_id = instance.pk
+    previous_slug = getattr(instance, '_previous_slug', None)
+
+    def _render():
+        from Article.prerender import remove_article
+
+        if previous_slug and previous_slug != instance.slug:
+            remove_article(previous_slug)
+        _prerender_articles(Article.objects.filter(pk=article_id))
+
+    _prerender_on_commit(f'article-{article_id}', _render)
 
-    transaction.on_commit(_start_background)
\ No newline at end of file
+
+@receiver(post_delete, sender=Article)
+def remove_prerendered_article(sender, instance, **kwargs):
+    from Article.prerender import remove_article
+
+    slug = instance.slug
+    _prerender_on_commit(f'article-{instance.pk}', lambda: remove_article(slug))
+
+
+@receiver(post_save, sender=ArticleTranslation)
+@receiver(post_delete, sender=ArticleTranslation)
+def prerender_translation(sender, instance, **kwargs):
+    # the Indonesian page is rendered from the Article itself
+    if instance.lang == 'id':
+        return
+    article_id, lang = instance.article_id, instance.lang
+
+    def _render():
+        from Article.prerender import prerender_article
+
+        for article in Article.objects.filter(pk=article_id).only('id', 'slug', 'status'):
+            prerender_article(article, langs=[lang])
+
+    _prerender_on_commit(f'article-{article_id}-{lang}', _render)
+
+
+@receiver(post_save, sender=Category)
+def prerender_renamed_category(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_name', None)
+    if not previous or previous == instance.name:
+        return
+    _queue_prerender(TranslationJob.KIND_PRERENDER_CATEGORY, instance.pk)
+
+
+@receiver(post_save, sender=SiteSetting)
+@receiver(post_save, sender=SiteSettingTranslation)
+def prerender_site_pages(sender, instance, **kwargs):
+    """Home shows the YouTube block and every article page shows the ads."""
+    # a settings save is followed by up to three SiteSettingTranslation saves; they fold into one pending job
+    setting_id = instance.pk if sender is SiteSetting else instance.setting_id
+    _queue_prerender(TranslationJob.KIND_PRERENDER_SITE, setting_id)
+
+
+@receiver(post_save, sender=Article)
+def translate_article_on_save(sender, instance, **kwargs):
+    logger.info(f'Signal triggered for article={instance.pk}, status={instance.status}')
+    # Only translate published articles
+    if instance.status != 'published':
+        logger.info(f'Skipping translation - article not published')
+        return
+
+    source_hash = _source_hash(instance.title, instance.content)
+    logger.info(f'Queueing translation for article={instance.pk}, hash={source_hash[:8]}')
+    article_id = instance.pk
+    # picked up by `manage.py translation_worker`
+    transaction.on_commit(lambda: enqueue_job(TranslationJob.KIND_ARTICLE, article_id, source_hash))
+
+
+@receiver(post_save, sender=SiteSetting)
+def translate_sitesetting_youtube_desc_on_save(sender, instance, **kwargs):
+    """Queue translation of the YouTube description when SiteSetting is saved."""
+
+    # Only proceed if youtube_desc is not empty
+    if not instance.youtube_desc or not instance.youtube_desc.strip():
+        return
+
+    source_hash = _sitesetting_source_hash(instance.youtube_desc)
+    setting_id = instance.pk
+    transaction.on_commit(lambda: enqueue_job(TranslationJob.KIND_SITESETTING, setting_id, source_hash))
\ No newline at end of file
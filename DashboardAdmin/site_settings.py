@@ -0,0 +1,142 @@
+"""
+Process-local, read-only snapshot of SiteSetting and its translations.
+
+Every worker keeps one immutable snapshot and rebuilds it only when the
+shared version key in the cache changes. The key is bumped from
+post_save/post_delete on SiteSetting and SiteSettingTranslation (see
+signals.py), so steady-state page views run no settings queries at all.
+"""
+import logging
+import re
+import threading
+import uuid
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'sitesetting:version'
+AD_SLOTS = ('left', 'right', 'top', 'down')
+
+SiteSnapshot = namedtuple('SiteSnapshot', [
+    'version',
+    'spotify_link',
+    'youtube_link',
+    'youtube_embed',
+    'youtube_desc',
+    'youtube_desc_translations',
+    'vote_link',
+    'ad_urls',
+    'ad_links',
+    'ad_names',
+    'translate_api_url',
+    'translate_api_key',
+])
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def youtube_embed_url(url):
+    """Normalize a YouTube link to an embed URL so iframes load the player correctly."""
+    if not url:
+        return ''
+    # watch?v=VIDEO or &v=VIDEO
+    m = re.search(r'[?&]v=([A-Za-z0-9_-]{6,})', url)
+    if not m:
+        # youtu.be/VIDEO or youtube.com/embed/VIDEO
+        m = re.search(r'(?:youtu\.be/|/embed/)([A-Za-z0-9_-]{6,})', url)
+    if m:
+        return f'https://www.youtube.com/embed/{m.group(1)}'
+    # if already looks like embed or raw id
+    if re.match(r'^[A-Za-z0-9_-]{6,}$', url):
+        return f'https://www.youtube.com/embed/{url}'
+    if 'youtube.com/embed/' in url:
+        return url
+    # fallback: return original
+    return url
+
+
+def _current_version():
+    try:
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(VERSION_KEY)
+        return version
+    except Exception:
+        return None
+
+
+def bump_version():
+    """Invalidate the snapshot in every worker."""
+    try:
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    except Exception:
+        logger.exception('Failed to bump SiteSetting snapshot version')
+
+
+def _build(version):
+    from DashboardAdmin.models import SiteSetting, SiteSettingTranslation
+
+    setting = SiteSetting.get_solo()
+    translations = {
+        lang: desc
+        for lang, desc in SiteSettingTranslation.objects.filter(setting=setting).values_list('lang', 'youtube_desc')
+        if desc
+    }
+
+    ad_urls, ad_links, ad_names = {}, {}, {}
+    for slot in AD_SLOTS:
+        image = getattr(setting, f'ad_{slot}')
+        url = None
+        try:
+            if image:
+                url = image.url
+        except Exception:
+            url = None
+        ad_urls[slot] = url
+        ad_names[slot] = image.name if image else None
+        # a link is only meaningful when its ad image exists
+        ad_links[slot] = (getattr(setting, f'ad_{slot}_link') or None) if url else None
+
+    return SiteSnapshot(
+        version=version,
+        spotify_link=setting.spotify_link,
+        youtube_link=setting.youtube_link,
+        youtube_embed=youtube_embed_url(setting.youtube_link),
+        youtube_desc=setting.youtube_desc,
+        youtube_desc_translations=MappingProxyType(translations),
+        vote_link=getattr(setting, 'vote_link', ''),
+        ad_urls=MappingProxyType(ad_urls),
+        ad_links=MappingProxyType(ad_links),
+        ad_names=MappingProxyType(ad_names),
+        translate_api_url=(setting.translate_api_url or '').strip(),
+        translate_api_key=(setting.translate_api_key or '').strip(),
+    )
+
+
+def get_site_snapshot():
+    """Return the current SiteSnapshot, rebuilding it only after a version bump."""
+    global _snapshot
+    version = _current_version()
+    snapshot = _snapshot
+    if snapshot is not None and version is not None and snapshot.version == version:
+        return snapshot
+    with _lock:
+        snapshot = _snapshot
+        if snapshot is not None and version is not None and snapshot.version == version:
+            return snapshot
+        # tag with the version read *before* loading so a concurrent bump forces a rebuild
+        snapshot = _build(version)
+        _snapshot = snapshot
+        return snapshot
+
+
+def youtube_desc_for(snapshot, lang):
+    if lang != 'id':
+        return snapshot.youtube_desc_translations.get(lang) or snapshot.youtube_desc
+    return snapshot.youtube_desc
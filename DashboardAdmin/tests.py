@@ -1,3 +1,255 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from Article import translation_memory
+from Article.tests import FakeProviderMixin, SeededDataMixin
+from Article.translation_client import TranslationClient
+from DashboardAdmin import translation_jobs
+from DashboardAdmin.models import Article, ArticleTranslation, Category, SiteSetting, TranslationJob, TranslationMemory
+
+
+@override_settings(TRANSLATION_PARALLEL_LANGS=False)
+class TranslationJobTests(SeededDataMixin, TestCase):
+    def jobs(self):
+        return TranslationJob.objects.filter(kind=TranslationJob.KIND_ARTICLE, object_id=self.article.pk)
+
+    def claim(self, owner='worker-a'):
+        return translation_jobs.claim_jobs(owner, limit=5)
+
+    def test_saves_fold_into_one_pending_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.title = 'changed once'
+            self.article.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.title = 'changed twice'
+            self.article.save()
+        job = self.jobs().get()
+        self.assertEqual(job.status, TranslationJob.STATUS_PENDING)
+        self.assertEqual(job.source_hash, translation_jobs._source_hash('changed twice', self.article.content))
+
+    def test_job_is_leased_to_one_worker(self):
+        translation_jobs.enqueue(TranslationJob.KIND_ARTICLE, self.article.pk, 'h')
+        self.assertEqual(len(self.claim('worker-a')), 1)
+        self.assertEqual(self.claim('worker-b'), [])
+
+        # a worker that died keeps the lease only until it expires
+        self.jobs().update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        [job] = self.claim('worker-b')
+        self.assertEqual((job.lease_owner, job.attempts), ('worker-b', 2))
+
+    def test_failures_back_off_then_fail_permanently(self):
+        translation_jobs.enqueue(TranslationJob.KIND_ARTICLE, self.article.pk, 'h')
+        self.jobs().update(max_attempts=2)
+        failing = mock.Mock(side_effect=translation_jobs.TranslationJobError('provider down'))
+        with mock.patch.dict(translation_jobs.HANDLERS, {TranslationJob.KIND_ARTICLE: failing}):
+            [job] = self.claim()
+            self.assertFalse(translation_jobs.run_job(job, 'worker-a'))
+            job.refresh_from_db()
+            self.assertEqual(job.status, TranslationJob.STATUS_PENDING)
+            self.assertGreater(job.run_after, timezone.now())
+            self.assertEqual(self.claim(), [])
+
+            self.jobs().update(run_after=timezone.now())
+            [job] = self.claim()
+            translation_jobs.run_job(job, 'worker-a')
+        job.refresh_from_db()
+        self.assertEqual(job.status, TranslationJob.STATUS_FAILED)
+        self.assertIn('provider down', job.last_error)
+        self.assertEqual(translation_jobs.queue_status()['counts'][TranslationJob.STATUS_FAILED], 1)
+
+    def test_lease_expiring_during_a_run_is_not_finished_twice(self):
+        translation_jobs.enqueue(TranslationJob.KIND_ARTICLE, self.article.pk, 'h')
+        [job] = self.claim('worker-a')
+
+        def slow(object_id, source_hash, heartbeat):
+            # worker-a stalls past its lease and worker-b takes the job over
+            self.jobs().update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+            self.assertEqual(len(self.claim('worker-b')), 1)
+            self.assertFalse(heartbeat())
+
+        with mock.patch.dict(translation_jobs.HANDLERS, {TranslationJob.KIND_ARTICLE: slow}):
+            with self.assertLogs('DashboardAdmin.translation_jobs', 'WARNING') as logs:
+                self.assertFalse(translation_jobs.run_job(job, 'worker-a'))
+        self.assertIn('lost its lease', logs.output[0])
+        job = self.jobs().get()
+        self.assertEqual((job.status, job.lease_owner), (TranslationJob.STATUS_RUNNING, 'worker-b'))
+
+    def test_heartbeat_renews_the_lease_between_languages(self):
+        translation_jobs.enqueue(TranslationJob.KIND_ARTICLE, self.article.pk, 'h')
+        [job] = self.claim('worker-a')
+        self.jobs().update(lease_expires_at=timezone.now() + timedelta(seconds=5))
+        beats = []
+
+        def heartbeat():
+            beats.append(translation_jobs.renew_leases([job.pk], 'worker-a'))
+            return True
+
+        with mock.patch.object(translation_jobs, '_translate_article_lang', side_effect=lambda lang, *args: ({
+            'title': lang, 'content': f'<p>{lang}</p>', 'desc': lang,
+        }, {})):
+            translation_jobs.translate_article(self.article.pk, '', heartbeat=heartbeat)
+        self.assertEqual(beats, [1, 1])
+        self.assertGreater(self.jobs().get().lease_expires_at, timezone.now() + timedelta(seconds=60))
+
+    def test_japanese_waits_for_english(self):
+        calls = []
+
+        def fake(lang, source_lang, source, known):
+            calls.append((lang, source_lang))
+            if lang == 'en':
+                raise RuntimeError('provider down')
+            return source, {}
+
+        with mock.patch.object(translation_jobs, '_translate_article_lang', side_effect=fake):
+            with self.assertRaisesMessage(translation_jobs.TranslationJobError, 'en, ja'):
+                translation_jobs.translate_article(self.article.pk, '')
+        self.assertEqual(calls, [('en', 'id')])
+        # the untranslated Indonesian row is still stored
+        self.assertTrue(self.article.translations.filter(lang='id').exists())
+
+    def test_run_skips_languages_already_translated(self):
+        source_hash = translation_jobs._source_hash(self.article.title, self.article.content)
+        self.article.translations.update(source_hash=source_hash)
+        ArticleTranslation.objects.create(article=self.article, lang='id', title='t', content='c', source_hash=source_hash)
+        translation_jobs.enqueue(TranslationJob.KIND_ARTICLE, self.article.pk, source_hash)
+        [job] = self.claim()
+        with mock.patch('Article.views._translate_text_via_provider') as provider:
+            self.assertTrue(translation_jobs.run_job(job, 'worker-a'))
+        provider.assert_not_called()
+        self.assertEqual(self.jobs().get().status, TranslationJob.STATUS_DONE)
+
+
+@override_settings(TRANSLATION_PARALLEL_LANGS=False)
+class ArticleTranslationTests(FakeProviderMixin, TestCase):
+    def test_resave_retranslates_only_edited_segments(self):
+        admin = User.objects.create_superuser('editor', 'editor@example.com', 'secret')
+        article = Article.objects.create(
+            article_id='incremental',
+            title='paragraf 0',
+            content=''.join(f'<p>paragraf {i}</p>' for i in range(30)) + '<p>paragraf 0</p>',
+            status='published',
+            category=Category.objects.create(name='anime'),
+            admin=admin,
+        )
+        translation_jobs.translate_article(article.pk, '')
+        en = ArticleTranslation.objects.get(article=article, lang='en')
+        self.assertEqual(en.content, ''.join(f'<p>en:paragraf {i}</p>' for i in range(30)) + '<p>en:paragraf 0</p>')
+        # the excerpt is cut from the translated body, and the title shares its segment with the body
+        self.assertEqual(en.desc, translation_jobs.article_desc(en.content))
+        sent = [text for payload in self.session.payloads if payload['target'] == 'en' for text in payload['q']]
+        self.assertEqual(len(sent), 30)
+
+        cache.clear()
+        self.session.payloads.clear()
+        article.content = article.content.replace('paragraf 7<', 'paragraf tujuh<')
+        article.save()
+        translation_jobs.translate_article(article.pk, '')
+
+        sent = [text for payload in self.session.payloads for text in (payload['q'] if isinstance(payload['q'], list) else [payload['q']])]
+        # only the edited paragraph, per language; Japanese is translated from the new English text
+        self.assertEqual(len(sent), 2)
+        self.assertIn('paragraf tujuh', sent)
+        self.assertIn('en:paragraf tujuh', sent)
+        self.assertEqual({p['source'] for p in self.session.payloads if p['target'] == 'ja'}, {'en'})
+        self.assertIn('<p>ja:en:paragraf tujuh</p><p>ja:en:paragraf 8</p>', ArticleTranslation.objects.get(article=article, lang='ja').content)
+
+    def test_untranslated_segments_keep_the_previous_translation(self):
+        admin = User.objects.create_superuser('editor', 'editor@example.com', 'secret')
+        article = Article.objects.create(
+            article_id='partial', title='Judul', content='<p>isi</p><p>rusak</p>',
+            status='published', category=Category.objects.create(name='anime'), admin=admin,
+        )
+        ArticleTranslation.objects.create(article=article, lang='en', title='Old', content='<p>old</p>', desc='old', source_hash='old')
+        self.session.failing.add('rusak')
+
+        with self.assertRaisesMessage(translation_jobs.TranslationJobError, 'en, ja'):
+            translation_jobs.translate_article(article.pk, '')
+        en = ArticleTranslation.objects.get(article=article, lang='en')
+        self.assertEqual((en.title, en.content, en.desc, en.source_hash), ('Old', '<p>old</p>', 'old', 'old'))
+        self.assertFalse(ArticleTranslation.objects.filter(article=article, lang='ja').exists())
+        # so the backfill still picks the article up
+        [(stale_article, stale, _)] = translation_jobs.find_stale_articles()
+        self.assertEqual((stale_article, stale), (article, ['en', 'ja']))
+
+    def test_provider_outage_requeues_the_job(self):
+        admin = User.objects.create_superuser('editor', 'editor@example.com', 'secret')
+        with self.captureOnCommitCallbacks(execute=True):
+            article = Article.objects.create(
+                article_id='outage', title='Judul', content='<p>isi</p>',
+                status='published', category=Category.objects.create(name='anime'), admin=admin,
+            )
+        self.session.status = 503
+        [job] = translation_jobs.claim_jobs('worker-a')
+        self.assertFalse(translation_jobs.run_job(job, 'worker-a'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (TranslationJob.STATUS_PENDING, 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('503', job.last_error)
+        self.assertEqual(list(article.translations.values_list('lang', flat=True)), ['id'])
+
+        self.session.status = 200
+        TranslationJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        [job] = translation_jobs.claim_jobs('worker-a')
+        self.assertTrue(translation_jobs.run_job(job, 'worker-a'))
+        self.assertEqual(ArticleTranslation.objects.get(article=article, lang='ja').title, 'ja:en:Judul')
+
+    def test_backfill_translates_stale_articles_and_resumes(self):
+        admin = User.objects.create_superuser('editor', 'editor@example.com', 'secret')
+        category = Category.objects.create(name='anime')
+        first, second = [
+            Article.objects.create(
+                article_id=f'backfill-{i}', title=f'Judul {i}', content=f'<p>isi {i}</p>',
+                status='published', category=category, admin=admin,
+            )
+            for i in range(2)
+        ]
+        checkpoint = Path(tempfile.mkdtemp()) / 'checkpoint.json'
+        self.addCleanup(shutil.rmtree, checkpoint.parent, ignore_errors=True)
+
+        out = StringIO()
+        call_command('translate_backfill', '--workers', '1', '--checkpoint', str(checkpoint), stdout=out)
+        self.assertIn('2 articles to translate', out.getvalue())
+        self.assertEqual(ArticleTranslation.objects.get(article=second, lang='ja').title, 'ja:en:Judul 1')
+        self.assertFalse(checkpoint.exists())
+
+        out = StringIO()
+        call_command('translate_backfill', '--checkpoint', str(checkpoint), stdout=out)
+        self.assertIn('0 articles to translate', out.getvalue())
+
+        # an interrupted forced run picks up after the articles it finished
+        checkpoint.write_text(json.dumps({'done': [first.pk], 'failed': {}}))
+        self.session.payloads.clear()
+        cache.clear()
+        translation_memory._lru.clear()
+        TranslationMemory.objects.all().delete()
+        call_command('translate_backfill', '--force', '--workers', '1', '--checkpoint', str(checkpoint), stdout=StringIO())
+        sent = [text for payload in self.session.payloads for text in payload['q']]
+        self.assertIn('isi 1', sent)
+        self.assertNotIn('isi 0', sent)
+
+
+class SiteSettingTests(TestCase):
+    def test_translation_config_follows_changes(self):
+        with mock.patch.dict('os.environ', {'TRANSLATE_API_URL': '', 'TRANSLATE_API_KEY': ''}):
+            client = TranslationClient()
+        setting = SiteSetting.get_solo()
+        setting.translate_api_url = 'http://provider-a/translate'
+        setting.save()
+        config = client.config()
+        self.assertEqual(config.url, 'http://provider-a/translate')
+        self.assertIs(client.config(), config)
+
+        setting.translate_api_url = 'http://provider-b/translate'
+        setting.save()
+        self.assertEqual(client.config().url, 'http://provider-b/translate')
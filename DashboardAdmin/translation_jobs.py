@@ -0,0 +1,552 @@
+"""
+Durable translation jobs.
+
+Saving an Article or the SiteSetting enqueues a TranslationJob (see
+signals.py). `manage.py translation_worker` claims due jobs with a lease,
+runs them and retries failures with exponential backoff. Running a job is
+idempotent: languages whose stored source_hash already matches are skipped,
+so a job that is re-run after an expired lease only redoes missing work.
+"""
+import hashlib
+import logging
+import random
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from Article.html_tokens import split_text, text_content
+from DashboardAdmin.models import Article, ArticleTranslation, SiteSetting, SiteSettingTranslation, TranslationJob
+
+
+logger = logging.getLogger(__name__)
+
+# Retry delay is BACKOFF_BASE * 2**(attempt - 1) seconds, capped at BACKOFF_MAX
+BACKOFF_BASE = 30
+BACKOFF_MAX = 60 * 60
+DEFAULT_LEASE_SECONDS = 10 * 60
+
+TARGET_LANGS = ['id', 'en', 'ja']
+# Language each article translation is made from ('id' is the article itself).
+# Japanese is translated from the English result: the provider has no direct
+# Indonesian -> Japanese model and used to pivot through English per segment.
+LANG_SOURCES = {'en': 'id', 'ja': 'en'}
+
+
+class TranslationJobError(Exception):
+    pass
+
+
+def _source_hash(title, content):
+    base = f"{title or ''}\n{content or ''}"
+    return hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+
+def _sitesetting_source_hash(youtube_desc):
+    """Generate hash of youtube_desc for change detection."""
+    return hashlib.sha256((youtube_desc or '').encode('utf-8')).hexdigest()
+
+
+# URLs, emails (strict - must have alphanumeric before @), phones, newlines
+# Email: alphanumeric.dash_percent before @, then domain.domain2.tld
+PRESERVE_RE = re.compile(r'(https?://[^\s\n]+|[a-zA-Z0-9][a-zA-Z0-9._%+-]*@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}|\+?\d[\d\s\-()]{6,}\d|\n\s*\n|\n)')
+
+
+def _split_text_and_preserve(text):
+    """Split text into parts: (is_preserved, content).
+
+    Preserved parts are URLs, emails, phones, and newlines.
+    Non-preserved parts are regular text that needs translation.
+    """
+    if not text:
+        return []
+    return split_text(text, PRESERVE_RE)
+
+
+def article_desc(content):
+    """The excerpt stored in ArticleTranslation.desc: the first 150 characters of the text."""
+    return Truncator(text_content(content)).chars(150)
+
+
+def _translate_parts(parts, target_lang, translate_segments, **kwargs):
+    """Translate only non-preserved parts, keep preserved parts unchanged.
+
+    The translatable parts go to the provider together (see
+    Article.views._translate_segments, which also receives `kwargs` and
+    raises when some of them could not be translated).
+    """
+    indices = [i for i, (is_preserved, content) in enumerate(parts) if not is_preserved]
+    result = [content for _, content in parts]
+    if indices:
+        for i, translated in zip(indices, translate_segments([result[i] for i in indices], target_lang, **kwargs)):
+            result[i] = translated
+    return ''.join(result)
+
+
+class _InlineExecutor:
+    """Runs submitted calls right away (TRANSLATION_PARALLEL_LANGS off)."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def _in_thread(fn):
+    # pool threads open their own DB connections (cache, translation memory)
+    def run(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            connections.close_all()
+    return run
+
+
+def _translate_article_lang(lang, source_lang, source, known):
+    """Translate one article from `source` ({'title', 'content', 'desc'} in `source_lang`).
+
+    Returns (texts, segments). Runs no queries of its own, so it can run in
+    a pool thread while the caller stores other languages. The excerpt is
+    not sent to the provider: it is cut from the translated content with
+    the same rules as the Indonesian one (see `article_desc`), so it is
+    only as complete as the content. Raises the provider error when any
+    segment of the title or content could not be translated; nothing
+    partly translated is returned.
+    """
+    from Article.views import _translate_html_preserve_tags, _translate_segments
+
+    if source_lang == 'id':
+        # the provider auto-detects Indonesian, as it always has for this site
+        source_lang = 'auto'
+    learned = {}
+    # Split title to preserve quoted text and special patterns
+    title_parts = _split_text_and_preserve(source['title'])
+    title_t = _translate_parts(title_parts, lang, _translate_segments, known=known, learned=learned, source_lang=source_lang)
+
+    # Translate HTML content (shielding is done internally); segments shared
+    # with the title are reused instead of being sent again
+    content_t = _translate_html_preserve_tags(
+        source['content'], lang, known={**known, **learned}, learned=learned, source_lang=source_lang,
+    )
+
+    logger.info(f'Translation {lang}: {content_t.count("<iframe")} iframes found ({len(learned)} segments)')
+    return {'title': title_t, 'content': content_t, 'desc': article_desc(content_t)}, learned
+
+
+def translate_article(article_id, source_hash_value, heartbeat=None):
+    """Create/refresh the id/en/ja ArticleTranslation rows of one article.
+
+    Languages follow LANG_SOURCES: en is translated from the article and ja
+    from the fresh en text, so the Indonesian source goes to the provider
+    once. A language starts as soon as its source is ready, and is stored
+    while the languages depending on it are already being translated.
+
+    Raises TranslationJobError when a language could not be translated so
+    the job is retried; languages that succeeded are not redone. Segments
+    whose source text is unchanged since the previous translation are
+    reused from ArticleTranslation.segments instead of being sent again.
+
+    `heartbeat` (see `run_job`) is called after each language finishes; it
+    renews the job's lease and returns False once another worker took the
+    job over, which stops this run before it stores anything more.
+    """
+    try:
+        article = Article.objects.get(pk=article_id)
+    except Article.DoesNotExist:
+        return
+
+    if article.status != 'published':
+        return
+
+    # translate what is stored now; the article may have changed since enqueue
+    source_hash_value = _source_hash(article.title, article.content)
+    base_desc = article_desc(article.content)
+
+    existing = {t.lang: t for t in ArticleTranslation.objects.filter(article=article, lang__in=TARGET_LANGS)}
+    # Indonesian: use original content directly without any modification
+    texts = {'id': {'title': article.title, 'content': article.content, 'desc': base_desc}}
+    up_to_date = set()
+    for lang in TARGET_LANGS:
+        row = existing.get(lang)
+        if row and row.source_hash == source_hash_value:
+            up_to_date.add(lang)
+            if lang != 'id':
+                # still usable as the source of another language
+                texts[lang] = {'title': row.title, 'content': row.content, 'desc': row.desc}
+
+    def _save(lang, segments):
+        row = existing.get(lang)
+        values = texts[lang]
+        if row:
+            row.title = values['title']
+            row.content = values['content']
+            row.desc = values['desc']
+            row.source_hash = source_hash_value
+            row.segments = segments
+            row.save(update_fields=['title', 'content', 'desc', 'source_hash', 'segments', 'updated_at'])
+        else:
+            ArticleTranslation.objects.create(
+                article=article,
+                lang=lang,
+                source_hash=source_hash_value,
+                segments=segments,
+                **values,
+            )
+        logger.info(f'Translation saved for {lang} article={article.pk}')
+
+    failed = []
+    errors = []
+    pending = [lang for lang in LANG_SOURCES if lang not in up_to_date]
+    running = {}
+    parallel = getattr(settings, 'TRANSLATION_PARALLEL_LANGS', True)
+    executor = ThreadPoolExecutor(max_workers=len(TARGET_LANGS), thread_name_prefix='translate-lang') if parallel else _InlineExecutor()
+    translate = _in_thread(_translate_article_lang) if parallel else _translate_article_lang
+
+    def _start_ready():
+        for lang in list(pending):
+            source_lang = LANG_SOURCES[lang]
+            if source_lang in failed:
+                pending.remove(lang)
+                failed.append(lang)
+            elif source_lang in texts:
+                pending.remove(lang)
+                row = existing.get(lang)
+                # only segments of the current source are kept, so the map does not grow
+                known = row.segments if row else {}
+                running[executor.submit(translate, lang, source_lang, texts[source_lang], known)] = lang
+
+    with executor:
+        _start_ready()
+        if 'id' not in up_to_date:
+            try:
+                _save('id', {})
+            except Exception as e:
+                logger.exception('Translation failed for lang=id article=%s', article.pk)
+                failed.append('id')
+                errors.append(e)
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            results = []
+            for future in finished:
+                lang = running.pop(future)
+                try:
+                    texts[lang], segments = future.result()
+                    results.append((lang, segments))
+                except Exception as e:
+                    logger.exception('Translation failed for lang=%s article=%s', lang, article.pk)
+                    failed.append(lang)
+                    errors.append(e)
+            if heartbeat is not None and not heartbeat():
+                for future in running:
+                    future.cancel()
+                raise TranslationJobError(f'article {article_id}: lease lost to another worker')
+            # start the dependent languages before storing these
+            _start_ready()
+            for lang, segments in results:
+                try:
+                    _save(lang, segments)
+                except Exception as e:
+                    logger.exception('Storing translation failed for lang=%s article=%s', lang, article.pk)
+                    failed.append(lang)
+                    errors.append(e)
+
+    if failed:
+        # the first error (e.g. the provider's 503) ends up in the job's last_error
+        raise TranslationJobError(f"article {article_id}: translation failed for {', '.join(failed)}: {errors[0]}") from errors[0]
+
+
+def find_stale_articles(slugs=None, force=False):
+    """Yield (article, stale_langs, chars) for published articles needing translation.
+
+    A language is stale when its ArticleTranslation is missing or was made
+    from another title/content (source_hash). The current hash is only
+    stored with a complete translation (`translate_article` keeps the old
+    row when a segment fails), so a language whose last run failed stays
+    stale. `chars` is the number of characters that would be sent to the
+    provider.
+    """
+    stored = {}
+    rows = ArticleTranslation.objects.filter(article__status='published', lang__in=TARGET_LANGS)
+    if slugs:
+        rows = rows.filter(article__slug__in=slugs)
+    for article_id, lang, stored_hash in rows.values_list('article_id', 'lang', 'source_hash').iterator():
+        stored[(article_id, lang)] = stored_hash
+
+    articles = Article.objects.filter(status='published').only('id', 'slug', 'title', 'content', 'status').order_by('id')
+    if slugs:
+        articles = articles.filter(slug__in=slugs)
+    for article in articles.iterator():
+        current = _source_hash(article.title, article.content)
+        stale = [lang for lang in TARGET_LANGS if force or stored.get((article.pk, lang)) != current]
+        if not stale:
+            continue
+        text_chars = len(article.title or '') + len(text_content(article.content))
+        translated = [lang for lang in stale if lang in LANG_SOURCES]
+        yield article, stale, text_chars * len(translated)
+
+
+def translate_sitesetting(setting_id, source_hash_value, heartbeat=None):
+    """Create/refresh the SiteSettingTranslation rows for youtube_desc."""
+    from Article.views import _translate_segments
+
+    try:
+        setting = SiteSetting.objects.get(pk=setting_id)
+    except SiteSetting.DoesNotExist:
+        return
+
+    # Check if we still have youtube_desc to translate
+    if not setting.youtube_desc or not setting.youtube_desc.strip():
+        return
+
+    source_hash_value = _sitesetting_source_hash(setting.youtube_desc)
+    failed = []
+    errors = []
+    for lang in TARGET_LANGS:
+        try:
+            existing = SiteSettingTranslation.objects.filter(setting=setting, lang=lang).first()
+
+            # Skip if unchanged (hash matches)
+            if existing and existing.source_hash == source_hash_value:
+                continue
+
+            if lang == 'id':
+                # Indonesian: use original content directly
+                desc_t = setting.youtube_desc
+            else:
+                # For English and Japanese: split text and URLs, translate only text
+                parts = _split_text_and_preserve(setting.youtube_desc)
+                desc_t = _translate_parts(parts, lang, _translate_segments)
+
+            if existing:
+                existing.youtube_desc = desc_t
+                existing.source_hash = source_hash_value
+                existing.save(update_fields=['youtube_desc', 'source_hash', 'updated_at'])
+            else:
+                SiteSettingTranslation.objects.create(
+                    setting=setting,
+                    lang=lang,
+                    youtube_desc=desc_t,
+                    source_hash=source_hash_value,
+                )
+            logger.info(f'YouTube desc translation saved for {lang}')
+        except Exception as e:
+            logger.exception('YouTube desc translation failed for lang=%s', lang)
+            failed.append(lang)
+            errors.append(e)
+
+    if failed:
+        raise TranslationJobError(f"sitesetting {setting_id}: translation failed for {', '.join(failed)}: {errors[0]}") from errors[0]
+
+
+# renew the lease (see run_job) after this many pre-rendered articles
+PRERENDER_HEARTBEAT_EVERY = 25
+
+
+def _prerender_articles(queryset, heartbeat=None):
+    from Article.prerender import prerender_article
+
+    for i, article in enumerate(queryset.only('id', 'slug', 'status').iterator(), start=1):
+        prerender_article(article)
+        if heartbeat is not None and i % PRERENDER_HEARTBEAT_EVERY == 0 and not heartbeat():
+            raise TranslationJobError('pre-render: lease lost to another worker')
+
+
+def prerender_site(setting_id, source_hash_value, heartbeat=None):
+    """Re-render the page shells and every published article (the site settings changed).
+
+    Queued by the SiteSetting signals so the pass runs in the worker, once,
+    however many web workers saw a save; saves made while a job is pending
+    fold into it.
+    """
+    from Article.prerender import prerender_shells
+
+    if not getattr(settings, 'PRERENDER_ENABLED', False):
+        return
+    prerender_shells()
+    _prerender_articles(Article.objects.filter(status='published'), heartbeat)
+
+
+def prerender_category(category_id, source_hash_value, heartbeat=None):
+    """Re-render the published articles of a renamed category."""
+    if not getattr(settings, 'PRERENDER_ENABLED', False):
+        return
+    _prerender_articles(Article.objects.filter(category_id=category_id, status='published'), heartbeat)
+
+
+HANDLERS = {
+    TranslationJob.KIND_ARTICLE: translate_article,
+    TranslationJob.KIND_SITESETTING: translate_sitesetting,
+    TranslationJob.KIND_PRERENDER_SITE: prerender_site,
+    TranslationJob.KIND_PRERENDER_CATEGORY: prerender_category,
+}
+
+
+def enqueue(kind, object_id, source_hash):
+    """Queue translation of one object, folding into a job that is still pending."""
+    now = timezone.now()
+    updated = TranslationJob.objects.filter(
+        kind=kind, object_id=object_id, status=TranslationJob.STATUS_PENDING,
+    ).update(source_hash=source_hash, run_after=now, attempts=0, last_error='', updated_at=now)
+    if not updated:
+        TranslationJob.objects.create(kind=kind, object_id=object_id, source_hash=source_hash, run_after=now)
+
+
+def _claimable(now):
+    # due pending jobs, plus running jobs whose worker stopped renewing the lease
+    return (
+        Q(status=TranslationJob.STATUS_PENDING, run_after__lte=now)
+        | Q(status=TranslationJob.STATUS_RUNNING, lease_expires_at__lt=now)
+    )
+
+
+def claim_jobs(owner, limit=1, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Lease up to `limit` due jobs to `owner` and return them.
+
+    Each claim is a conditional UPDATE on one row, so when several workers
+    race for the same job exactly one of them gets it.
+    """
+    now = timezone.now()
+    candidates = TranslationJob.objects.filter(_claimable(now)).order_by('run_after', 'id').values_list('id', flat=True)
+    claimed = []
+    for job_id in candidates[:limit * 2]:
+        if len(claimed) >= limit:
+            break
+        won = TranslationJob.objects.filter(_claimable(now), pk=job_id).update(
+            status=TranslationJob.STATUS_RUNNING,
+            lease_owner=owner,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        if won:
+            claimed.append(job_id)
+    if not claimed:
+        return []
+    return list(TranslationJob.objects.filter(pk__in=claimed, lease_owner=owner))
+
+
+def backoff_delay(attempts):
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    # jitter spreads retries of jobs that failed together (e.g. provider outage)
+    return delay + random.uniform(0, delay * 0.1)
+
+
+def renew_leases(job_ids, owner, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Push the lease of `owner`'s running jobs forward; returns how many it still holds."""
+    if not job_ids:
+        return 0
+    now = timezone.now()
+    return TranslationJob.objects.filter(
+        pk__in=list(job_ids), lease_owner=owner, status=TranslationJob.STATUS_RUNNING,
+    ).update(lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now)
+
+
+def _finish(job, owner, **fields):
+    # only the current lease holder may finish a job
+    return TranslationJob.objects.filter(pk=job.pk, lease_owner=owner, status=TranslationJob.STATUS_RUNNING).update(
+        lease_expires_at=None, updated_at=timezone.now(), **fields,
+    )
+
+
+def run_job(job, owner, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Run one claimed job and record the outcome. Returns True on success.
+
+    The handler gets a `heartbeat` that renews the lease, for long jobs on
+    top of the worker's periodic renewal. When the lease was lost anyway
+    (another worker took the job over), the outcome is not recorded.
+    """
+    handler = HANDLERS.get(job.kind)
+
+    def heartbeat():
+        return renew_leases([job.pk], owner, lease_seconds) > 0
+
+    try:
+        if handler is None:
+            raise TranslationJobError(f'unknown job kind {job.kind!r}')
+        handler(job.object_id, job.source_hash, heartbeat=heartbeat)
+    except Exception as e:
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            logger.error('Translation job %s failed permanently after %s attempts: %s', job.pk, job.attempts, e)
+            finished = _finish(job, owner, status=TranslationJob.STATUS_FAILED, finished_at=now, last_error=str(e)[:2000])
+        else:
+            delay = backoff_delay(job.attempts)
+            logger.warning('Translation job %s failed (attempt %s), retrying in %.0fs: %s', job.pk, job.attempts, delay, e)
+            finished = _finish(
+                job, owner,
+                status=TranslationJob.STATUS_PENDING,
+                run_after=now + timedelta(seconds=delay),
+                last_error=str(e)[:2000],
+            )
+        if not finished:
+            _lease_lost(job, owner)
+        return False
+    if not _finish(job, owner, status=TranslationJob.STATUS_DONE, finished_at=timezone.now(), last_error=''):
+        _lease_lost(job, owner)
+        return False
+    return True
+
+
+def _lease_lost(job, owner):
+    logger.warning('Translation job %s: %s lost its lease to another worker, outcome not recorded', job.pk, owner)
+
+
+WORKER_STATE_KEY = 'translation_worker:state'
+WORKER_STATE_TTL = 60
+
+
+def publish_worker_state(owner, state):
+    """Share a worker's provider client stats (limiter/circuit state) with the dashboard.
+
+    `state=None` removes the worker. Entries of workers that stopped
+    reporting expire after WORKER_STATE_TTL seconds.
+    """
+    now = time.time()
+    try:
+        workers = cache.get(WORKER_STATE_KEY) or {}
+        workers = {name: entry for name, entry in workers.items() if now - entry.get('reported_at', 0) < WORKER_STATE_TTL}
+        if state is None:
+            workers.pop(owner, None)
+        else:
+            workers[owner] = {**state, 'reported_at': now}
+        cache.set(WORKER_STATE_KEY, workers, WORKER_STATE_TTL)
+    except Exception:
+        logger.exception('Failed to publish translation worker state')
+
+
+def queue_status(recent=20):
+    """Summary for the dashboard status view."""
+    now = timezone.now()
+    counts = {status: 0 for status, _ in TranslationJob.STATUS_CHOICES}
+    for row in TranslationJob.objects.order_by().values('status').annotate(n=Count('id')):
+        counts[row['status']] = row['n']
+    oldest_due = (
+        TranslationJob.objects.filter(status=TranslationJob.STATUS_PENDING, run_after__lte=now)
+        .order_by('run_after').values_list('run_after', flat=True).first()
+    )
+    fields = ['id', 'kind', 'object_id', 'status', 'attempts', 'run_after', 'lease_owner', 'lease_expires_at', 'last_error', 'updated_at']
+    return {
+        'counts': counts,
+        'oldest_due_seconds': (now - oldest_due).total_seconds() if oldest_due else 0,
+        'running': list(TranslationJob.objects.filter(status=TranslationJob.STATUS_RUNNING).order_by('lease_expires_at').values(*fields)[:recent]),
+        'recent_failures': list(
+            TranslationJob.objects.exclude(last_error='').order_by('-updated_at').values(*fields)[:recent]
+        ),
+        'workers': cache.get(WORKER_STATE_KEY) or {},
+    }
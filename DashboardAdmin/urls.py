@@ -1,4 +1,4 @@
-from .views import index, list_articles, login, logout, view_article, edit_article, delete_article, settings_view, fetch_youtube_desc, debug_settings, pin_article
+from .views import index, list_articles, login, logout, view_article, edit_article, delete_article, settings_view, fetch_youtube_desc, debug_settings, pin_article, translation_jobs_status
 from django.urls import path
 from django.views.generic.base import RedirectView
 from .views import upload_image
@@ -23,5 +23,6 @@ urlpatterns = [
     path('settings/', settings_view, name='settings'),
     path('fetch-youtube-desc/', fetch_youtube_desc, name='fetch_youtube_desc'),
     path('debug-settings/', debug_settings, name='debug_settings'),
+    path('translation-jobs/', translation_jobs_status, name='translation_jobs_status'),
 
 ]
\ No newline at end of file
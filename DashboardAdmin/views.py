@@ -15,6 +15,7 @@ from django.http import Http404
 from django.contrib.messages import get_messages
 from django.urls import reverse
 from django.views.decorators.http import require_POST
+from django.core.cache import cache
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.conf import settings
@@ -23,9 +24,12 @@ import os
 import re
 from .forms import SiteSettingForm
 from .models import SiteSetting
+from .site_settings import AD_SLOTS, get_site_snapshot
+from .translation_jobs import queue_status
 from django.db.models import Q
 from django.utils.html import strip_tags
 from .security_utils import validate_image_file, sanitize_filename
+from Article.pagination import keyset_paginate, InvalidCursor
 
 from django.views.decorators.http import require_POST
 from django.http import JsonResponse
@@ -41,7 +45,7 @@ def list_articles(request):
     # Consume and clear any pending messages so stale validation errors don't show on list page
     list(get_messages(request))
 
-    qs = Article.objects.all().order_by('-created_at')
+    qs = Article.objects.select_related('category', 'admin').defer('content').order_by('-created_at')
 
     # Apply filters from GET params (status, category, q)
     status = (request.GET.get('status') or '').strip()
@@ -57,6 +61,18 @@ def list_articles(request):
 
     if q:
         qs = qs.filter(Q(title__icontains=q) | Q(content__icontains=q))
+    # also pass categories for filters
+    categories = Category.objects.all()
+
+    # keyset mode (?cursor=...): no COUNT(*) and no OFFSET scan for deep pages
+    cursor = request.GET.get('cursor')
+    if cursor is not None:
+        try:
+            cursor_page = keyset_paginate(qs, ['-created_at', '-id'], cursor=cursor, page_size=10)
+        except InvalidCursor:
+            cursor_page = keyset_paginate(qs, ['-created_at', '-id'], page_size=10)
+        return render(request, 'dashboard/list_article.html', {'articles': cursor_page.object_list, 'categories': categories, 'cursor_page': cursor_page})
+
     # paginate server-side
     try:
         page = int(request.GET.get('page', '1'))
@@ -72,8 +88,6 @@ def list_articles(request):
     except (EmptyPage, PageNotAnInteger):
         page_obj = paginator.page(1)
 
-    # also pass categories for filters
-    categories = Category.objects.all()
     return render(request, 'dashboard/list_article.html', {'articles': page_obj.object_list, 'categories': categories, 'page_obj': page_obj, 'paginator': paginator})
 # Create your views here.
 @login_required
@@ -509,7 +523,7 @@ def fetch_youtube_desc(request):
     if requests is None:
         return JsonResponse({'success': False, 'error': 'requests library not available'}, status=500)
 
-    setting = SiteSetting.get_solo()
+    setting = get_site_snapshot()
     raw = request.POST.get('youtube_link', '').strip() or setting.youtube_link or ''
 
     # extract video id
@@ -593,48 +607,28 @@ def fetch_youtube_desc(request):
 @login_required
 def debug_settings(request):
     """Admin-only debug endpoint returning current SiteSetting ad fields and file existence."""
-    setting = SiteSetting.get_solo()
+    setting = get_site_snapshot()
     data = {
         'spotify_link': setting.spotify_link,
         'youtube_link': setting.youtube_link,
         'youtube_desc': setting.youtube_desc,
-        'ad_left': None,
-        'ad_right': None,
-        'ad_down': None,
-        'ad_top': None,
+        'snapshot_version': setting.version,
     }
-    try:
-        if setting.ad_left and getattr(setting.ad_left, 'url', None):
-            data['ad_left'] = setting.ad_left.url
-            data['ad_left_exists'] = default_storage.exists(setting.ad_left.name)
-        else:
-            data['ad_left_exists'] = False
-    except Exception:
-        data['ad_left_exists'] = False
-    try:
-        if setting.ad_right and getattr(setting.ad_right, 'url', None):
-            data['ad_right'] = setting.ad_right.url
-            data['ad_right_exists'] = default_storage.exists(setting.ad_right.name)
-        else:
-            data['ad_right_exists'] = False
-    except Exception:
-        data['ad_right_exists'] = False
-    try:
-        if setting.ad_down and getattr(setting.ad_down, 'url', None):
-            data['ad_down'] = setting.ad_down.url
-            data['ad_down_exists'] = default_storage.exists(setting.ad_down.name)
-        else:
-            data['ad_down_exists'] = False
-    except Exception:
-        data['ad_down_exists'] = False
-    try:
-        if setting.ad_top and getattr(setting.ad_top, 'url', None):
-            data['ad_top'] = setting.ad_top.url
-            data['ad_top_exists'] = default_storage.exists(setting.ad_top.name)
-        else:
-            data['ad_top_exists'] = False
-    except Exception:
-        data['ad_top_exists'] = False
+    for slot in AD_SLOTS:
+        data[f'ad_{slot}'] = setting.ad_urls.get(slot)
+        try:
+            name = setting.ad_names.get(slot)
+            data[f'ad_{slot}_exists'] = bool(name) and default_storage.exists(name)
+        except Exception:
+            data[f'ad_{slot}_exists'] = False
+
+    # per-namespace L1/L2 hit counters of the worker that served this request
+    cache_stats = cache.stats() if hasattr(cache, 'stats') else None
+    return JsonResponse({'success': True, 'setting': data, 'cache': cache_stats})
 
-    return JsonResponse({'success': True, 'setting': data})
 
+@login_required
+@require_GET
+def translation_jobs_status(request):
+    """Admin-only JSON summary of the translation job queue."""
+    return JsonResponse({'success': True, **queue_status()})
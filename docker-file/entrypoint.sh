@@ -10,4 +10,9 @@ DB_PASSWORD="${DB_PASSWORD:-my_secure_password_123}"
 export DJANGO_ALLOWED_HOSTS="${DJANGO_ALLOWED_HOSTS:-localhost,127.0.0.1,0.0.0.0,web,581ef486ef03.ngrok-free.app}"
 export DJANGO_CSRF_TRUSTED_ORIGINS="${DJANGO_CSRF_TRUSTED_ORIGINS:-https://581ef486ef03.ngrok-free.app,http://localhost:8000,http://127.0.0.1:8000}"
 
+# The shared (L2) cache lives in database tables (CACHE_L2_BACKEND=db); without
+# them every cache read fails, including the login rate limiter on /dashboard/login/.
+# Safe to re-run: existing tables are left alone.
+python manage.py createcachetable
+
 exec python manage.py runserver 0.0.0.0:${DJANGO_PORT:-8000}
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the text and embed processing helpers.
+
+Measures ops/sec and peak allocation per call of autoembed,
+format_youtube_desc, _shield_embeds, _restore_placeholders,
+_split_text_and_preserve and the listing excerpt (listing_fields) on a
+generated corpus of small, typical and pathological articles (thousands of
+links, nested wrappers, many iframes). Standard library only.
+
+Usage:
+  python scripts/bench_text_helpers.py                        # run, compare with the baseline if there is one
+  python scripts/bench_text_helpers.py --save                 # run and store the results as the new baseline
+  python scripts/bench_text_helpers.py --only autoembed --size pathological
+  python scripts/bench_text_helpers.py --threshold 0.3 --json
+
+Exit status is 1 when a result is slower (ops/sec) or allocates more (peak
+bytes per call) than the baseline by more than --threshold. Baselines are
+machine-specific: save one before a change and compare after it on the same
+host.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'CleanSoundStudio.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from Article.templatetags.embed_filters import autoembed, format_youtube_desc  # noqa: E402
+from Article.views import _restore_placeholders, _shield_embeds, _shield_youtube_links  # noqa: E402
+from DashboardAdmin.content_utils import listing_fields  # noqa: E402
+from DashboardAdmin.translation_jobs import _split_text_and_preserve  # noqa: E402
+
+
+DEFAULT_BASELINE = BASE_DIR / 'scripts' / 'benchmarks' / 'text_helpers.json'
+
+WORDS = (
+    'musik rilis terbaru album konser penggemar lagu anime episode musim karakter studio '
+    'cerita game pemain update acara jepang jakarta tiket panggung penyanyi kolaborasi'
+).split()
+
+IFRAME = (
+    '<div class="w-full aspect-video mb-6"><iframe src="https://www.youtube.com/embed/{vid}" '
+    'frameborder="0" allowfullscreen></iframe></div>'
+)
+
+
+def _sentence(rng, n):
+    return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+
+
+def _links(rng, n):
+    links = []
+    for i in range(n):
+        kind = i % 4
+        if kind == 0:
+            links.append(f'https://example.com/{rng.choice(WORDS)}/{i}')
+        elif kind == 1:
+            links.append(f'www.{rng.choice(WORDS)}.id/{i}')
+        elif kind == 2:
+            links.append(f'{rng.choice(WORDS)}{i}@example.com')
+        else:
+            links.append(f'<a href="https://example.com/a/{i}">{rng.choice(WORDS)} {i}</a>')
+    return links
+
+
+def make_article(rng, paragraphs, links, iframes, nesting):
+    """Article HTML: a leading image, paragraphs with links, YouTube URLs and wrapped iframes."""
+    blocks = ['<p><img src="/media/cover.jpg" alt="cover"></p>']
+    link_pool = _links(rng, links)
+    per_paragraph = max(1, len(link_pool) // max(1, paragraphs))
+    for p in range(paragraphs):
+        chunk = link_pool[p * per_paragraph:(p + 1) * per_paragraph]
+        text = _sentence(rng, rng.randint(15, 40))
+        if chunk:
+            text += ' ' + ' / '.join(chunk)
+        if p % 5 == 2:
+            text += f' Tonton https://youtu.be/{rng.choice(WORDS)}{p:04d} sekarang'
+        blocks.append(f'<p>{text}</p>')
+        if iframes and p % max(1, paragraphs // iframes) == 0:
+            block = IFRAME.format(vid=f'vid{p:05d}')
+            for level in range(nesting):
+                block = f'<div class="wrap-{level}">{block}</div>'
+            blocks.append(block)
+    return ''.join(blocks)
+
+
+def make_desc(rng, links):
+    """YouTube description text: lines separated by slashes and newlines, full of links."""
+    lines = [_sentence(rng, 8)]
+    for link in _links(rng, links):
+        lines.append(f'{rng.choice(WORDS)}: {link}')
+    return ' / '.join(lines[:len(lines) // 2]) + '\n\n' + '\n'.join(lines[len(lines) // 2:])
+
+
+SIZES = {
+    'small': dict(paragraphs=3, links=2, iframes=0, nesting=0),
+    'typical': dict(paragraphs=15, links=20, iframes=2, nesting=1),
+    'pathological': dict(paragraphs=200, links=3000, iframes=150, nesting=4),
+}
+
+
+def build_corpus(seed):
+    rng = random.Random(seed)
+    corpus = {}
+    for name, shape in SIZES.items():
+        html = make_article(rng, **shape)
+        corpus[name] = {
+            'html': html,
+            'desc': make_desc(rng, shape['links']),
+            # the plain text that _split_text_and_preserve receives (titles, YouTube descriptions)
+            'text': '\n'.join(_sentence(rng, 12) + ' ' + ' '.join(_links(rng, 2)[:1]) for _ in range(shape['paragraphs'])),
+        }
+        masked, placeholders = _shield_youtube_links(html)
+        corpus[name]['masked'] = _shield_embeds(masked, placeholders)
+    return corpus
+
+
+def _uncached_listing_fields(html):
+    # listing_fields calls the memoized format_youtube_desc; a save always misses
+    format_youtube_desc.cache.clear()
+    return listing_fields(html)
+
+
+def cases(corpus):
+    """Yield (name, size, callable) for every helper and corpus size."""
+    # the memoized filters are measured uncached; a cache hit says nothing about the helper
+    raw_autoembed = autoembed.__wrapped__
+    raw_format_desc = format_youtube_desc.__wrapped__
+    for size, data in corpus.items():
+        html, desc, text = data['html'], data['desc'], data['text']
+        masked, placeholders = data['masked']
+        yield 'autoembed', size, lambda html=html: raw_autoembed(html)
+        yield 'format_youtube_desc', size, lambda desc=desc: raw_format_desc(desc)
+        yield 'shield_embeds', size, lambda html=html: _shield_embeds(*_shield_youtube_links(html))
+        yield 'restore_placeholders', size, lambda m=masked, p=placeholders: _restore_placeholders(m, p)
+        yield 'split_text_and_preserve', size, lambda text=text: _split_text_and_preserve(text)
+        yield 'listing_fields', size, lambda html=html: _uncached_listing_fields(html)
+
+
+def measure(func, min_time, repeat):
+    """Return (ops_per_sec, peak_bytes_per_call) for `func`."""
+    func()  # warm up: compiled patterns, lazy imports
+    # calibrate the number of calls per round to last about `min_time`
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / 4 or number >= 1_000_000:
+            break
+        number *= 4
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - started) / number)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        func()
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return 1 / best, peak
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regression messages."""
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if not old:
+            continue
+        if result['ops_per_sec'] < old['ops_per_sec'] * (1 - threshold):
+            regressions.append(f"{key}: {result['ops_per_sec']:.1f} ops/s, baseline {old['ops_per_sec']:.1f}")
+        if result['peak_bytes'] > old['peak_bytes'] * (1 + threshold) + 1024:
+            regressions.append(f"{key}: {result['peak_bytes']} peak bytes, baseline {old['peak_bytes']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='Write the results to --baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed relative regression (0.2 = 20%%)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Seconds per timing round')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing rounds; the best one counts')
+    parser.add_argument('--only', action='append', help='Run only this helper (repeatable)')
+    parser.add_argument('--size', action='append', choices=sorted(SIZES), help='Run only this corpus size (repeatable)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus(args.seed)
+    results = {}
+    for name, size, func in cases(corpus):
+        if (args.only and name not in args.only) or (args.size and size not in args.size):
+            continue
+        ops, peak = measure(func, args.min_time, args.repeat)
+        results[f'{name}/{size}'] = {'ops_per_sec': round(ops, 1), 'peak_bytes': peak}
+        if not args.json:
+            print(f'{name + "/" + size:<42} {ops:>12.1f} ops/s {peak / 1024:>10.1f} KiB peak', flush=True)
+
+    baseline = {}
+    if args.baseline.exists() and not args.save:
+        baseline = json.loads(args.baseline.read_text()).get('results', {})
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.json:
+        print(json.dumps({'results': results, 'regressions': regressions}, indent=2))
+    if args.save:
+        # merge, so a run limited by --only/--size keeps the other entries
+        saved = json.loads(args.baseline.read_text()).get('results', {}) if args.baseline.exists() else {}
+        saved.update(results)
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({'seed': args.seed, 'results': saved}, indent=2, sort_keys=True) + '\n')
+        print(f'Saved baseline to {args.baseline}', file=sys.stderr)
+    elif baseline and not args.json:
+        print(f'Compared with {args.baseline} (threshold {args.threshold:.0%})')
+    for message in regressions:
+        print(f'REGRESSION {message}', file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -285,16 +285,66 @@ const DATABASE = {
     "event.html": []
 };
 
+// Sections from the aggregated feed API, keyed by backend category name:
+// { pinned, items, page, total_pages, total_items }
+const FEED_SECTIONS = {};
+const FEED_PAGE_SIZE = 10;
+
+function currentApiLang() {
+    const current = getCurrentLang();
+    if (current === 'jp') return 'ja';
+    if (current === 'en' || current === 'ja' || current === 'id') return current;
+    return 'id';
+}
+
+function mapApiItem(item, lang) {
+    const prefix = lang === 'id' ? '' : `/${lang}`;
+    return {
+        id: item.id,
+        title: item.title,
+        slug: item.slug,
+        url: item.url || (item.slug ? `${prefix}/article/${item.slug}/` : null),
+        category: item.category,
+        img: item.img,
+        desc: item.desc,
+        is_pinned: item.is_pinned || false
+    };
+}
+
+// Fetch pinned hero + first page of several categories in a single request
+async function fetchFeed(categories, limit = FEED_PAGE_SIZE) {
+    try {
+        const lang = currentApiLang();
+        const url = `/api/feed/?categories=${encodeURIComponent(categories.join(','))}&limit=${limit}&lang=${encodeURIComponent(lang)}`;
+        console.log(`[fetchFeed] Current lang: ${lang}, fetching from ${url}`);
+        const res = await fetch(url);
+        if (!res.ok) {
+            console.error('Failed to fetch feed', res.status);
+            return {};
+        }
+        const json = await res.json();
+        const sections = {};
+        Object.entries(json.sections || {}).forEach(([name, section]) => {
+            sections[name] = {
+                pinned: section.pinned ? mapApiItem(section.pinned, lang) : null,
+                items: (section.items || []).map(item => mapApiItem(item, lang)),
+                page: section.page || 1,
+                total_pages: section.total_pages || 1,
+                total_items: section.total_items || 0
+            };
+        });
+        return sections;
+    } catch (e) {
+        console.error('Error fetching feed', e);
+        return {};
+    }
+}
+
 // Fetch categories from backend API and replace local DATABASE entries
 // This function now supports server-side pagination: returns { items, page, total_pages, total_items }
 async function fetchCategoryAPI(slug, page = 1, page_size = 10) {
     try {
-        const lang = (() => {
-            const current = getCurrentLang();
-            if (current === 'jp') return 'ja';
-            if (current === 'en' || current === 'ja' || current === 'id') return current;
-            return 'id';
-        })();
+        const lang = currentApiLang();
         const url = `/api/articles/${slug}/?page=${page}&page_size=${page_size}&lang=${encodeURIComponent(lang)}`;
         console.log(`[fetchCategoryAPI] Current lang: ${lang}, fetching from ${url}`);
         const res = await fetch(url);
@@ -312,17 +362,7 @@ async function fetchCategoryAPI(slug, page = 1, page_size = 10) {
                 console.log(`[fetchCategoryAPI] First item is PINNED`);
             }
         }
-        const prefix = lang === 'id' ? '' : `/${lang}`;
-        const mapped = rawItems.map(item => ({
-            id: item.id,
-            title: item.title,
-            slug: item.slug,
-            url: item.url || (item.slug ? `${prefix}/article/${item.slug}/` : null),
-            category: item.category,
-            img: item.img,
-            desc: item.desc,
-            is_pinned: item.is_pinned || false
-        }));
+        const mapped = rawItems.map(item => mapApiItem(item, lang));
         return { items: mapped, page: json.page || 1, total_pages: json.total_pages || 1, total_items: json.total_items || 0 };
     } catch (e) {
         console.error('Error fetching category', slug, e);
@@ -332,12 +372,7 @@ async function fetchCategoryAPI(slug, page = 1, page_size = 10) {
 
 async function fetchPinnedArticle(apiSlug) {
     try {
-        const lang = (() => {
-            const current = getCurrentLang();
-            if (current === 'jp') return 'ja';
-            if (current === 'en' || current === 'ja' || current === 'id') return current;
-            return 'id';
-        })();
+        const lang = currentApiLang();
         const url = `/api/articles/${apiSlug}/pinned/?lang=${encodeURIComponent(lang)}`;
         console.log(`[fetchPinnedArticle] Current lang: ${lang}, fetching from ${url}`);
         const res = await fetch(url);
@@ -360,12 +395,14 @@ async function loadRemoteCategories() {
     console.log(`[loadRemoteCategories] Current language: ${lang}`);
     
     const mapping = { anime: 'anime.html', gaming: 'game.html', geek: 'geek.html', event: 'event.html' };
-    const promises = Object.keys(mapping).map(async slug => {
-        const resp = await fetchCategoryAPI(slug, 1, 10);
-        const data = resp && resp.items ? resp.items : [];
-        if (data && data.length > 0) DATABASE[mapping[slug]] = data;
+    // One request for every section instead of a listing + pinned call per category
+    const sections = await fetchFeed(Object.keys(mapping), FEED_PAGE_SIZE);
+    Object.entries(mapping).forEach(([slug, key]) => {
+        const section = sections[slug];
+        if (!section) return;
+        FEED_SECTIONS[slug] = section;
+        if (section.items.length > 0) DATABASE[key] = section.items;
     });
-    await Promise.all(promises);
     // Log final counts
     Object.entries(mapping).forEach(([slug, key]) => {
         console.log(`[loadRemoteCategories] After load: ${key} has ${DATABASE[key].length} items`);
@@ -429,14 +466,16 @@ async function renderDynamicContent(page) {
     console.log(`[renderDynamicContent] Page slug: ${pageSlug}, API slug: ${apiPageSlug}`);
     console.log(`[renderDynamicContent] Fetching page ${page}`);
     
-    const resp = await fetchCategoryAPI(apiPageSlug, page, 10);
+    // Page 1 and the pinned hero were already loaded by the feed request
+    const section = FEED_SECTIONS[apiPageSlug];
+    const resp = (section && page === 1) ? section : await fetchCategoryAPI(apiPageSlug, page, FEED_PAGE_SIZE);
     console.log(`[renderDynamicContent] API response:`, resp);
     
     let items = resp.items || [];
     console.log(`[renderDynamicContent] Items count: ${items.length}`);
     
-    // Fetch pinned article and ensure it becomes the hero on any page
-    const pinned = await fetchPinnedArticle(apiPageSlug);
+    // Use the pinned article as the hero on any page
+    const pinned = section ? section.pinned : await fetchPinnedArticle(apiPageSlug);
     if (pinned) {
         console.log(`[renderDynamicContent] Found pinned: ${pinned.title}`);
         // remove pinned from items if present to avoid duplicates